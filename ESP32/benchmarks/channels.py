@@ -0,0 +1,53 @@
+"""
+Benchmark of the temperature-only fast path of `BMP280.fetch()`.
+
+One sensor on bus A (see `setup.json`) is read with both channels
+(6 bytes, temperature and pressure computed) and with the temperature
+only (3 bytes, no pressure computation). The read/write limiter is
+disabled for the benchmark, so the time per sample is the I2C transaction
+plus the CPU time of the compensation.
+
+Run on the ESP32 (the project files must be on the device)::
+
+    ampy --port COMx run benchmarks/channels.py
+"""
+# Standard micropython libraries
+import json
+from time import ticks_us
+from time import ticks_diff
+from machine import Pin
+from machine import SoftI2C
+
+# Local modules and variables
+from sensor import BMP280
+
+ROUNDS: int = 1_000
+
+with open('setup.json', 'r') as f:
+    BUS: dict = json.load(f)['I2C']['BUS_A']
+
+
+def timeit(call: function) -> float:
+    """ Returns: `float`. Microseconds per call. """
+    start: int = ticks_us()
+    for _ in range(ROUNDS):
+        call()
+    return ticks_diff(ticks_us(), start) / ROUNDS
+
+
+if __name__ == '__main__':
+    i2c: SoftI2C = SoftI2C(sda=Pin(BUS['SDA']), scl=Pin(BUS['SCL']),
+                           freq=BUS['FREQ'])
+    sensor: BMP280 = BMP280(i2c, 0x76)
+    sensor._rw_limiter_init = lambda: None  # No limiter
+    results: dict = {
+        'both channels': (
+            timeit(sensor.fetch),
+            timeit(lambda: sensor._read_into(0xF7, sensor._buf))),
+        'temperature only': (
+            timeit(lambda: sensor.fetch(pres=False)),
+            timeit(lambda: sensor._read_into(0xFA, sensor._tbuf))),
+    }
+    print('PATH\t\t\tSAMPLE [us]\tI2C [us]\tCPU [us]')
+    for name, (sample, bus) in results.items():
+        print(f'{name:<16}\t{sample:.1f}\t\t{bus:.1f}\t\t{sample - bus:.1f}')
@@ -0,0 +1,70 @@
+"""
+Microbenchmark of the per-sample functions in `sensor/formulae.py`.
+
+Two variants of the same source are compared:
+- bytecode: the `@micropython.*` decorators are removed before compiling.
+- emitters: the module as it is imported (native and viper code).
+
+Run on the ESP32 (the project files must be on the device)::
+
+    ampy --port COMx run benchmarks/formulae.py
+"""
+# Standard micropython libraries
+from time import ticks_us
+from time import ticks_diff
+
+# Local modules and variables
+from sensor import formulae
+
+ROUNDS: int = 1_000
+# Calibration example from the datasheet [CHAPTER 3.12]
+T_C: list = [27504, 26435, -1000]
+P_C: list = [36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000]
+DATA: bytearray = bytearray([0x65, 0x5A, 0xC0, 0x7E, 0xED, 0x00])
+
+
+def bytecode() -> dict:
+    """ Compile the functions without the code emitter decorators. """
+    with open('sensor/formulae.py', 'r') as f:
+        source: str = "\n".join(
+            line for line in f.read().split("\n")
+            if not line.startswith('@micropython.'))
+    namespace: dict = {'ptr8': lambda buf: buf}
+    exec(source, namespace)
+    return namespace
+
+
+def sample(f: dict) -> None:
+    """ One sample: unpack both values and compute the compensation. """
+    rawP: int = f['unpack20'](DATA, 0)
+    rawT: int = f['unpack20'](DATA, 3)
+    fineT: float = f['fine'](rawT, T_C)
+    f['temperature'](fineT)
+    f['pressure'](fineT, rawP, P_C)
+
+
+def timeit(call: function, *args) -> float:
+    """ Returns: `float`. Microseconds per call. """
+    start: int = ticks_us()
+    for _ in range(ROUNDS):
+        call(*args)
+    return ticks_diff(ticks_us(), start) / ROUNDS
+
+
+if __name__ == '__main__':
+    variants: dict = {
+        'bytecode': bytecode(),
+        'emitters': {name: getattr(formulae, name) for name in [
+            'unpack20', 'fine', 'temperature', 'pressure']},
+    }
+    print('FUNCTION\t' + '\t'.join(f'{v} [us]' for v in variants))
+    calls: dict = {
+        'unpack20': lambda f: timeit(f['unpack20'], DATA, 0),
+        'fine': lambda f: timeit(f['fine'], 519888, T_C),
+        'temperature': lambda f: timeit(f['temperature'], 128422.0),
+        'pressure': lambda f: timeit(f['pressure'], 128422.0, 415148, P_C),
+        'sample': lambda f: timeit(sample, f),
+    }
+    for name, call in calls.items():
+        print(name + '\t' + '\t'.join(
+            f'{call(f):.1f}' for f in variants.values()))
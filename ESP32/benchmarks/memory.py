@@ -0,0 +1,117 @@
+"""
+Soak benchmark of the garbage collection scheduling of `Memory`.
+
+A week of the main loop is simulated as fast as possible, with the
+`SEND_MEASUREMENT` and `SEND_KEEPALIVE` of `setup.json`: every cycle
+builds a measurement the way `Data` does (a list per sample), serializes
+it and keeps it in an in-flight list for a few cycles (like QoS 1), then
+sends the pings. No sensors or network are needed.
+
+The week runs twice: with the default collector (collections when the
+heap is full) and with `Memory` (collections before the measurement and
+at the idle points). Per simulated day the free memory and the largest
+free block after a collection, the automatic collections and the longest
+measurement burst are printed. With `Memory` the memory stays flat and no
+collection runs during a burst.
+
+Run on the ESP32 (the project files must be on the device)::
+
+    ampy --port COMx run benchmarks/memory.py
+"""
+# Standard micropython libraries
+import gc
+import json
+from time import ticks_us
+from time import ticks_diff
+
+# Local modules and variables
+from helpers import Memory
+
+DAYS: int = 7
+SENSORS: int = 4
+INFLIGHT: int = 3  # Cycles a message is kept, like an unacknowledged QoS 1
+
+with open('setup.json', 'r') as f:
+    CONFIG: dict = json.load(f)
+MQTT: dict = CONFIG['MQTT']
+SAMPLES: int = CONFIG['BMP280']['SAMPLES']
+CYCLES: int = 86_400 // MQTT['SEND_MEASUREMENT']  # Per day
+PINGS: int = MQTT['SEND_MEASUREMENT'] // MQTT['SEND_KEEPALIVE'] - 1
+
+
+def measurement(cycle: int) -> tuple[int, list]:
+    """
+    Allocations of one measurement, like `Data.get()`.
+    - returns: `tuple[int, list]`. Duration of the burst in us and the \
+        averages per sensor.
+    """
+    start: int = ticks_us()
+    data: list = [
+        [[20.0 + (cycle + n) % 7 / 10, 101_325.0 + s] for s in range(SENSORS)]
+        for n in range(SAMPLES)
+    ]
+    processed: list = [
+        [sum(v[s][i] for v in data) / len(data) for i in range(2)]
+        for s in range(SENSORS)
+    ]
+    del data
+    took: int = ticks_diff(ticks_us(), start)
+    return took, processed
+
+
+def serialize(message: str, extra: dict) -> bytes:
+    """ Allocations of `jsonize()` and the conversion to bytes. """
+    return bytes(json.dumps(dict(message=message, **extra)), 'utf-8')
+
+
+def week(memory: Memory, managed: bool) -> list:
+    """ Returns: `list`. Per day `[free, largest, automatic, burst max]`. """
+    inflight: list = []
+    days: list = []
+    alloc: int = gc.mem_alloc()
+    for _ in range(DAYS):
+        automatic: int = 0
+        burst: int = 0
+        for cycle in range(CYCLES):
+            if managed:
+                automatic += memory.cycle()['automatic']
+            took, processed = measurement(cycle)
+            burst: int = max(burst, took)
+            inflight.append(serialize('Measurement', {
+                'measurements': {
+                    f'{s}': {'Temperature': t, 'Pressure': p / 100}
+                    for s, (t, p) in enumerate(processed)}}))
+            if len(inflight) > INFLIGHT:
+                inflight.pop(0)
+            for _ in range(PINGS):
+                serialize('Ping', {'delivery': {
+                    'queued': 0, 'inflight': len(inflight), 'bytes': sum(
+                        len(m) for m in inflight)}})
+                if managed:
+                    memory.idle()
+                else:  # Detect the automatic collections
+                    now: int = gc.mem_alloc()
+                    automatic += now < alloc
+                    alloc: int = now
+        gc.collect()
+        free: int = gc.mem_free()
+        days.append([free, memory.largest(), automatic, burst])
+        alloc: int = gc.mem_alloc()
+    return days
+
+
+if __name__ == '__main__':
+    print(f'{DAYS} days, {CYCLES} measurements and {CYCLES * PINGS} '
+          f'pings per day, {SAMPLES} samples of {SENSORS} sensors')
+    for managed in (False, True):
+        memory: Memory = Memory()
+        if managed:
+            memory.start()
+        else:
+            gc.threshold(-1)  # The default: only collect when full
+            gc.enable()
+        print('\nMEMORY' if managed else '\nDEFAULT')
+        print('DAY\tFREE [B]\tLARGEST [B]\tAUTOMATIC\tBURST MAX [us]')
+        for day, row in enumerate(week(memory, managed)):
+            print('{}\t{}\t\t{}\t\t{}\t\t{}'.format(day + 1, *row))
+        gc.collect()
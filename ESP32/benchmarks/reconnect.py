@@ -0,0 +1,77 @@
+"""
+Benchmark of `Connector.recover()` for a plain and a TLS connection.
+
+The broker, WiFi and SSL settings are taken from `setup.json`. The
+connection is broken by closing the socket, after which the time and heap
+needed to resume it are measured. The garbage collector is disabled during
+a reconnect, so the allocated bytes are the peak heap used by it.
+
+Run on the ESP32 (the project files must be on the device)::
+
+    ampy --port COMx run benchmarks/reconnect.py
+"""
+# Standard micropython libraries
+import gc
+import json
+from time import ticks_ms
+from time import ticks_diff
+
+# Local modules and variables
+from wireless import WLAN
+from mqtt import Connector
+
+PORTS: dict = {'PLAIN': 1883, 'TLS': 8883}
+ROUNDS: int = 10
+
+with open('setup.json', 'r') as f:
+    CONFIG: dict = json.load(f)
+MQTT: dict = CONFIG['MQTT']
+
+
+def connector(tls: bool) -> Connector:
+    file: function = lambda path: (
+        None if not path else open(path, 'rb').read())
+    return Connector(
+        MQTT['CLIENT_ID'] + ('-tls' if tls else '-plain'),
+        MQTT['SERVER'],
+        port=PORTS['TLS' if tls else 'PLAIN'],
+        user=MQTT['USER'],
+        password=MQTT['PASSWORD'],
+        keepalive=MQTT['KEEPALIVE'],
+        ssl=tls,
+        ssl_params={
+            k.lower(): v if k not in ['KEY', 'CERT'] else file(v)
+            for k, v in MQTT['SSL'].items() if k != 'USE_SSL'
+        } if tls else {},
+        socket_timeout=MQTT['SOCKET_TIMEOUT'],
+        message_timeout=MQTT['MESSAGE_TIMEOUT']
+    )
+
+
+def benchmark(tls: bool) -> list[int]:
+    """ Returns: `list[int]`. [avg ms, max ms, avg bytes, max bytes] """
+    mqtt: Connector = connector(tls)
+    mqtt.connect(clean_session=True)
+    times: list = []
+    heap: list = []
+    for _ in range(ROUNDS):
+        mqtt.sock.close()  # Break the connection
+        gc.collect()
+        gc.disable()
+        before: int = gc.mem_alloc()
+        start: int = ticks_ms()
+        assert mqtt.recover(), "Broker could not be reached."
+        times.append(ticks_diff(ticks_ms(), start))
+        heap.append(gc.mem_alloc() - before)
+        gc.enable()
+    mqtt.disconnect()
+    return [sum(times) // ROUNDS, max(times), sum(heap) // ROUNDS, max(heap)]
+
+
+if __name__ == '__main__':
+    WIRELESS: dict = CONFIG['WIRELESS']
+    WLAN(WIRELESS['SSID'], WIRELESS['PASSWORD'],
+         networks=WIRELESS['NETWORKS']).connect()
+    print('MODE\tAVG [ms]\tMAX [ms]\tAVG [B]\tPEAK [B]')
+    for mode in PORTS:
+        print(mode, *benchmark(mode == 'TLS'), sep='\t')
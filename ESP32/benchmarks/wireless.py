@@ -0,0 +1,69 @@
+"""
+Benchmark of the time to associate with the access point of `WLAN`.
+
+The networks are taken from `setup.json`. Every round the WiFi interface
+is switched off and the association is started again, in three ways:
+- SSID: connect by SSID only (the previous behaviour), the WiFi driver
+  picks the access point.
+- SCAN: scan and rank the access points by RSSI, connect to the best one.
+- CACHED: connect directly to the cached BSSID.
+An association that takes longer than the `WIRELESS.TIMEOUT` counts as a
+failure. Run it with the device at the edge of the coverage (RSSI below
+-80 dBm) for the weak access point case, the RSSI is reported.
+
+Run on the ESP32 (the project files must be on the device)::
+
+    ampy --port COMx run benchmarks/wireless.py
+"""
+# Standard micropython libraries
+import json
+from time import sleep_ms
+from time import ticks_ms
+from time import ticks_diff
+
+# Local modules and variables
+from wireless import WLAN
+
+ROUNDS: int = 10
+
+with open('setup.json', 'r') as f:
+    WIRELESS: dict = json.load(f)['WIRELESS']
+
+
+def associate(internet: WLAN, mode: str) -> int:
+    """ Returns: `int`. Time to associate in ms, None on a timeout. """
+    internet.active(False)
+    sleep_ms(500)
+    internet.active(True)
+    start: int = ticks_ms()
+    if mode == 'SSID':
+        internet.current = (internet.SSID or list(internet.networks)[0],
+                            None, None)
+    else:
+        internet.candidates = internet.rank() if mode == 'SCAN' \
+            else [internet.current]
+        internet.current = internet.candidates.pop(0)
+    ssid, bssid, _ = internet.current
+    internet.wlan.connect(ssid, internet.networks[ssid], bssid=bssid)
+    while not internet.isConnected():
+        if ticks_diff(ticks_ms(), start) >= internet.timeout:
+            return None
+    return ticks_diff(ticks_ms(), start)
+
+
+if __name__ == '__main__':
+    internet: WLAN = WLAN(WIRELESS['SSID'], WIRELESS['PASSWORD'],
+                          networks=WIRELESS['NETWORKS'],
+                          timeout=WIRELESS['TIMEOUT'], cache='bench.json')
+    internet.connect()
+    print('Access point:', internet.report())
+    print('MODE\tAVG [ms]\tMAX [ms]\tFAILED\tRSSI [dBm]')
+    for mode in ['SSID', 'SCAN', 'CACHED']:
+        times: list = []
+        for _ in range(ROUNDS):
+            times.append(associate(internet, mode))
+        done: list = [t for t in times if t is not None]
+        print(mode, sum(done) // len(done) if done else '-',
+              max(done) if done else '-', ROUNDS - len(done),
+              internet.report()['rssi'], sep='\t')
+    internet.forget()
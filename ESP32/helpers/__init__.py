@@ -1,2 +1,12 @@
 from .data import Data
 from .settings import Settings
+from .profiler import Profiler
+from .tuning import Tuning
+from .governor import Governor
+from .acquisition import Acquisition
+from .calibrator import Calibrator
+from .capture import Capture
+from .memory import Memory
+from .message import Message
+from .detector import Detector
+from .history import History
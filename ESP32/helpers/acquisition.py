@@ -0,0 +1,80 @@
+# Standard micropython libraries
+# None
+
+# Local modules and variables
+# None
+
+
+class Acquisition:
+    # Standby times in ms per `SETTINGS().standbyTime()` index [CHAPTER 3.6.3]
+    STANDBY: tuple = (0.5, 62.5, 125.0, 250.0, 500.0, 1_000.0, 2_000.0,
+                      4_000.0)
+    # Samples needed by the IIR filter to reach 75% of a step response per
+    # `SETTINGS().iirMode()` index [CHAPTER 3.3.3]
+    SETTLE: tuple = (1, 2, 5, 11, 22)
+
+    def __init__(self, pressure: int = 5, temperature: int = 2,
+                 iir: int = 4, margin: int = 4) -> None:
+        """
+        The Acquisition class computes the settings of the 'hardware \
+            averaging' profile. The BMP280 runs in normal mode and averages \
+            with oversampling and the IIR filter. The ESP32 only reads one \
+            filtered sample per sensor per interval.
+        - keyword arguments:
+            - pressure: `int`. Pressure oversampling index (default x16).
+            - temperature: `int`. Temperature oversampling index \
+                (default x2).
+            - iir: `int`. IIR filter index (default 16). A filter with \
+                coefficient `c` reduces the noise variance `2c - 1` times, \
+                16 is about the same as the mean of 30 samples.
+            - margin: `int`. The filter must settle `margin` times within \
+                the interval.
+
+        See `ESP32\\sensor\\settings.py` for the indices.
+        """
+        self.pressure: int = pressure
+        self.temperature: int = temperature
+        self.iir: int = iir
+        self.margin: int = margin
+
+    def measurement_time(self) -> float:
+        """
+        Returns: `float`. Maximum measurement time in ms of one \
+            conversion [CHAPTER 3.8.1].
+        """
+        factor: function = lambda os: 1 << (os - 1) if os else 0
+        # The 0.575 ms of the pressure channel only applies if it is measured
+        return (1.25 + 2.3 * factor(self.temperature)
+                + (2.3 * factor(self.pressure) + 0.575
+                   if self.pressure else 0.0))
+
+    def standby(self, interval: int) -> int:
+        """
+        The longest standby time for which the IIR filter settles within \
+            the interval. Longer standby times need fewer conversions, the \
+            noise after the filter does not depend on it.
+        - arguments:
+            - interval: `int`. Reporting interval in seconds.
+        - returns: `int`. Index for `SETTINGS().standbyTime()`.
+        """
+        for index in range(len(self.STANDBY) - 1, 0, -1):
+            period: float = self.measurement_time() + self.STANDBY[index]
+            if self.SETTLE[self.iir] * period * self.margin <= \
+                    interval * 1_000:
+                return index
+        return 0
+
+    def settings(self, interval: int) -> dict:
+        """
+        Settings for the sensors for the given reporting interval.
+        - arguments:
+            - interval: `int`. Reporting interval in seconds.
+        - returns: `dict`. Indices for `SETTINGS()`: \
+            `{'POWER', 'IIR', 'STANDBY', 'OS': {'TEMP', 'PRES'}}`.
+        """
+        return {
+            'POWER': 2,  # Normal mode
+            'IIR': self.iir,
+            'STANDBY': self.standby(interval),
+            'OS': {'TEMP': self.temperature, 'PRES': self.pressure},
+        }
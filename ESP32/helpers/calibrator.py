@@ -0,0 +1,125 @@
+# Standard micropython libraries
+from time import ticks_us
+from time import ticks_diff
+
+# Local modules and variables
+from sensor import BMP280  # Only used for typing
+from sensor.registers import REGISTERS as REG
+from sensor.registers import PRESSURE as PRES
+from helpers.acquisition import Acquisition
+from helpers.data import Data  # Only used for typing
+
+
+class Calibrator:
+    def __init__(self, sensor: list[BMP280], rounds: int = 10,
+                 margin: float = 1.2, share: float = 0.01) -> None:
+        """
+        The Calibrator class measures the timing of the sensors at boot and \
+            picks the limiter period (`BMP280.TIMER`) and the amount of \
+            samples (`BMP280.SAMPLES`) of the 'software' profile.
+        - The transaction latency is the longest burst read of the \
+            measurement registers over `rounds` reads. It depends on the \
+            bus frequency and the cable to the sensor.
+        - The conversion time is measured with one forced conversion at \
+            the configured oversampling.
+        - arguments:
+            - sensor: `list[BMP280]`. Configured sensors.
+        - keyword arguments:
+            - rounds: `int`. Amount of reads per sensor.
+            - margin: `float`. Safety factor on the measured times.
+            - share: `float`. Part of the measurement interval that may be \
+                used for the acquisition.
+
+        #### Example::
+
+            calibrator = Calibrator(sensor)
+            timer, samples = calibrator.calibrate(300, standby=0)
+        """
+        self.sensor: list[BMP280] = sensor
+        self.rounds: int = rounds
+        self.margin: float = margin
+        self.share: float = share
+        self.latency: list = []  # Per sensor in us
+        self.conversion: list = []  # Per sensor in us
+        self.timer: int = None
+        self.samples: int = None
+
+    def _latency(self, s: BMP280) -> int:
+        """ Longest burst read of the 6 measurement bytes in us. """
+        buf: bytearray = bytearray(6)
+        longest: int = 0
+        for _ in range(self.rounds):
+            start: int = ticks_us()
+            try:
+                s._i2c.readfrom_mem_into(s._addr, PRES.MSB, buf)
+            except OSError:  # If the device is disconnected
+                return 0
+            longest: int = max(longest, ticks_diff(ticks_us(), start))
+        return longest
+
+    def _conversion(self, s: BMP280, timeout: int = 100) -> int:
+        """
+        Time of one forced conversion in us. The sensor is put back in \
+            its power mode afterwards.
+        """
+        mode: int = s.power()
+        s.power(mode=0x00)  # Sleep, a forced conversion starts from sleep
+        s.power(mode=0x01)  # Forced
+        start: int = ticks_us()
+        try:
+            # Poll the 'measuring' bit of the status register
+            while s._i2c.readfrom_mem(s._addr, REG.STATUS, 1)[0] & 0x08:
+                if ticks_diff(ticks_us(), start) > timeout * 1_000:
+                    break
+        except OSError:  # If the device is disconnected
+            pass
+        took: int = ticks_diff(ticks_us(), start)
+        s.power(mode=mode)
+        return took
+
+    def calibrate(self, interval: int, standby: int = 0) -> tuple[int, int]:
+        """
+        Measure all sensors and pick the settings.
+        - The limiter period is the longest conversion plus the standby \
+            time (a new sample is available) times `margin`, at least \
+            10 ms (the minimum of the limiter).
+        - One sample of all sensors takes the limiter period or the sum \
+            of the transaction latencies, whichever is longer. The amount \
+            of samples fills `share` of the interval, capped at 50 \
+            (the cap of `Data`).
+        - arguments:
+            - interval: `int`. Measurement interval in seconds \
+                (`MQTT.SEND_MEASUREMENT`).
+        - keyword arguments:
+            - standby: `int`. Index of the standby time of the sensors.
+        - returns: `tuple[int, int]`. Limiter period in ms and samples.
+        """
+        self.latency: list = [self._latency(s) for s in self.sensor]
+        self.conversion: list = [self._conversion(s) for s in self.sensor]
+        period: float = (max(self.conversion) / 1_000
+                         + Acquisition.STANDBY[standby]) * self.margin
+        self.timer: int = max(10, int(period + 0.999))
+        sample: float = max(self.timer,
+                            sum(self.latency) / 1_000 * self.margin)
+        self.samples: int = max(1, min(
+            50, int(interval * 1_000 * self.share / sample)))
+        return self.timer, self.samples
+
+    def apply(self, data: Data) -> None:
+        """ Set the limiter period of the sensors and the samples of data. """
+        for s in self.sensor:
+            s.timer_period = self.timer
+        data.samples = self.samples
+        data.period = None
+
+    def report(self, names: list[str]) -> dict:
+        """
+        Returns: `dict`. The measured times in us per sensor and the \
+            chosen settings.
+        """
+        return {
+            'latency': dict(zip(names, self.latency)),
+            'conversion': dict(zip(names, self.conversion)),
+            'TIMER': self.timer,
+            'SAMPLES': self.samples,
+        }
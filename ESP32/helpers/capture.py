@@ -0,0 +1,153 @@
+# Standard micropython libraries
+import _thread
+from time import ticks_us
+from time import ticks_ms
+from time import ticks_diff
+from time import ticks_add
+from ustruct import pack_into
+
+# Local modules and variables
+from sensor import BMP280  # Only used for typing
+from sensor.registers import PRESSURE as PRES
+
+
+class Capture:
+    # Chunk header: magic, sequence number, amount of sensors, amount of
+    # samples and the dropped samples since the start of the capture
+    MAGIC: bytes = b'LSC\x02'
+    HEADER: str = '<4sIBHI'
+    HEADER_SIZE: int = 15
+
+    def __init__(self, sensor: list[BMP280], chunk: int = 32) -> None:
+        """
+        The Capture class streams every sample of all sensors, for example \
+            to record the thermal transient when a charging session starts.
+        A thread reads the sensors as fast as the read/write limiter \
+            (`BMP280.TIMER`) allows and packs the raw bytes in fixed-size \
+            chunks. There are two preallocated chunk buffers: while one is \
+            filled, the other one is published by the main loop. If both \
+            buffers are full because the network can not keep up, the \
+            samples are dropped and counted.
+        The thread is the only user of the I2C buses while it runs: the \
+            main loop does not measure and `Tuning` rejects patches of the \
+            sensor settings.
+
+        Chunk layout (little endian)::
+
+            header: magic b'LSC\\x02', sequence (uint32), sensors (uint8),
+                    samples (uint16), dropped samples (uint32)
+            sample: ticks_us (uint32), per sensor the 6 raw bytes of the
+                    measurement registers (pressure, temperature)
+
+        The compensation values are sent in the 'Calibration' message.
+        - arguments:
+            - sensor: `list[BMP280]`. Configured sensors.
+        - keyword arguments:
+            - chunk: `int`. Amount of samples per chunk.
+
+        #### Example::
+
+            capture = Capture(sensor)
+            capture.start(60)  # Seconds
+            while capture.running or capture.pending():
+                buf = capture.pending()
+                if buf:
+                    mqtt.stream(topic, buf)
+                    capture.release()
+        """
+        self.sensor: list[BMP280] = sensor
+        self.chunk: int = chunk
+        self.row: int = 4 + 6 * len(sensor)
+        size: int = self.HEADER_SIZE + chunk * self.row
+        self.buffers: list = [bytearray(size), bytearray(size)]
+        self.views: list = [memoryview(b) for b in self.buffers]
+        self.full: list = [False, False]
+        self.running: bool = False
+        self.deadline: int = 0
+        self._fill: int = 0  # Buffer filled by the thread
+        self._send: int = 0  # Buffer published by the main loop
+        # Counters of the current capture
+        self.sequence: int = 0
+        self.samples: int = 0
+        self.dropped: int = 0
+        self.lost: int = 0  # Chunks that could not be published
+
+    def start(self, duration: int) -> None:
+        """
+        Start a capture of `duration` seconds, or extend the running one. \
+            A capture whose last chunks have not been published yet goes \
+            on, its chunks are kept.
+        """
+        self.deadline: int = ticks_add(ticks_ms(), duration * 1_000)
+        if self.running:
+            return
+        if self.pending() is None:  # A new capture
+            self.sequence: int = 0
+            self.samples: int = 0
+            self.dropped: int = 0
+            self.lost: int = 0
+        self.running: bool = True
+        _thread.start_new_thread(self._run, ())
+
+    def stop(self) -> None:
+        """ Stop the capture, the thread ends after the current sample. """
+        self.deadline: int = ticks_ms()
+
+    def _run(self) -> None:
+        """ Acquisition thread. """
+        count: int = 0
+        while ticks_diff(self.deadline, ticks_ms()) > 0:
+            if self.full[self._fill]:  # Both buffers wait to be published
+                for s in self.sensor:
+                    s._read_into(PRES.MSB, s._buf)
+                self.dropped += 1
+                continue
+            buf: bytearray = self.buffers[self._fill]
+            offset: int = self.HEADER_SIZE + count * self.row
+            pack_into('<I', buf, offset, ticks_us())
+            offset += 4
+            for s in self.sensor:
+                buf[offset:offset + 6] = s._read_into(PRES.MSB, s._buf)
+                offset += 6
+            count += 1
+            self.samples += 1
+            if count == self.chunk:
+                self._close(count)
+                count: int = 0
+        if count:  # The last chunk is shorter
+            self._close(count)
+        self.running: bool = False
+
+    def _close(self, count: int) -> None:
+        """ Write the header and hand the buffer to the main loop. """
+        pack_into(self.HEADER, self.buffers[self._fill], 0, self.MAGIC,
+                  self.sequence, len(self.sensor), count, self.dropped)
+        self.sequence += 1
+        self.full[self._fill] = True
+        self._fill ^= 1
+
+    def pending(self) -> memoryview | None:
+        """
+        Returns: `memoryview | None`. The next full chunk, None if there is \
+            none. Call `release()` after it has been published.
+        """
+        if not self.full[self._send]:
+            return None
+        count: int = self.buffers[self._send][9] \
+            | self.buffers[self._send][10] << 8
+        return self.views[self._send][:self.HEADER_SIZE + count * self.row]
+
+    def release(self, sent: bool = True) -> None:
+        """ Give the published chunk back to the thread. """
+        if not sent:
+            self.lost += 1
+        self.full[self._send] = False
+        self._send ^= 1
+
+    def report(self) -> dict:
+        return {
+            'chunks': self.sequence,
+            'samples': self.samples,
+            'dropped': self.dropped,
+            'lost': self.lost,
+        }
@@ -1,15 +1,22 @@
 # Standard micropython libraries
+from time import time
 from time import time_ns
+from time import ticks_ms
+from time import ticks_diff
+from time import sleep_ms
 
 # Local modules and variables
 from sensor import BMP280  # Only used for typing
+from helpers.governor import Governor  # Only used for typing
 
 
 class Data:
     def __init__(self,
                  sensor: list[BMP280],
                  samples: int = None,
-                 period: int = None
+                 period: int = None,
+                 raw: bool = False,
+                 governor: Governor = None
                  ) -> None:
         """
         # The Data class is used to fetch BMP280 sensor data.
@@ -29,6 +36,12 @@ class Data:
                 depends on the `timer_period` setting in `BMP280`. \
                 It is recommended to increase the `timer_period` if the \
                 `period` is set `1_000 < period`. \
+            - raw: `bool`. Default: `False`. Fetch the uncompensated \
+                values (`rawT`, `rawP`) instead of the temperature and \
+                pressure. The compensation is left to the receiving side.
+            - governor: `Governor`. Default: `None`. If set, the raw values \
+                are fetched at the low CPU frequency and compensated \
+                afterwards in one burst at the high CPU frequency.
 
 
         #### The amount of data points taken is capped at 50. This is to \
@@ -49,12 +62,21 @@ class Data:
             Data(list(BMP280), samples=25)
         """
         self._sum: function = lambda data, num: [
-            sum(val[num][pos] for val in data)/len(data) for pos in [0, 1]
+            sum(val[num][pos] for val in data)/len(data)
+            for pos in range(len(data[0][num]))
         ]
         self.sensor: list[BMP280] = sensor
         self.samples: int = samples
         self.period: int = period if samples is None else None
+        self.raw: bool = raw
+        self.governor: Governor = governor
+        # Measure the pressure channel, see `channels()`
+        self.pressure: bool = True
         self.processed: list = []
+        # Timings of the last acquisition
+        self.duration: int = None  # Duration in ms
+        self.timestamp: int = None  # Time of the acquisition (time.time())
+        self.count: int = 0  # Amount of samples per sensor
 
     def _fetch(self) -> None:
         """
@@ -65,18 +87,21 @@ class Data:
         - As many times in `period`. Also depends on the delay between \
             measurements set in `BMP280`.
         """
+        pres: bool = self.pressure
+        fetch: function = (lambda s: s.fetch_raw(pres=pres)) \
+            if self.raw or self.governor else (lambda s: s.fetch(pres=pres))
         if isinstance(self.samples, int):
             if self.samples > 50:
                 self.samples: int = 50
             self.data: list = [
-                [s.fetch() for s in self.sensor]
+                [fetch(s) for s in self.sensor]
                 for _ in range(self.samples)
             ]
         else:
             self.data: list = []
             _time = time_ns()
             while time_ns() - _time <= self.period * 1e6:
-                self.data.append([s.fetch() for s in self.sensor])
+                self.data.append([fetch(s) for s in self.sensor])
                 if len(self.data) >= 50:
                     break
 
@@ -89,23 +114,62 @@ class Data:
         - Format: `BMP280[DATA[temperature, pressure]]`
             - temperature in \u00b0C
             - pressure in Pa. divide by `100` to get hPa.
+        - Format if `raw`: `BMP280[DATA[rawT, rawP]]`
+        - Without the pressure channel (see `channels()`) the pressure \
+            is left out: `BMP280[DATA[temperature]]`
         """
         self.processed: list = []  # Make list empty
+        start: int = ticks_ms()
         self._fetch()
+        if self.governor and not self.raw:
+            self.governor.boost()
+            self.data: list = [
+                [s.compensate(*raw) for s, raw in zip(self.sensor, sample)]
+                for sample in self.data
+            ]
+            self.governor.idle()
         self.processed: list = [
             self._sum(self.data, num)
             for num in range(len(self.data[0]))
         ]
+        self.count: int = len(self.data)
         del self.data  # Preserving space
+        self.duration: int = ticks_diff(ticks_ms(), start)
+        self.timestamp: int = time()
         return self.processed
 
+    def channels(self, pressure: bool, os: tuple, settle: int = 0,
+                 timer: int = None) -> None:
+        """
+        Switch the pressure channel on or off. Without the pressure \
+            channel the pressure oversampling is set to skip, the sensors \
+            convert faster and only the 3 temperature bytes are read.
+        - arguments:
+            - pressure: `bool`. Measure the pressure.
+            - os: `tuple`. `SETTINGS().osMode()` with the pressure channel.
+        - keyword arguments:
+            - settle: `int`. Time in ms for one conversion with the new \
+                settings. The next sample is read after this time.
+            - timer: `int`. Limiter period of the sensors in ms with the \
+                new settings, unchanged if None.
+        """
+        if pressure == self.pressure:
+            return
+        for s in self.sensor:
+            s.oversampling(pres_temp=os if pressure else (0x00, os[1]))
+            if timer is not None:
+                s.timer_period = timer
+        self.pressure: bool = pressure
+        sleep_ms(settle)
+
     def __str__(self) -> str:
+        # Only the cached data is shown, no new data is fetched
         if self.processed == []:
-            _ = self.get()
+            return "No data has been fetched yet."
         return "\n".join([
             f"""{sensor._i2c} [{hex(sensor._addr)}]
             Temperature: {self.processed[num][0]:.2f}   \u00b0C
-            Pressure:    {self.processed[num][1]/100.0:.2f} hPa
-            """
+            """ + (f"""Pressure:    {self.processed[num][1]/100.0:.2f} hPa
+            """ if len(self.processed[num]) > 1 else "")
             for num, sensor in enumerate(self.sensor)
         ])
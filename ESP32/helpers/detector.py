@@ -0,0 +1,135 @@
+# Standard micropython libraries
+from time import ticks_ms
+from time import ticks_diff
+
+# Local modules and variables
+# None
+
+
+class Detector:
+    def __init__(self, names: list[str], fast: int = 30, window: int = 5,
+                 slope: float = 0.5, limit: float = 60.0,
+                 hold: int = 600) -> None:
+        """
+        The Detector class detects thermal events in the measurements and \
+            shortens the measurement interval while they last.
+        Every sensor keeps the temperatures of the last `window` \
+            measurements in a ring buffer. An update is O(1): the slope is \
+            taken since the previous measurement (step) and since the \
+            oldest measurement of the window (trend), the limit is \
+            compared with the previous temperature.
+        - An event starts when the step slope of a sensor reaches `slope` \
+            or its temperature crosses `limit`. The interval drops to \
+            `fast`.
+        - The event holds while the trend of a sensor is at least half the \
+            slope or it is above the limit. `hold` seconds after the last \
+            trigger the interval doubles every measurement, back to the \
+            normal interval.
+        - arguments:
+            - names: `list[str]`. Names of the sensors (`['A1', ...]`).
+        - keyword arguments:
+            - fast: `int`. Measurement interval in seconds during an event.
+            - window: `int`. Measurements per sensor in the window.
+            - slope: `float`. Slope in °C/min that starts an event.
+            - limit: `float`. Temperature in °C that starts an event.
+            - hold: `int`. Seconds after the last trigger before the \
+                interval decays.
+
+        #### Example::
+
+            detector = Detector(['A1', 'A2'])
+            event = detector.update(data.get(), 300)
+            if detector.due():  # Measure before the normal interval
+                ...
+        """
+        self.names: list[str] = names
+        self.fast: int = fast
+        self.window: int = window
+        self.slope: float = slope
+        self.limit: float = limit
+        self.hold: int = hold * 1_000
+        self.interval: int = None  # Current interval, None is normal
+        self.events: int = 0
+        # Ring buffers per sensor: temperatures and their ticks_ms
+        self._temp: list = [[0.0] * window for _ in names]
+        self._ticks: list = [[0] * window for _ in names]
+        self._count: int = 0  # Updates in the window, at most `window`
+        self._next: int = 0  # Position of the next update
+        self._last: int = ticks_ms()  # Last update
+        self._trigger: int = 0  # Last trigger
+
+    def due(self) -> bool:
+        """ Returns: `bool`. True if a measurement is due during an event. """
+        return self.interval is not None and \
+            ticks_diff(ticks_ms(), self._last) >= self.interval * 1_000
+
+    def _slope(self, now: int, s: int, i: int, temp: float) -> float:
+        """ Slope in °C/min since position `i` in the window of `s`. """
+        dt: int = ticks_diff(now, self._ticks[s][i])
+        return (temp - self._temp[s][i]) * 60_000 / dt if dt > 0 else 0.0
+
+    def _rates(self, now: int, values: list) -> list:
+        """ Step and trend slope and the limit crossing per sensor. """
+        oldest: int = (self._next - self._count) % self.window
+        previous: int = (self._next - 1) % self.window
+        rates: list = []
+        for s in range(len(values)):
+            temp: float = values[s][0]
+            if self._count:
+                step: float = self._slope(now, s, previous, temp)
+                trend: float = self._slope(now, s, oldest, temp)
+            else:
+                step: float = 0.0
+                trend: float = 0.0
+            crossed: bool = temp >= self.limit and (
+                not self._count or self._temp[s][previous] < self.limit)
+            rates.append((step, trend, crossed, temp))
+        return rates
+
+    def update(self, values: list, interval: int) -> dict | None:
+        """
+        Add a measurement.
+        - arguments:
+            - values: `list`. Values per sensor, as returned by \
+                `Data.get()` (temperature first).
+            - interval: `int`. Normal measurement interval in seconds.
+        - returns: `dict | None`. The 'Event' fields when an event starts \
+            or ends, otherwise None.
+        """
+        now: int = ticks_ms()
+        rates: list = self._rates(now, values)
+        # The oldest value is overwritten once the window is full
+        for s in range(len(values)):
+            self._temp[s][self._next] = values[s][0]
+            self._ticks[s][self._next] = now
+        self._next = (self._next + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+        self._last: int = now
+
+        start: bool = any(
+            step >= self.slope or crossed for step, _, crossed, _ in rates)
+        if start or (self.interval is not None and any(
+                trend >= self.slope / 2 or temp >= self.limit
+                for _, trend, _, temp in rates)):
+            self._trigger: int = now
+        if start and self.interval is None:
+            self.interval: int = min(self.fast, interval)
+            self.events += 1
+            return self._event('start', rates, self.interval)
+        if self.interval is None or \
+                ticks_diff(now, self._trigger) < self.hold:
+            return None
+        # Decay back to the normal interval
+        self.interval *= 2
+        if self.interval < interval:
+            return None
+        self.interval: int = None
+        return self._event('end', rates, interval)
+
+    def _event(self, state: str, rates: list, interval: int) -> dict:
+        return {
+            'state': state,
+            'interval': interval,
+            'slope': {n: round(r[0], 3) for n, r in zip(self.names, rates)},
+            'events': self.events,
+        }
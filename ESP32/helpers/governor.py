@@ -0,0 +1,89 @@
+# Standard micropython libraries
+from time import ticks_ms
+from time import ticks_diff
+from machine import freq
+
+# Local modules and variables
+# None
+
+
+class Governor:
+    def __init__(self,
+                 buses: list = None,
+                 high: int = 240_000_000,
+                 low: int = 80_000_000,
+                 period: int = 3_600) -> None:
+        """
+        The Governor class scales the CPU frequency around the work phases.
+        Heavy work (TLS handshakes, compensation math) runs at `high`, \
+            waiting and SoftI2C polling runs at `low`.
+        - keyword arguments:
+            - buses: `list`. The SoftI2C buses and their settings: \
+                `[(SoftI2C, {'scl': Pin, 'sda': Pin, 'freq': int}), ...]`. \
+                The buses are initialized again after every switch, so the \
+                SoftI2C bit timing is computed for the new CPU frequency.
+            - high: `int`. CPU frequency in Hz for heavy work.
+            - low: `int`. CPU frequency in Hz for waiting and polling.
+            - period: `int`. Reporting period in seconds.
+
+        Only switch between transactions, never during an I2C transfer.
+
+        #### Example::
+
+            governor = Governor(buses=[(i2c, {'scl': Pin(19), ...})])
+            governor.boost()
+            ...  # Heavy work
+            governor.idle()
+        """
+        self.buses: list = buses or []
+        self.high: int = high
+        self.low: int = low
+        self.period: int = period * 1_000
+        self.spent: dict = {}  # Time spent per frequency: {Hz: ms}
+        self.last: dict = None  # Report of the last complete period
+        self._since: int = ticks_ms()
+        self._start: int = self._since
+
+    def _account(self) -> None:
+        """ Add the time since the last switch to the current frequency. """
+        now: int = ticks_ms()
+        current: int = freq()
+        self.spent[current] = self.spent.get(current, 0) + \
+            ticks_diff(now, self._since)
+        self._since: int = now
+        if ticks_diff(now, self._start) >= self.period:
+            self.last: dict = {
+                f'{hz // 1_000_000}MHz': ms // 1_000
+                for hz, ms in self.spent.items()
+            }
+            self.spent: dict = {}
+            self._start: int = now
+
+    def set(self, frequency: int) -> None:
+        """
+        Switch to the given CPU frequency (80, 160 or 240 MHz).
+        Nothing happens if the device already runs at this frequency.
+        """
+        if freq() == frequency:
+            return
+        self._account()
+        freq(frequency)
+        for bus, settings in self.buses:
+            bus.init(**settings)
+
+    def boost(self) -> None:
+        """ Switch to the high frequency. """
+        self.set(self.high)
+
+    def idle(self) -> None:
+        """ Switch to the low frequency. """
+        self.set(self.low)
+
+    def report(self) -> dict:
+        """
+        Returns: `dict`. Seconds spent at each frequency during the last \
+            complete period (one hour by default). `None` until the \
+            first period has passed.
+        """
+        self._account()
+        return self.last
@@ -0,0 +1,121 @@
+# Standard micropython libraries
+from array import array
+from ustruct import pack_into
+
+# Local modules and variables
+# None
+
+
+class History:
+    # Backfill message: magic, rows, sensors, flags and the sensor labels
+    # (2 bytes each), followed per row by the sequence number, the time in
+    # seconds since 2000-01-01 (the epoch of MicroPython) and per sensor the
+    # two values. A missing pressure is NaN.
+    MAGIC: bytes = b'LSC\x03'
+    HEADER: str = '<4sHBB'
+    HEADER_SIZE: int = 8
+    RAW: int = 0x01  # Flag: the values are rawT and rawP
+
+    def __init__(self, labels: list[str], size: int = 144,
+                 raw: bool = False) -> None:
+        """
+        The History class keeps the last `size` measurements (the averages \
+            per interval) in a ring buffer of arrays, so lost messages can \
+            be sent again. Every measurement has a sequence number that \
+            increases by one per measurement since boot.
+        The collector detects the gaps in the sequence numbers and requests \
+            the missing range with `{"BACKFILL": [first, last]}` on the \
+            control topic. The available measurements of the range are \
+            answered with one packed message.
+        - arguments:
+            - labels: `list[str]`. Names of the sensors (`['A1', ...]`).
+        - keyword arguments:
+            - size: `int`. Amount of measurements kept.
+            - raw: `bool`. The values are `rawT` and `rawP`.
+
+        #### Example::
+
+            history = History(['A1', 'A2'])
+            seq = history.append(time.mktime(cet_tz()), data.get())
+            history.request(seq - 5, seq)
+            first, last = history.pending.pop(0)
+            mqtt.publish(topic, history.pack(first, min(
+                last, first + history.rows(1024) - 1)))
+        """
+        self.labels: list[str] = labels
+        self.size: int = size
+        self.raw: bool = raw
+        self.sensors: int = len(labels)
+        self.sequence: int = -1  # Sequence number of the newest measurement
+        self.pending: list = []  # Requested ranges: [[first, last], ...]
+        self._seq: array = array('I', [0] * size)
+        self._time: array = array('I', [0] * size)
+        self._values: array = array('f', [0.0] * (size * 2 * self.sensors))
+        self._nan: float = float('nan')
+
+    def append(self, time: int, values: list) -> int:
+        """
+        Add a measurement, the oldest one is overwritten.
+        - arguments:
+            - time: `int`. Time of the measurement message in seconds.
+            - values: `list`. Values per sensor, as returned by \
+                `Data.get()`. The pressure is kept in hPa, as it is sent. A \
+                sensor without the pressure channel only holds the \
+                temperature.
+        - returns: `int`. Sequence number of the measurement.
+        """
+        self.sequence += 1
+        pos: int = self.sequence % self.size
+        self._seq[pos] = self.sequence
+        self._time[pos] = time
+        offset: int = pos * 2 * self.sensors
+        for s in range(self.sensors):
+            val: list = values[s] if s < len(values) else ()
+            self._values[offset] = val[0] if val else self._nan
+            self._values[offset + 1] = self._nan if len(val) < 2 else \
+                val[1] if self.raw else val[1] / 100
+            offset += 2
+        return self.sequence
+
+    def oldest(self) -> int:
+        """ Returns: `int`. Sequence number of the oldest measurement. """
+        return max(0, self.sequence - self.size + 1)
+
+    def request(self, first: int, last: int) -> None:
+        """ Queue a backfill of the sequence numbers `first` to `last`. """
+        self.pending.append([first, last])
+
+    def rows(self, budget: int) -> int:
+        """
+        Returns: `int`. Max. amount of measurements in a backfill message \
+            of at most `budget` bytes (at least 1).
+        """
+        return max(1, (budget - self.HEADER_SIZE - 2 * self.sensors)
+                   // (8 + 8 * self.sensors))
+
+    def pack(self, first: int, last: int) -> bytearray:
+        """
+        Pack the measurements of a range that are still in the buffer.
+        - returns: `bytearray`. The backfill message, without rows if none \
+            of the measurements is available anymore.
+        """
+        first: int = max(first, self.oldest())
+        last: int = min(last, self.sequence)
+        count: int = max(0, last - first + 1)
+        row: int = 8 + 8 * self.sensors
+        buf: bytearray = bytearray(
+            self.HEADER_SIZE + 2 * self.sensors + count * row)
+        pack_into(self.HEADER, buf, 0, self.MAGIC, count, self.sensors,
+                  self.RAW if self.raw else 0)
+        offset: int = self.HEADER_SIZE
+        for label in self.labels:
+            buf[offset:offset + 2] = label.encode()
+            offset += 2
+        fmt: str = '<II' + 'f' * (2 * self.sensors)
+        for seq in range(first, last + 1):
+            pos: int = seq % self.size
+            start: int = pos * 2 * self.sensors
+            pack_into(fmt, buf, offset, self._seq[pos], self._time[pos],
+                      *self._values[start:start + 2 * self.sensors])
+            offset += row
+        return buf
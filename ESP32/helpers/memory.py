@@ -0,0 +1,151 @@
+# Standard micropython libraries
+import gc
+from time import ticks_us
+from time import ticks_diff
+
+# Local modules and variables
+# None
+
+
+class Memory:
+    def __init__(self, threshold: int = 25, idle: int = 10,
+                 step: int = 16) -> None:
+        """
+        The Memory class schedules the garbage collections of the main loop.
+        Without it a collection runs wherever the allocator decides, for \
+            example in the middle of an I2C burst or a TLS write.
+        - The automatic collection (`gc.threshold`) only runs after \
+            `threshold` percent of the free heap has been allocated, it is \
+            a safety net.
+        - `idle()` is called at the idle points of the main loop and \
+            collects once `idle` percent of the free heap has been \
+            allocated, long before the automatic collection would run.
+        - `cycle()` collects before every measurement and records the free \
+            memory and the collection pauses of the last cycle.
+        - `report()` adds the largest free block, the probe allocates \
+            nearly the whole heap, call it only for the pings and metrics.
+        - keyword arguments:
+            - threshold: `int`. Percent of the free heap after boot that \
+                triggers an automatic collection.
+            - idle: `int`. Percent of the free heap after boot that is \
+                collected at the next idle point.
+            - step: `int`. Resolution of the largest free block probe, the \
+                block is found within `100 / step` percent.
+
+        Allocate the long-lived buffers (`bytearray`) directly after a \
+            `collect()` at boot, before the TLS handshake fragments the heap.
+
+        #### Example::
+
+            memory = Memory()
+            memory.collect()
+            ...  # Allocate the long-lived buffers
+            memory.start()
+            while True:
+                memory.cycle()  # Before the measurement
+                ...
+                memory.idle()  # When there is nothing to do
+        """
+        self.threshold: int = threshold
+        self.idle_share: int = idle
+        self.step: int = step
+        self.budget: int = 0  # Bytes allocated before `idle()` collects
+        self.collections: int = 0  # Explicit collections in this cycle
+        self.automatic: int = 0  # Automatic collections in this cycle
+        self.pauses: list = []  # Pause in us per collection in this cycle
+        self.last: dict = None  # Report of the last complete cycle
+        self._alloc: int = gc.mem_alloc()
+
+    def start(self) -> None:
+        """
+        Set the automatic threshold and the idle budget from the free heap \
+            and enable the garbage collector.
+        """
+        self.collect()
+        free: int = gc.mem_free()
+        gc.threshold(free * self.threshold // 100)
+        self.budget: int = free * self.idle_share // 100
+        gc.enable()
+        self.cycle()
+
+    def collect(self) -> int:
+        """
+        Collect the garbage now.
+        - returns: `int`. Pause in us.
+        """
+        start: int = ticks_us()
+        gc.collect()
+        pause: int = ticks_diff(ticks_us(), start)
+        self.collections += 1
+        self.pauses.append(pause)
+        self._alloc: int = gc.mem_alloc()
+        return pause
+
+    def idle(self) -> None:
+        """
+        Idle point of the main loop. Collects if more than the idle budget \
+            has been allocated since the last collection. A drop of the \
+            allocated memory without `collect()` is counted as an \
+            automatic collection.
+        """
+        alloc: int = gc.mem_alloc()
+        if alloc < self._alloc:
+            self.automatic += 1
+            self._alloc: int = alloc
+        elif alloc - self._alloc >= self.budget:
+            self.collect()
+
+    def largest(self) -> int:
+        """
+        Probe the largest free block: allocations that shrink from the \
+            free memory until one fits. The collector is disabled during \
+            the probe, a failed allocation does not allocate anything.
+        - returns: `int`. Size of the largest free block in bytes.
+        """
+        size: int = gc.mem_free()
+        enabled: bool = gc.isenabled()
+        gc.disable()
+        try:
+            while size > 16:
+                try:
+                    bytearray(size)
+                    break
+                except MemoryError:
+                    size -= max(16, size // self.step)
+        finally:
+            if enabled:
+                gc.enable()
+        gc.collect()  # Frees the probe
+        self._alloc: int = gc.mem_alloc()
+        return size
+
+    def cycle(self) -> dict:
+        """
+        Close the current cycle, call this before every measurement. The \
+            heap is collected, so the measurement runs without a collection.
+        - returns: `dict`. See `report()`.
+        """
+        self.collect()
+        pauses: list = self.pauses
+        self.last: dict = {
+            'free': gc.mem_free(),
+            'collections': self.collections,
+            'automatic': self.automatic,
+            'pause': [min(pauses), sum(pauses) // len(pauses), max(pauses)],
+        }
+        self.collections: int = 0
+        self.automatic: int = 0
+        self.pauses: list = []
+        return self.last
+
+    def report(self) -> dict:
+        """
+        Returns: `dict`. The free memory in bytes after the collection at \
+            the end of the last cycle, the largest free block in bytes \
+            probed now, the explicit and automatic collections during the \
+            cycle and the pauses of the explicit collections in us \
+            `[min, avg, max]`.
+        """
+        report: dict = dict(self.last)
+        report['largest'] = self.largest()
+        return report
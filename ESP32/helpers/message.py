@@ -0,0 +1,137 @@
+# Standard micropython libraries
+# None
+
+# Local modules and variables
+# None
+
+
+class Message:
+    # Characters
+    COMMA: int = 0x2C
+    DOT: int = 0x2E
+    MINUS: int = 0x2D
+    CLOSE: int = 0x7D  # }
+
+    def __init__(self, topic: str, buses: list[str], raw: bool = False,
+                 decimals: int = None) -> None:
+        """
+        The Message class formats the 'Measurement' messages directly into \
+            one preallocated `bytearray`, with the same JSON layout as \
+            `jsonize()`. The keys are encoded once, the numbers are written \
+            digit by digit, so no strings are allocated per message. The \
+            message is returned as a `memoryview` of the buffer and is only \
+            valid until the next message.
+        - arguments:
+            - topic: `str`. Topic of the messages, encoded once to `topic`.
+            - buses: `list[str]`. Active sensors, the keys of the \
+                measurements.
+        - keyword arguments:
+            - raw: `bool`. The values are `rawT` and `rawP` instead of the \
+                temperature and pressure (in hPa, the pressure in Pa is \
+                divided by 100).
+            - decimals: `int`. Decimals of the values. Default 3, or 1 for \
+                raw values.
+
+        #### Example::
+
+            message = Message('lsc/pole-1', ['A1', 'B1'])
+            view = message.measurement(cet_tz(), data.get())
+            mqtt.publish(message.topic, view)
+        """
+        self.topic: bytes = topic.encode()
+        self.raw: bool = raw
+        self.decimals: int = (1 if raw else 3) if decimals is None \
+            else decimals
+        self.scale: int = 10 ** self.decimals
+        first, second = ('rawT', 'rawP') if raw \
+            else ('Temperature', 'Pressure')
+        self._head: bytes = b'{"message":"Measurement","time":['
+        self._open: bytes = b'],"measurements":{'
+        self._bus: list = [f'"{b}":{{"{first}":'.encode() for b in buses]
+        self._second: bytes = f',"{second}":'.encode()
+        self._seq: bytes = b',"seq":'
+        # Longest number: sign, 10 digits (small int), dot and decimals
+        number: int = 12 + self.decimals
+        size: int = len(self._head) + 6 * 11 + len(self._open) + sum(
+            len(b) + len(self._second) + 2 * number + 2 for b in self._bus
+        ) + 2 + len(self._seq) + 10
+        self.buf: bytearray = bytearray(size)
+        self.view: memoryview = memoryview(self.buf)
+
+    def _put(self, pos: int, data: bytes) -> int:
+        """ Copy `data` to the buffer at `pos`, returns the next position. """
+        end: int = pos + len(data)
+        self.view[pos:end] = data
+        return end
+
+    def _int(self, pos: int, value: int) -> int:
+        """ Write a positive integer at `pos`, returns the next position. """
+        digits: int = 1
+        rest: int = value
+        while rest >= 10:
+            rest //= 10
+            digits += 1
+        end: int = pos + digits
+        for i in range(end - 1, pos - 1, -1):
+            self.buf[i] = 0x30 + value % 10
+            value //= 10
+        return end
+
+    def _fixed(self, pos: int, value: float) -> int:
+        """ Write `value` with `decimals` decimals at `pos`. """
+        scaled: int = int(value * self.scale + (0.5 if value >= 0 else -0.5))
+        if scaled < 0:
+            self.buf[pos] = self.MINUS
+            pos += 1
+            scaled = -scaled
+        pos = self._int(pos, scaled // self.scale)
+        if not self.decimals:
+            return pos
+        self.buf[pos] = self.DOT
+        # Leading zeros of the decimals
+        fraction: int = scaled % self.scale + self.scale
+        end: int = self._int(pos, fraction)  # Writes '1' over the dot
+        self.buf[pos] = self.DOT
+        return end
+
+    def measurement(self, time: tuple, values: list,
+                    seq: int = None) -> memoryview:
+        """
+        Format a 'Measurement' message.
+        - arguments:
+            - time: `tuple`. Time of the measurement \
+                `(year, month, day, hour, minute, second)`, see `cet_tz()`.
+            - values: `list`. Values per sensor, as returned by \
+                `Data.get()`. A sensor without the pressure channel only \
+                holds the temperature.
+        - keyword arguments:
+            - seq: `int`. Sequence number of the measurement, added as \
+                `"seq"` if set.
+        - returns: `memoryview`. The message, valid until the next call.
+        """
+        pos: int = self._put(0, self._head)
+        for i in range(6):
+            if i:
+                self.buf[pos] = self.COMMA
+                pos += 1
+            pos = self._int(pos, time[i])
+        pos = self._put(pos, self._open)
+        for n in range(len(values)):
+            if n:
+                self.buf[pos] = self.COMMA
+                pos += 1
+            val: list = values[n]
+            pos = self._put(pos, self._bus[n])
+            pos = self._fixed(pos, val[0])
+            if len(val) > 1:
+                pos = self._put(pos, self._second)
+                pos = self._fixed(pos, val[1] if self.raw else val[1] / 100)
+            self.buf[pos] = self.CLOSE
+            pos += 1
+        self.buf[pos] = self.CLOSE
+        pos += 1
+        if seq is not None:
+            pos = self._put(pos, self._seq)
+            pos = self._int(pos, seq)
+        self.buf[pos] = self.CLOSE
+        return self.view[:pos + 1]
@@ -0,0 +1,57 @@
+# Standard micropython libraries
+from time import ticks_ms
+from time import ticks_diff
+
+# Local modules and variables
+# None
+
+
+class Profiler:
+    def __init__(self) -> None:
+        """
+        The Profiler class is used to timestamp the boot phases of the ESP32.
+        The timer starts at the reset of the device (`ticks_ms() == 0`), so \
+            the first phase also contains the interpreter start-up time.
+
+        #### Example::
+
+            boot = Profiler()
+            ...  # Importing modules
+            boot.mark('imports')
+            ...  # Connecting to the WiFi access point
+            boot.mark('wireless')
+            print(boot)
+        """
+        self._last: int = 0
+        self.phases: dict = {}
+
+    def mark(self, phase: str) -> int:
+        """
+        Close the current phase and start the next one.
+        - arguments:
+            - phase: `str`. Name of the phase that just finished.
+        - returns: `int`. Duration of the phase in milliseconds.
+        """
+        now: int = ticks_ms()
+        self.phases[phase] = [now, ticks_diff(now, self._last)]
+        self._last: int = now
+        return self.phases[phase][1]
+
+    def report(self) -> dict:
+        """
+        Returns: `dict`. Format: `{phase: [timestamp_ms, duration_ms]}`. \
+            The timestamp is the time in milliseconds since the reset.
+        """
+        return self.phases
+
+    def __str__(self) -> str:
+        return "\n".join([
+            '\nBOOT PROFILE:',
+            '\tPHASE\t\t\tAT [ms]\tTOOK [ms]',
+            "\n".join(
+                f"\t{phase:<16}\t{at}\t{took}"
+                for phase, (at, took) in sorted(
+                    self.phases.items(), key=lambda item: item[1][0])
+            ),
+            f"\tTOTAL:\t\t\t{self._last} ms",
+        ])
@@ -27,6 +27,8 @@ class Settings:
         self.esp32: dict = esp32
         self.i2c_A: object = SoftI2C(**i2c1)  # I2C bus setup
         self.i2c_B: object = SoftI2C(**i2c2)
+        # Bus settings, used to initialize the buses again
+        self.buses: list = [(self.i2c_A, i2c1), (self.i2c_B, i2c2)]
         self.timer_period: int = timer_period
 
     def _esp32(self) -> None:
@@ -35,10 +37,19 @@ class Settings:
         freq(self.esp32['FREQ'])
         self.red_freq -= freq()
 
-    def wireless(self, ssid, password) -> None:
-        """ Connecting device to internet """
-        self.internet = WLAN(ssid, password)
-        self.internet.connect()
+    def wireless(self, ssid, password, wait: bool = True,
+                 **kwargs) -> None:
+        """
+        Connecting device to internet.
+        If `wait` is False, the association is only started. Call \
+            `self.internet.wait()` before the connection is used.
+        The keyword arguments are passed to `WLAN` (e.g. `networks`).
+        """
+        self.internet = WLAN(ssid, password, **kwargs)
+        if wait:
+            self.internet.connect()
+        else:
+            self.internet.begin()
 
     def _sensor(self, BUS_A: bool = True, BUS_B: bool = False) -> None:
         if BUS_A:
@@ -53,7 +64,8 @@ class Settings:
                 self.i2c_B, 0x77, timer_id=3, timer_period=self.timer_period)
 
     def bmp280_setup(self, sensor: list, power: int = None, iir: int = None,
-                     spi: bool = False, os: tuple = None) -> None:
+                     spi: bool = False, os: tuple = None,
+                     standby: int = None) -> None:
         """
         Setup function for the BMP280 sensors.
         """
@@ -63,6 +75,8 @@ class Settings:
                 s.power(mode=power)
             if iir is not None:
                 s.iir(mode=iir)
+            if standby is not None:
+                s.standby(time=standby)
             if os is not None:
                 s.oversampling(pres_temp=os)
 
@@ -0,0 +1,230 @@
+# Standard micropython libraries
+import os
+import json
+
+# Local modules and variables
+from helpers.data import Data
+from helpers.capture import Capture
+from helpers.history import History
+from sensor import SETTINGS as S
+
+
+class Tuning:
+    # Settings that can be changed at runtime: {key: (minimum, maximum)}
+    SCHEMA: dict = {
+        'BMP280': {
+            'TIMER': (10, 1_000),
+            'SAMPLES': (1, 50),
+            'SETUP': {
+                'IIR': (0, 4),
+                'STANDBY': (0, 7),
+                'OS': {
+                    'TEMP': (0, 5),
+                    'PRES': (0, 5),
+                },
+            },
+        },
+        'MQTT': {
+            'SEND_KEEPALIVE': (1, 3_600),
+            'SEND_MEASUREMENT': (1, 86_400),
+        },
+    }
+
+    # Longest capture in seconds that can be started with a command
+    CAPTURE_MAX: int = 3_600
+
+    # Hashes of the uploaded files, written by `provision.py`
+    MANIFEST: str = 'manifest.json'
+
+    def __init__(self, data: Data, config: dict,
+                 path: str = 'setup.json', capture: Capture = None,
+                 compiled: str = 'config.py',
+                 history: History = None) -> None:
+        """
+        The Tuning class applies configuration patches at runtime.
+        - arguments:
+            - data: `Data`. Object that holds the BMP280 sensors.
+            - config: `dict`. The `BMP280` and `MQTT` dictionaries used by \
+                the main loop: `{'BMP280': dict, 'MQTT': dict}`. These \
+                dictionaries are updated in place.
+        - keyword arguments:
+            - path: `str`. Configuration file, used when a patch is persisted.
+            - capture: `Capture`. Allows the `CAPTURE` command.
+            - compiled: `str`. Settings compiled by `configure.py`, \
+                removed when a patch is persisted.
+            - history: `History`. Allows the `BACKFILL` command.
+
+        A patch has the same layout as the `setup.json` file, with only the \
+            keys that change. Add `"PERSIST": true` to write the patch to \
+            the configuration file as well.
+        `"CAPTURE": seconds` starts a streaming capture (`0` stops it), this \
+            command is never persisted. While a capture runs, the sensor \
+            settings (`BMP280.SETUP`) can not be changed.
+        `"BACKFILL": [first, last]` sends the measurements with the \
+            sequence numbers `first` to `last` again, in backfill \
+            messages. This command is never persisted.
+
+        #### Example::
+
+            {"BMP280": {"SAMPLES": 10, "SETUP": {"OS": {"PRES": 0}}},
+             "MQTT": {"SEND_MEASUREMENT": 600},
+             "PERSIST": true}
+        """
+        self.data: Data = data
+        self.config: dict = config
+        self.path: str = path
+        self.capture: Capture = capture
+        self.compiled: str = compiled
+        self.history: History = history
+
+    def _validate(self, patch: dict, schema: dict, key: str = '') -> None:
+        """ Raise a `ValueError` if the patch does not match the schema. """
+        if not isinstance(patch, dict):
+            raise ValueError(f"{key or 'patch'} must be an object")
+        for k, v in patch.items():
+            if k not in schema:
+                raise ValueError(f"{key}{k} can not be changed")
+            if isinstance(schema[k], dict):
+                self._validate(v, schema[k], f"{key}{k}.")
+            elif not (isinstance(v, int) and not isinstance(v, bool)
+                      and schema[k][0] <= v <= schema[k][1]):
+                raise ValueError(f"{key}{k} must be an integer in "
+                                 f"[{schema[k][0]}, {schema[k][1]}]")
+
+    def validate(self, patch: dict) -> None:
+        """
+        Validate a patch, including the rules between the fields.
+        Raises `ValueError` if the patch is invalid.
+        """
+        if not isinstance(patch, dict):
+            raise ValueError("patch must be an object")
+        if 'CAPTURE' in patch:
+            seconds: int = patch['CAPTURE']
+            if self.capture is None:
+                raise ValueError("CAPTURE is not available")
+            if not (isinstance(seconds, int) and not isinstance(seconds, bool)
+                    and 0 <= seconds <= self.CAPTURE_MAX):
+                raise ValueError(f"CAPTURE must be an integer in "
+                                 f"[0, {self.CAPTURE_MAX}]")
+        if 'BACKFILL' in patch:
+            span: list = patch['BACKFILL']
+            if self.history is None:
+                raise ValueError("BACKFILL is not available")
+            if not (isinstance(span, list) and len(span) == 2 and all(
+                    isinstance(v, int) and not isinstance(v, bool) and v >= 0
+                    for v in span) and span[0] <= span[1]):
+                raise ValueError("BACKFILL must be [first, last] with "
+                                 "0 <= first <= last")
+        if self.capture and self.capture.running and \
+                'SETUP' in patch.get('BMP280', {}):
+            # The capture thread uses the I2C buses
+            raise ValueError("BMP280.SETUP can not be changed during a "
+                             "capture")
+        patch: dict = {k: v for k, v in patch.items()
+                       if k not in ['PERSIST', 'CAPTURE', 'BACKFILL']}
+        self._validate(patch, self.SCHEMA)
+        mqtt: dict = patch.get('MQTT', {})
+        keepalive: int = mqtt.get(
+            'SEND_KEEPALIVE', self.config['MQTT']['SEND_KEEPALIVE'])
+        measurement: int = mqtt.get(
+            'SEND_MEASUREMENT', self.config['MQTT']['SEND_MEASUREMENT'])
+        if measurement < keepalive or measurement % keepalive:
+            raise ValueError("SEND_MEASUREMENT must be a multiple of "
+                             "SEND_KEEPALIVE")
+        if keepalive >= self.config['MQTT']['KEEPALIVE']:
+            raise ValueError("SEND_KEEPALIVE must be smaller than KEEPALIVE")
+
+    def _merge(self, target: dict, patch: dict) -> None:
+        for k, v in patch.items():
+            if isinstance(v, dict):
+                self._merge(target.setdefault(k, {}), v)
+            else:
+                target[k] = v
+
+    def apply(self, patch: dict) -> None:
+        """
+        Validate and apply a patch to the sensors, `Data` and the timers \
+            of the main loop. Nothing is applied if the patch is invalid.
+        """
+        self.validate(patch)
+        sensor: dict = patch.get('BMP280', {})
+        setup: dict = sensor.get('SETUP', {})
+        for s in self.data.sensor:
+            if 'TIMER' in sensor:
+                s.timer_period = sensor['TIMER']
+            if 'OS' in setup:
+                os_mode: dict = self.config['BMP280']['SETUP']['OS']
+                # The pressure stays skipped while its channel is off, it
+                # is set by `Data.channels()` when it is measured again
+                s.oversampling(pres_temp=S().osMode(
+                    setup['OS'].get('PRES', os_mode['PRES'])
+                    if self.data.pressure else 0,
+                    setup['OS'].get('TEMP', os_mode['TEMP']),
+                ))
+            if 'IIR' in setup:
+                s.iir(mode=S().iirMode(setup['IIR']))
+            if 'STANDBY' in setup:
+                s.standby(time=S().standbyTime(setup['STANDBY']))
+        if 'SAMPLES' in sensor:
+            self.data.samples = sensor['SAMPLES']
+            self.data.period = None
+        self._merge(self.config, {k: v for k, v in patch.items()
+                                  if k in self.SCHEMA})
+        if 'CAPTURE' in patch:
+            if patch['CAPTURE']:
+                self.capture.start(patch['CAPTURE'])
+            else:
+                self.capture.stop()
+        if 'BACKFILL' in patch:
+            self.history.request(*patch['BACKFILL'])
+        if patch.get('PERSIST'):
+            self.persist(patch)
+
+    def persist(self, patch: dict) -> None:
+        """
+        Write the patch to the configuration file.
+        The file is read again, so settings changed by `setup()` are kept.
+        The compiled settings would hide the patch at the next boot, they \
+            are removed.
+        Both files are removed from the manifest first, so the next \
+            `provision.py` uploads them again.
+        """
+        self._unlist([self.path, self.compiled])
+        with open(self.path, 'r') as f:
+            config: dict = json.load(f)
+        self._merge(config, {k: v for k, v in patch.items()
+                             if k in self.SCHEMA})
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(config, f)
+        os.rename(self.path + '.tmp', self.path)
+        try:
+            os.remove(self.compiled)
+        except OSError:  # Not compiled
+            pass
+
+    def _unlist(self, paths: list[str]) -> None:
+        """ Remove files from the manifest, if the device has one. """
+        try:
+            with open(self.MANIFEST, 'r') as f:
+                manifest: dict = json.load(f)
+        except (OSError, ValueError):  # Not provisioned or damaged
+            return
+        if not any(p in manifest for p in paths):
+            return
+        for p in paths:
+            manifest.pop(p, None)
+        with open(self.MANIFEST + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.rename(self.MANIFEST + '.tmp', self.MANIFEST)
+
+    def handle(self, msg: bytes) -> dict:
+        """
+        Handle a message from the control topic.
+        - returns: `dict`. The reply: `{'status': 'Applied' | 'Rejected'}`, \
+            with an `'error'` if the patch was rejected.
+        """
+        try:
+            self.apply(json.loads(msg))
+        except (ValueError, TypeError, AttributeError) as e:
+            return {'status': 'Rejected', 'error': str(e)}
+        return {'status': 'Applied'}
@@ -1,28 +1,52 @@
 # Standard microPython libraries
 import time
-import ntptime
 import gc
 import json
+from binascii import crc32
 from machine import Pin
 from machine import reset as reset_device
 
 # Local modules and variables
 from helpers import Data
 from helpers import Settings
+from helpers import Profiler
+from helpers import Tuning
+from helpers import Governor
+from helpers import Acquisition
+from helpers import Calibrator
+from helpers import Capture
+from helpers import Memory
+from helpers import Message
+from helpers import Detector
+from helpers import History
 from sensor import BMP280
 from sensor import SETTINGS as S
 from wireless import WLAN
+from wireless import MetricsServer
 from mqtt import Connector
 
 
-CONFIG: dict = json.loads(open('setup.json', 'r').read())
-ESP32: dict = CONFIG['ESP32']
-I2C: dict = CONFIG['I2C']
-SENSOR: dict = CONFIG['BMP280']
-WIRELESS: dict = CONFIG['WIRELESS']
-NTP: dict = CONFIG['NTP']
-MQTT: dict = CONFIG['MQTT']
-del CONFIG
+BOOT: Profiler = Profiler()
+BOOT.mark('imports')
+
+# The settings compiled on the host by `configure.py` are imported directly,
+# they have been validated and no JSON is parsed. Without `config.py` the
+# file is parsed directly from the stream, this saves a copy of the
+# complete file in memory.
+try:
+    from config import ESP32, I2C, SENSOR, WIRELESS, NTP, MQTT, REGISTERS
+except ImportError:
+    with open('setup.json', 'r') as f:
+        CONFIG: dict = json.load(f)
+    ESP32: dict = CONFIG['ESP32']
+    I2C: dict = CONFIG['I2C']
+    SENSOR: dict = CONFIG['BMP280']
+    WIRELESS: dict = CONFIG['WIRELESS']
+    NTP: dict = CONFIG['NTP']
+    MQTT: dict = CONFIG['MQTT']
+    REGISTERS: dict = None
+    del CONFIG
+BOOT.mark('config')
 
 
 def callback(pid: int, status: int) -> None:
@@ -39,7 +63,7 @@ def callback(pid: int, status: int) -> None:
     print(f'{pid=}, {status=} ({_status[status]})')
 
 
-def cet_tz(convert=NTP['COMPUTE_CET']):
+def cet_tz(convert=NTP['COMPUTE_CET'], now: int = None):
     """
     Converting Coordinated Universal Time (UTC) to
     Central European (Summer) Time (CE(S)T).
@@ -48,8 +72,12 @@ def cet_tz(convert=NTP['COMPUTE_CET']):
     last sunday of March and the last sunday of October.
     If true, add two hours to the GMT time.
     Else, add one hour.
+
+    Args:
+        now (int, optional): Time in seconds to convert. Defaults to the
+            current time.
     """
-    now: time.time = time.time()
+    now: time.time = time.time() if now is None else now
     if convert:
         year: int = time.localtime()[0]
         month: function = lambda month: time.mktime(
@@ -65,7 +93,8 @@ def cet_tz(convert=NTP['COMPUTE_CET']):
 
 def jsonize(time: bool = False,
             message: list | str = None,
-            debug: bool = ESP32['DEBUG']) -> str:
+            debug: bool = ESP32['DEBUG'],
+            extra: dict = None) -> str:
     """Converting data to JSON.
 
     Args:
@@ -73,6 +102,7 @@ def jsonize(time: bool = False,
         measurements (list): Measurements measured from the BMP280 modules
         ping (bool): Indication if the message is a 'ping'.
         debug (bool, optional): Defaults to CONFIG['ESP32']['DEBUG'].
+        extra (dict, optional): Additional fields added to the message.
 
     Returns:
         str: _description_
@@ -81,13 +111,80 @@ def jsonize(time: bool = False,
     if time:
         string['time'] = cet_tz(NTP['COMPUTE_CET'])
         string['measurements'] = message
+    if extra:
+        string.update(extra)
     jsonString: str = json.dumps(string, separators=(',', ':'))
     if debug:
         print(jsonString)
     return jsonString
 
 
-def setup() -> tuple[Data, Connector, list[str]]:
+def calibration(sensor: list[BMP280], buses: list[str]) -> bytes:
+    """'Calibration' message with the compensation values of every sensor.
+
+    The receiving side needs these values to compute the temperature and
+    pressure of raw values (raw mode and captures).
+
+    Args:
+        sensor (list[BMP280]): Configured sensors
+        buses (list[str]): List with active sensors. Two for each bus (A, B)
+
+    Returns:
+        bytes: The message
+    """
+    return bytes(jsonize(message='Calibration', extra={'calibration': {
+        f'{b}': {'tC': s.tC, 'pC': s.pC} for b, s in zip(buses, sensor)
+    }}), 'utf-8')
+
+
+def metrics(data: Data, mqtt: Connector, buses: list[str],
+            memory: Memory = None) -> list:
+    """Metrics for the local HTTP endpoint (`ESP32['METRICS']`).
+
+    Only cached values are read: no sensor is read and nothing is sent to
+    the broker while a client waits for the response.
+
+    Args:
+        data (Data): Initialized object (returned by setup)
+        mqtt (Connector): Initialized object (returned by setup)
+        buses (list[str]): List with active sensors. Two for each bus (A, B)
+        memory (Memory, optional): Memory manager (returned by setup)
+
+    Returns:
+        list: Metrics as `[(name, labels, value), ...]`
+    """
+    names: list = ['bmp280_raw_temperature', 'bmp280_raw_pressure'] \
+        if data.raw else ['bmp280_temperature_celsius', 'bmp280_pressure_pa']
+    stats: dict = mqtt.stats()
+    values: list = [
+        (name, {'sensor': bus}, value)
+        for bus, val in zip(buses, data.processed)
+        for name, value in zip(names, val)
+    ]
+    values += [
+        ('acquisition_duration_ms', None, data.duration),
+        ('acquisition_age_seconds', None,
+         time.time() - data.timestamp if data.timestamp else None),
+        ('acquisition_samples', None, data.count),
+        ('mem_free_bytes', None, gc.mem_free()),
+        ('mem_alloc_bytes', None, gc.mem_alloc()),
+        ('mem_largest_free_bytes', None,
+         memory.report()['largest'] if memory else None),
+        ('gc_pause_max_us', None, memory.last['pause'][2] if memory else None),
+        ('mqtt_queued_messages', None, stats['queued']),
+        ('mqtt_inflight_messages', None, stats['inflight']),
+        ('mqtt_queued_bytes', None, stats['bytes']),
+        ('mqtt_delivered_total', None, stats['delivered']),
+        ('mqtt_retransmits_total', None, stats['retransmits']),
+        ('mqtt_dropped_total', None, stats['dropped']),
+        ('mqtt_recovered_total', None, mqtt.recovered),
+        ('uptime_seconds', None, time.ticks_ms() // 1000),
+    ]
+    return values
+
+
+def setup() -> tuple[Data, Connector, list[str], MetricsServer, Capture,
+                     Memory, Message, History]:
     """
     Setup function for initializing the ESP32.
 
@@ -97,12 +194,30 @@ def setup() -> tuple[Data, Connector, list[str]]:
     - Connecting to the WiFi access point
     - Initializing MQTT (QoS 0 or 1)
 
+    With `ESP32['FAST_BOOT']` the WiFi association is started before the
+    sensors are probed, so both happen at the same time.
+
+    With `ESP32['METRICS']` a metrics endpoint is served on the local
+    network, otherwise the returned server is None.
+
+    With `BMP280['CAPTURE']['CHUNK']` the buffers of the streaming capture
+    are allocated, otherwise the returned capture is None.
+
+    With `BMP280['HISTORY']` the last measurements are kept for a backfill,
+    otherwise the returned history is None.
+
+    The long-lived buffers (the capture, the history and the 'Measurement'
+    messages of `Message`) are allocated on a collected heap before the
+    connection with the broker, the garbage collector is started with the
+    settings of `ESP32['GC']` at the end.
+
     Returns:
-        tuple[Data, Connector, list[str]]
+        tuple[Data, Connector, list[str], MetricsServer, Capture, Memory,
+            Message, History]
     """
     # Setting up the BMP280 sensors
-    BUS_A: bool = I2C['BUS_A'].pop('ACTIVE')
-    BUS_B: bool = I2C['BUS_B'].pop('ACTIVE')
+    BUS_A: bool = I2C['BUS_A']['ACTIVE']
+    BUS_B: bool = I2C['BUS_B']['ACTIVE']
     assert any((BUS_A, BUS_B)), "No I2C bus active, \
         please check the setup.json file."
     bus: list = []
@@ -113,7 +228,7 @@ def setup() -> tuple[Data, Connector, list[str]]:
 
     buses: function = lambda bus: {
         k.lower(): v if k == 'FREQ' else Pin(v)
-        for k, v in bus.items()
+        for k, v in bus.items() if k != 'ACTIVE'
     }
     i2c = Settings(
         esp32=ESP32,
@@ -121,21 +236,77 @@ def setup() -> tuple[Data, Connector, list[str]]:
         i2c2=buses(I2C['BUS_B']),
         timer_period=SENSOR['TIMER']
     )
+    # Start associating with the access point. The sensors are probed and
+    # configured while the association continues in the background.
+    # The strongest access point of the configured networks is cached, the
+    # next boot connects to it without a scan
+    wifi: dict = {
+        'ssid': WIRELESS['SSID'],
+        'password': WIRELESS['PASSWORD'],
+        'networks': WIRELESS['NETWORKS'],
+        'timeout': WIRELESS['TIMEOUT'],
+        'rescan': WIRELESS['RESCAN'],
+    }
+    if ESP32['FAST_BOOT']:
+        i2c.wireless(wait=False, **wifi)
+    # The 'HARDWARE' profile lets the sensors average with oversampling and
+    # the IIR filter. Only one sample per sensor is read every interval.
+    hardware: bool = SENSOR['PROFILE'] == 'HARDWARE'
+    if hardware:
+        SENSOR['SETUP'].update(
+            Acquisition().settings(MQTT['SEND_MEASUREMENT']))
     sensor: list[BMP280] = i2c.settings(
         BUS_A=BUS_A,
         BUS_B=BUS_B
     )
+    # The register values are resolved by `configure.py`, except for the
+    # 'hardware' profile
+    registers: dict = REGISTERS if REGISTERS and not hardware else {
+        'POWER': S().powerMode(SENSOR['SETUP']['POWER']),
+        'IIR': S().iirMode(SENSOR['SETUP']['IIR']),
+        'STANDBY': S().standbyTime(SENSOR['SETUP']['STANDBY']),
+        'OS': S().osMode(SENSOR['SETUP']['OS']['PRES'],
+                         SENSOR['SETUP']['OS']['TEMP']),
+    }
     i2c.bmp280_setup(
         sensor,
-        power=S().powerMode(SENSOR['SETUP']['POWER']),
-        iir=S().iirMode(SENSOR['SETUP']['IIR']),
+        power=registers['POWER'],
+        iir=registers['IIR'],
         spi=SENSOR['SETUP']['SPI'],
-        os=S().osMode(*list(SENSOR['SETUP']['OS'].values())),
+        os=registers['OS'],
+        standby=registers['STANDBY'],
     )
+    BOOT.mark('sensors')
+
+    # The long-lived buffers are allocated on a collected heap, before the
+    # WiFi and TLS buffers fragment it
+    memory: Memory = Memory(threshold=ESP32['GC']['THRESHOLD'],
+                            idle=ESP32['GC']['IDLE'])
+    memory.collect()
+    capture: Capture = Capture(
+        sensor, chunk=SENSOR['CAPTURE']['CHUNK']) \
+        if SENSOR['CAPTURE']['CHUNK'] else None
+    message: Message = Message(MQTT['TOPIC'], bus, raw=SENSOR['RAW'])
+    history: History = History(
+        bus, size=SENSOR['HISTORY'], raw=SENSOR['RAW']) \
+        if SENSOR['HISTORY'] else None
+
+    # Measure the timing of the sensors and pick the limiter period and the
+    # amount of samples of the 'software' profile
+    calibrator: Calibrator = None
+    if SENSOR['CALIBRATE'] and not hardware:
+        calibrator: Calibrator = Calibrator(sensor)
+        SENSOR['TIMER'], SENSOR['SAMPLES'] = calibrator.calibrate(
+            MQTT['SEND_MEASUREMENT'], standby=SENSOR['SETUP']['STANDBY'])
+        BOOT.mark('calibration')
 
     # Try to connect to the WiFi network.
     # If the connection fails, reboot device.
-    i2c.wireless(*list(WIRELESS.values()))
+    if ESP32['FAST_BOOT']:
+        i2c.internet.wait()
+    else:
+        i2c.wireless(**wifi)
+    BOOT.mark('wireless')
 
     if ESP32['DEBUG']:
         print('DEBUG IS ON\n', i2c)
@@ -143,13 +314,27 @@ def setup() -> tuple[Data, Connector, list[str]]:
     # Get data object (Contains BMP280 and SoftI2C objects)
     data: Data = Data(
         sensor,
-        samples=SENSOR['SAMPLES'],
-        period=SENSOR['PERIOD']
+        samples=1 if hardware else SENSOR['SAMPLES'],
+        period=None if hardware else SENSOR['PERIOD'],
+        raw=SENSOR['RAW'],
     )
+    if calibrator:
+        calibrator.apply(data)
+
+    # The CPU runs at the high frequency until the setup is done
+    if ESP32['GOVERNOR']['ACTIVE']:
+        data.governor = Governor(
+            buses=i2c.buses,
+            high=ESP32['GOVERNOR']['HIGH'],
+            low=ESP32['GOVERNOR']['LOW'],
+        )
+        data.governor.boost()
 
     # Setting up uMQTT robust
+    # The key and certificate are only read from flash if SSL is used.
     file: function = lambda path: (
         None if not path else open(path, 'rb').read())
+    use_ssl: bool = MQTT['SSL']['USE_SSL']
     mqtt: Connector = Connector(
         MQTT['CLIENT_ID'],
         MQTT['SERVER'],
@@ -157,17 +342,32 @@ def setup() -> tuple[Data, Connector, list[str]]:
         user=MQTT['USER'],
         password=MQTT['PASSWORD'],
         keepalive=MQTT['KEEPALIVE'],
-        ssl=MQTT['SSL'].pop('USE_SSL'),
+        ssl=use_ssl,
         ssl_params={
             k.lower(): v if k not in ['KEY', 'CERT'] else file(v)
-            for k, v in MQTT['SSL'].items()
-        },
+            for k, v in MQTT['SSL'].items() if k != 'USE_SSL'
+        } if use_ssl else {},
         socket_timeout=MQTT['SOCKET_TIMEOUT'],
         message_timeout=MQTT['MESSAGE_TIMEOUT']
     )
+    mqtt.set_config(
+        INFLIGHT_MAX=MQTT['INFLIGHT_MAX'],
+        QUEUE_BYTES_MAX=MQTT['QUEUE_BYTES_MAX'],
+    )
     mqtt.set_callback_status(callback)
     # If the current MQTT session is still active on the broker
-    if not mqtt.connect(clean_session=False):
+    session: bool = mqtt.connect(clean_session=False)
+    # The first message reports the calibrated sampling settings
+    if calibrator:
+        mqtt.publish(
+            MQTT['TOPIC'],
+            bytes(jsonize(message='Sampling',
+                          extra={'sampling': calibrator.report(bus)}),
+                  'utf-8'),
+            retain=MQTT['RETAIN'],
+            qos=MQTT['QOS'],
+        )
+    if not session:
         if ESP32['DEBUG']:
             print('Setting up new session...')
         mqtt.publish(
@@ -176,47 +376,301 @@ def setup() -> tuple[Data, Connector, list[str]]:
             retain=MQTT['RETAIN'],
             qos=MQTT['QOS'],
         )
+    # In raw mode the receiving side needs the compensation values of every
+    # sensor to compute the temperature and pressure. Send them once.
+    if SENSOR['RAW']:
+        mqtt.publish(
+            MQTT['TOPIC'],
+            calibration(sensor, bus),
+            retain=MQTT['RETAIN'],
+            qos=MQTT['QOS'],
+        )
+    # Configuration patches can be sent to the control topic of the device
+    if MQTT['CONTROL_TOPIC']:
+        tuning: Tuning = Tuning(data, {'BMP280': SENSOR, 'MQTT': MQTT},
+                                capture=capture, history=history)
+        mqtt.set_control(MQTT['CONTROL_TOPIC'], tuning.handle)
+    BOOT.mark('mqtt')
 
     # Set up a connection with the NTP server if desired.
     # If the connection fails, reset the device.
     if NTP['USE_NTP']:
+        import ntptime  # Only imported if it is used
         ntptime.host = NTP['ADDRESS']
         try:
             ntptime.settime()
         except:
             reset_device()
+        BOOT.mark('ntp')
+
+    # Serve the metrics endpoint on the local network
+    server: MetricsServer = None
+    if ESP32['METRICS']['ACTIVE']:
+        server: MetricsServer = MetricsServer(
+            i2c.internet.ifconfig()['IP'],
+            lambda: metrics(data, mqtt, bus, memory),
+            port=ESP32['METRICS']['PORT'],
+        )
+
+    # Enable garbage collection, with the automatic threshold as a safety
+    # net for the collections at the idle points of the main loop
+    memory.start()
+
+    # Waiting for the next message is done at the low frequency
+    if data.governor:
+        data.governor.idle()
+
+    return data, mqtt, bus, server, capture, memory, message, history
+
+
+def next_slot(offset: int) -> int:
+    """
+    The next wall-clock boundary of `MQTT['SEND_MEASUREMENT']` for the
+    aligned mode (`MQTT['ALIGN']`), e.g. every 5 minutes on the minute.
+
+    Args:
+        offset (int): Jitter of this device in ms, the measurement starts
+            `offset` ms after the boundary.
+
+    Returns:
+        int: Time of the boundary in ms.
+    """
+    period: int = MQTT['SEND_MEASUREMENT'] * 1000
+    now: int = time.time_ns() // 1_000_000 - offset
+    return (now // period + 1) * period
+
+
+def pressure_channel(data: Data, pressure: bool) -> None:
+    """
+    Switch the pressure channel of the sensors for the next measurement
+    (`BMP280['PRESSURE_EVERY']`). Without the pressure channel the sensors
+    only convert the temperature, which is faster: the limiter period is
+    reduced to one temperature conversion plus the standby time.
+
+    Args:
+        data (Data): Initialized object (returned by setup)
+        pressure (bool): Measure the pressure.
+    """
+    OS: dict = SENSOR['SETUP']['OS']
+    standby: float = Acquisition.STANDBY[SENSOR['SETUP']['STANDBY']]
+    conversion: float = Acquisition(
+        pressure=OS['PRES'] if pressure else 0,
+        temperature=OS['TEMP']).measurement_time() + standby
+    data.channels(
+        pressure,
+        S().osMode(OS['PRES'], OS['TEMP']),
+        settle=int(conversion) + 1,
+        timer=SENSOR['TIMER'] if pressure else max(10, int(conversion) + 1),
+    )
+
+
+def recover(data: Data, mqtt: Connector) -> bool:
+    """
+    Resume the connection with the broker instead of rebooting the device.
+    The TLS handshake is done at the high CPU frequency.
+
+    Args:
+        data (Data): Initialized object (returned by setup)
+        mqtt (Connector): Initialized object (returned by setup)
+
+    Returns:
+        bool: True if the connection has been resumed.
+    """
+    if ESP32['DEBUG']:
+        print('Connection with broker has been lost, reconnecting...')
+    if data.governor:
+        data.governor.boost()
+    recovered: bool = mqtt.recover(
+        attempts=MQTT['RECONNECT']['ATTEMPTS'],
+        delay=MQTT['RECONNECT']['DELAY'],
+    )
+    if data.governor:
+        data.governor.idle()
+    return recovered
+
+
+def stream(capture: Capture, mqtt: Connector) -> None:
+    """
+    Publish the full chunks of a running capture on `<TOPIC>/capture`.
+    The chunks are published from the capture buffers without a copy. A
+    chunk that can not be sent is counted as lost, the capture goes on.
 
-    # Enable garbage collection
-    gc.enable()
+    Args:
+        capture (Capture): Initialized object (returned by setup)
+        mqtt (Connector): Initialized object (returned by setup)
+    """
+    topic: bytes = (MQTT['TOPIC'] + '/capture').encode()
+    chunk: memoryview = capture.pending()
+    while chunk:
+        capture.release(sent=mqtt.stream(topic, chunk))
+        chunk: memoryview = capture.pending()
 
-    return data, mqtt, bus
 
+def backfill(history: History, mqtt: Connector) -> None:
+    """
+    Answer the requested ranges of measurements (the `BACKFILL` command)
+    with packed messages on `<TOPIC>/backfill`. A message holds the
+    measurements of the range that are still in the history, without rows
+    if there are none.
+    A range is split in messages of at most a quarter of the queue budget
+    (`MQTT.QUEUE_BYTES_MAX`), so the connector never drops one for its
+    size. A message is only sent when the queue has room for it, the rest
+    of the range waits for the next loop.
 
-def main(data: Data, mqtt: Connector, buses: list[str]) -> None:
+    Args:
+        history (History): Initialized object (returned by setup)
+        mqtt (Connector): Initialized object (returned by setup)
+    """
+    topic: bytes = (MQTT['TOPIC'] + '/backfill').encode()
+    budget: int = MQTT['QUEUE_BYTES_MAX'] // 4
+    rows: int = history.rows(budget)
+    while history.pending and \
+            mqtt.queue_bytes + budget <= MQTT['QUEUE_BYTES_MAX']:
+        first, last = history.pending[0]
+        first: int = max(first, history.oldest())
+        end: int = min(last, first + rows - 1)
+        if end < min(last, history.sequence):
+            history.pending[0] = [end + 1, last]
+        else:
+            history.pending.pop(0)
+        mqtt.publish(topic, history.pack(first, end),
+                     retain=False, qos=MQTT['QOS'])
+
+
+def main(data: Data, mqtt: Connector, buses: list[str], encoder: Message,
+         server: MetricsServer = None, capture: Capture = None,
+         memory: Memory = None, history: History = None) -> None:
     """
     Main function of the ESP32 measurement system.
     The function will, after the setup has been successfully executed,
     send messages (ping or measurements) to the MQTT broker. Repeat the
     process if the keepalive set in the setup.json file is maintained.
-    The function automatically reboots if the connection with the broker
-    is lost.
+    If the connection with the broker is lost, the function tries to
+    resume it (see `recover()`). The function automatically reboots if
+    this does not succeed.
+
+    With `ESP32['FAST_BOOT']` the first measurement is sent directly after
+    the setup, followed by a 'Boot' message holding the boot profile.
+
+    With `MQTT['ALIGN']` the measurements start on the wall-clock
+    boundaries of `MQTT['SEND_MEASUREMENT']` instead of relative to the
+    boot time. Every device waits its own jitter (derived from its
+    CLIENT_ID) after the boundary, so the fleet does not publish at the
+    same moment. The time of the message is the boundary itself.
 
     Args:
         data (Data): Initialized object (returned by setup)
         mqtt (Connector): Initialized object (returned by setup)
         buses (list[str]): List with active sensors. Two for each bus (A, B)
+        encoder (Message): Buffer of the 'Measurement' messages (returned by
+            setup)
+        server (MetricsServer, optional): Metrics endpoint (returned by setup)
+        capture (Capture, optional): Streaming capture (returned by setup)
+        memory (Memory, optional): Memory manager (returned by setup)
+        history (History, optional): Last measurements for a backfill
+            (returned by setup)
+
+    While a capture runs (`BMP280['CAPTURE']` or the `CAPTURE` command),
+    the sensors are only read by the capture. No measurements are sent,
+    the pings go on. A 'Calibration' message is sent when the capture
+    starts and a 'Capture' message with the counters when it ends.
+
+    The garbage is collected before every measurement, so no collection
+    runs during the I2C burst, and at the end of every loop when the idle
+    budget of `memory` has been allocated. Pings report the memory of the
+    last measurement cycle.
+
+    The 'Measurement' messages are formatted in the buffer of `encoder` and
+    published from it without a copy (QoS 0).
+
+    With `MQTT['EVENTS']` every measurement is fed to a `Detector`. A fast
+    rise or a crossing of the limit shortens the measurement interval
+    until the event has passed. The start and the end of an event are
+    sent in an 'Event' message.
+
+    Every 'Measurement' message holds a sequence number (`seq`) that
+    increases by one per measurement since boot. With `BMP280['HISTORY']`
+    the collector can request a gap in the sequence numbers again with the
+    `BACKFILL` command on the control topic.
     """
     timer: int = time.time_ns()
-    counter: int = MQTT['SEND_MEASUREMENT'] // MQTT['SEND_KEEPALIVE']
-    while mqtt.is_keepalive():
+    counter: int = 0 if ESP32['FAST_BOOT'] else \
+        MQTT['SEND_MEASUREMENT'] // MQTT['SEND_KEEPALIVE']
+    booted: bool = False
+    # The pressure is measured every `every` measurements, the first
+    # measurement always holds the pressure. The 'hardware' profile always
+    # measures both channels, its IIR filter would have to settle again.
+    every: int = 1 if SENSOR['PROFILE'] == 'HARDWARE' \
+        else SENSOR['PRESSURE_EVERY']
+    measured: int = 0
+    sequence: int = -1  # Without a history
+    capturing: bool = False
+    if capture and SENSOR['CAPTURE']['DURATION']:
+        capture.start(SENSOR['CAPTURE']['DURATION'])
+    aligned: bool = MQTT['ALIGN']['ACTIVE']
+    if aligned:
+        assert NTP['USE_NTP'], "The aligned mode needs the time of the \
+            NTP server, please check the setup.json file."
+        jitter: int = MQTT['ALIGN']['JITTER'] * 1000
+        offset: int = crc32(MQTT['CLIENT_ID'].encode()) % jitter \
+            if jitter else 0
+        slot: int = next_slot(offset)
+    detector: Detector = None
+    if MQTT['EVENTS']['ACTIVE']:
+        assert not SENSOR['RAW'], "The event detection needs the \
+            temperature, please check the setup.json file."
+        EVENTS: dict = MQTT['EVENTS']
+        detector: Detector = Detector(
+            buses, fast=EVENTS['FAST'], window=EVENTS['WINDOW'],
+            slope=EVENTS['SLOPE'], limit=EVENTS['LIMIT'],
+            hold=EVENTS['HOLD'])
+    while True:
+        if not mqtt.is_keepalive() or mqtt.conn_issue:
+            if not recover(data, mqtt):
+                break
         send_message: bool = False
-        # If it is time to measure
-        if counter == 0:
-            # Get measurement data from all the sensors
-            message: dict = {
-                f'{bus}': {'Temperature': val[0], 'Pressure': val[1]/100.0}
-                for bus, val in zip(buses, data.get())
-            }
+        stamp: int = None
+        event: dict = None
+        # Start and end of a capture, it ends when the last chunk has been
+        # published
+        if capture and bool(capture.running or capture.pending()) \
+                != capturing:
+            capturing: bool = not capturing
+            mqtt.publish(
+                MQTT['TOPIC'],
+                calibration(data.sensor, buses) if capturing else bytes(
+                    jsonize(message='Capture',
+                            extra={'capture': capture.report()}), 'utf-8'),
+                retain=False,
+                qos=MQTT['QOS'],
+            )
+        due: bool = (time.time_ns() // 1_000_000 >= slot + offset) \
+            if aligned else counter == 0
+        if capturing:
+            pass  # The sensors are in use by the capture
+        # If it is time to measure, or during a thermal event
+        elif due or (detector and detector.due()):
+            if memory:
+                memory.cycle()
+            if every > 1:
+                pressure_channel(data, measured % every == 0)
+            measured += 1
+            if aligned and due:
+                stamp: int = slot // 1000
+                slot: int = next_slot(offset)
+            # Get measurement data from all the sensors. Only the measured
+            # channels are sent.
+            values: list = data.get()
+            when: tuple = cet_tz(NTP['COMPUTE_CET'], stamp)
+            if history:
+                sequence: int = history.append(
+                    time.mktime(when + (0, 0)), values)
+            else:
+                sequence += 1
+            if detector:
+                event: dict = detector.update(values, MQTT['SEND_MEASUREMENT'])
+            message: memoryview = encoder.measurement(
+                when, values, seq=sequence)
             send_message: bool = True
             counter: int = MQTT['SEND_MEASUREMENT'] // MQTT['SEND_KEEPALIVE']
 
@@ -233,28 +687,82 @@ def main(data: Data, mqtt: Connector, buses: list[str]) -> None:
                 if ESP32['DEBUG']:
                     print('Wi-Fi connection has been lost, rebooting device...')
                 reset_device()
-            message: bytes = bytes(
-                jsonize(time=isinstance(message, dict), message=message),
-                'utf-8'
-            )
-            mqtt.publish(MQTT['TOPIC'],
+            # Pings report the state of the QoS 1 delivery pipeline and the
+            # time spent at each CPU frequency
+            if message == 'Ping':
+                extra: dict = {}
+                if MQTT['QOS'] == 1:
+                    extra['delivery'] = mqtt.stats()
+                if data.governor:
+                    extra['frequency'] = data.governor.report()
+                if memory:
+                    extra['memory'] = memory.report()
+                message: bytes = bytes(
+                    jsonize(message=message, extra=extra), 'utf-8')
+            elif ESP32['DEBUG']:
+                print(str(message, 'utf-8'))
+            mqtt.publish(encoder.topic,
                          message,
                          retain=MQTT['RETAIN'],
                          qos=MQTT['QOS'])
 
+            # The start and the end of a thermal event
+            if event:
+                mqtt.publish(
+                    MQTT['TOPIC'],
+                    bytes(jsonize(message='Event', extra={'event': event}),
+                          'utf-8'),
+                    retain=False,
+                    qos=MQTT['QOS'],
+                )
+
+            # Report the boot profile once, after the first message
+            if not booted:
+                BOOT.mark('first_message')
+                if ESP32['DEBUG']:
+                    print(BOOT)
+                mqtt.publish(
+                    MQTT['TOPIC'],
+                    bytes(jsonize(message='Boot',
+                                  extra={'boot': BOOT.report()}), 'utf-8'),
+                    retain=MQTT['RETAIN'],
+                    qos=MQTT['QOS'],
+                )
+                booted: bool = True
+
         try:
-            # Check if message has arrived. This is to ensure the memory
-            # does not overload. Overload of memory only applies to QoS 1.
-            # if MQTT['QOS'] == 1:
-            #     # This function works best if the module is subscribed to
-            #     # a topic.
-            #     mqtt.check_msg()
+            # Process the PUBACKs and timeouts of QoS 1 messages and the
+            # control messages without blocking. Timed out messages are
+            # queued again and sent by send_queue() as soon as the in-flight
+            # window has room.
+            if MQTT['QOS'] == 1 or MQTT['CONTROL_TOPIC']:
+                mqtt.check_msg()
+            # Reply to the control messages that have been handled
+            while mqtt.replies:
+                mqtt.publish(
+                    MQTT['TOPIC'],
+                    bytes(jsonize(message='Control',
+                                  extra=mqtt.replies.pop(0)), 'utf-8'),
+                    retain=False,
+                    qos=MQTT['QOS'],
+                )
             mqtt.send_queue()
-        except AttributeError as e:
+            if capturing:
+                stream(capture, mqtt)
+            if history and history.pending:
+                backfill(history, mqtt)
+            # Answer a waiting metrics request, returns directly if there is
+            # none
+            if server:
+                server.poll()
+            # Nothing to do until the next loop
+            if memory:
+                memory.idle()
+        except AttributeError:
             # If a connection with the broker could not be established
             # during startup.
-            # raise AttributeError(f'Broker could not be reached.\n{e}')
-            reset_device()
+            if not recover(data, mqtt):
+                break
 
     if ESP32['DEBUG']:
         print("Connection with broker has been lost, rebooting device...")
@@ -263,5 +771,5 @@ def main(data: Data, mqtt: Connector, buses: list[str]) -> None:
 
 
 if __name__ == '__main__':
-    data, mqtt, buses = setup()
-    main(data, mqtt, buses)
+    data, mqtt, buses, server, capture, memory, encoder, history = setup()
+    main(data, mqtt, buses, encoder, server, capture, memory, history)
@@ -1,5 +1,8 @@
 # Standard micropython libraries
 import sys
+from time import ticks_ms
+from time import ticks_diff
+from time import sleep_ms
 sys.path.reverse()
 
 # Third party libraries
@@ -16,6 +19,7 @@ No PuTTY on your machine? You can download and install it here:
 https://www.chiark.greenend.org.uk/~sgtatham/putty/latest.html
 """
 from umqtt import robust2
+from umqtt import simple2
 
 # Local modules and variables
 # None
@@ -51,6 +55,21 @@ class Connector(robust2.MQTTClient):
         super().__init__(*args, **kwargs)
         # Set the parent class' constants in the current class
         self.set_config()
+        # QoS 1 delivery pipeline.
+        # Messages waiting for a PUBACK: {pid: [message, sent_ms]}
+        # A message is a list: [topic, msg, retain, qos, queued_ms, dup]
+        self.inflight: dict = {}
+        self.queue_bytes: int = 0
+        self.delivered: int = 0
+        self.retransmits: int = 0
+        self.dropped: int = 0
+        # Delivery latency (queued -> PUBACK) of the last messages in ms
+        self.latency: list = []
+        # Amount of times the connection has been resumed with recover()
+        self.recovered: int = 0
+        # Control channel. Replies are published by the main loop.
+        self.control_topic: bytes = None
+        self.replies: list = []
 
     def set_config(self,
                    DEBUG: bool = False,
@@ -58,7 +77,10 @@ class Connector(robust2.MQTTClient):
                    NO_QUEUE_DUPS: bool = True,
                    MSG_QUEUE_MAX: int = 5,
                    CONFIRM_QUEUE_MAX: int = 10,
-                   RESUBSCRIBE: bool = True) -> None:
+                   RESUBSCRIBE: bool = True,
+                   INFLIGHT_MAX: int = 4,
+                   QUEUE_BYTES_MAX: int = 4096,
+                   LATENCY_SAMPLES: int = 16) -> None:
         """
         This method can be used to set constants in the parent class.
 
@@ -73,6 +95,14 @@ class Connector(robust2.MQTTClient):
         - CONFIRM_QUEUE_MAX: `int`. How many PIDs we store for a sent message.
         - RESUBSCRIBE: `bool`. When you reconnect, all existing \
             subscriptions are renewed.
+
+        Constants of the QoS 1 delivery pipeline:
+        - INFLIGHT_MAX: `int`. Maximum amount of QoS 1 messages waiting for \
+            a PUBACK. Other messages wait in the queue.
+        - QUEUE_BYTES_MAX: `int`. Memory budget in bytes for all queued and \
+            in-flight messages. The oldest messages are dropped first. \
+            This replaces `MSG_QUEUE_MAX` and `CONFIRM_QUEUE_MAX`.
+        - LATENCY_SAMPLES: `int`. Amount of delivery latencies kept.
         """
         self.DEBUG: bool = DEBUG
         self.KEEP_QOS0: bool = KEEP_QOS0
@@ -80,6 +110,9 @@ class Connector(robust2.MQTTClient):
         self.MSG_QUEUE_MAX: int = MSG_QUEUE_MAX
         self.CONFIRM_QUEUE_MAX: int = CONFIRM_QUEUE_MAX
         self.RESUBSCRIBE: bool = RESUBSCRIBE
+        self.INFLIGHT_MAX: int = INFLIGHT_MAX
+        self.QUEUE_BYTES_MAX: int = QUEUE_BYTES_MAX
+        self.LATENCY_SAMPLES: int = LATENCY_SAMPLES
 
     def is_keepalive(self) -> bool:
         """
@@ -100,6 +133,31 @@ class Connector(robust2.MQTTClient):
         """
         super().set_callback(status)
 
+    def set_control(self, topic: str, handler: function,
+                    qos: int = 1) -> None:
+        """
+        Subscribe to a control topic. Every message on this topic is \
+            handed to the handler, the returned reply is stored in \
+            `self.replies` until it is published.
+        - arguments:
+            - topic: `str`. Control topic of this device.
+            - handler: `function`. Callable(msg) -> `dict`.
+        - keyword arguments:
+            - qos: `int`. QoS level of the subscription.
+
+        Messages are only received while `check_msg()` is called.
+        """
+        self.control_topic: bytes = topic.encode()
+        self._control: function = handler
+        self.set_callback(self._message)
+        self.subscribe(topic, qos)
+
+    def _message(self, topic: bytes, msg: bytes,
+                 retained: bool, duplicate: bool) -> None:
+        """ Callback for the messages of the subscribed topics. """
+        if topic == self.control_topic:
+            self.replies.append(self._control(msg))
+
     def set_callback_status(self, status: function) -> None:
         """
         Set the callback for information about whether the sent packet (QoS=1)
@@ -117,7 +175,24 @@ class Connector(robust2.MQTTClient):
         Captured message statuses affect the queue here.
         - stat == 0 - the message goes back to the message queue to be sent.
         - stat == 1 or 2 - the message is removed from the queue.
-        """
+
+        Timeouts (`stat == 0`) are raised by `check_msg()` after \
+            `message_timeout` seconds. The message is then retransmitted \
+            with the DUP flag set.
+        """
+        message: list = self.inflight.pop(pid, [None])[0]
+        if message is not None:
+            if stat == 0:
+                message[5] = True
+                self.msg_to_send.insert(0, message)
+                self.retransmits += 1
+            else:
+                self.queue_bytes -= len(message[1])
+            if stat == 1:
+                self.delivered += 1
+                self.latency.append(ticks_diff(ticks_ms(), message[4]))
+                if len(self.latency) > self.LATENCY_SAMPLES:
+                    self.latency.pop(0)
         super().cbstat(pid, stat)
 
     def connect(self, clean_session: bool = True) -> bool:
@@ -130,7 +205,16 @@ class Connector(robust2.MQTTClient):
             previous interactions.
 
         Connection problems are captured and handled by `is_conn_issue()`
+
+        The PIDs of in-flight messages are not valid after a (re)connect, \
+            these messages are put back in the queue.
         """
+        for pid in list(self.inflight):
+            message: list = self.inflight.pop(pid)[0]
+            message[5] = True
+            self.msg_to_send.insert(0, message)
+        if clean_session:
+            self.queue_bytes: int = 0
         return super().connect(clean_session)
 
     def log(self) -> None:
@@ -144,6 +228,34 @@ class Connector(robust2.MQTTClient):
         """
         return super().reconnect()
 
+    def recover(self, attempts: int = 5, delay: int = 1_000) -> bool:
+        """
+        Resume a broken connection without rebooting the device.
+        The key and certificate stay in memory (`ssl_params`), so they do \
+            not have to be read from flash again. The session on the broker \
+            is resumed, queued messages are sent by `send_queue()`.
+        - keyword arguments:
+            - attempts: `int`. Amount of reconnect attempts.
+            - delay: `int`. Delay in milliseconds before the first retry. \
+                The delay doubles after every failed attempt, there is no \
+                delay after the last one.
+        - returns: `bool`. True if the connection has been resumed.
+
+        NOTE: The `ussl` module of the used firmware (v1.19.1) does not \
+            support TLS session resumption, every attempt does a full \
+            handshake.
+        """
+        for attempt in range(attempts):
+            self.reconnect()
+            if not self.conn_issue:
+                self.recovered += 1
+                if self.RESUBSCRIBE:
+                    self.resubscribe()
+                return True
+            if attempt < attempts - 1:
+                sleep_ms(delay << attempt)
+        return False
+
     def resubscribe(self) -> None:
         """
         Function from previously registered subscriptions, sends them again \
@@ -151,19 +263,44 @@ class Connector(robust2.MQTTClient):
         """
         super().resubscribe()
 
-    def add_msg_to_send(self, data: bytes) -> None:
+    def add_msg_to_send(self, data: tuple) -> list | None:
         """
         By overwriting this method, you can control the amount of stored \
             data in the queue.
         This is important because we do not have an infinite amount of \
             memory in the devices.
 
-        Currently, this method limits the queue length to MSG_QUEUE_MAX \
-            messages.
-        The number of active messages is the sum of messages to be sent \
-            with messages awaiting confirmation.
-        """
-        super().add_msg_to_send(data)
+        Currently, this method limits the size of all stored messages to \
+            QUEUE_BYTES_MAX bytes.
+        The stored messages are the messages to be sent together with the \
+            messages awaiting confirmation. The oldest queued message is \
+            dropped first, followed by the oldest in-flight message.
+        - returns: `list | None`. The queued message, None if it has not \
+            been queued.
+        """
+        topic, msg, retain, qos = data[:4]
+        if self.NO_QUEUE_DUPS and any(
+                m[0] == topic and m[1] == msg for m in self.msg_to_send):
+            return None
+        if len(msg) > self.QUEUE_BYTES_MAX:
+            self.dropped += 1
+            return None
+        while self.queue_bytes + len(msg) > self.QUEUE_BYTES_MAX:
+            if self.msg_to_send:
+                old: list = self.msg_to_send.pop(0)
+            elif self.inflight:
+                old: list = self.inflight.pop(min(
+                    self.inflight,
+                    key=lambda pid: self.inflight[pid][0][4]))[0]
+            else:  # Nothing is stored anymore
+                self.queue_bytes: int = 0
+                break
+            self.queue_bytes -= len(old[1])
+            self.dropped += 1
+        self.queue_bytes += len(msg)
+        message: list = [topic, msg, retain, qos, ticks_ms(), False]
+        self.msg_to_send.append(message)
+        return message
 
     def disconnect(self) -> None:
         """
@@ -190,17 +327,41 @@ class Connector(robust2.MQTTClient):
             - qos: `int`. Sets quality of service level. Accepts values \
                 0 to 2. PLEASE NOTE qos=2 is not actually supported.
         - returns:
-            - None or PID for QoS==1 (only if the message is sent \
-            immediately, otherwise it returns None)
+            - None or PID of this message for QoS==1 (only if the message \
+            is sent immediately, otherwise it returns None)
 
         The function tries to send a message. If it fails, the message goes \
             to the message queue for sending.
         When we have messages with the retain flag set, only one last \
             message with that flag is sent!
         Connection problems are captured and handled by `is_conn_issue()`
+
+        QoS 1 messages always pass the queue, they are sent directly if \
+            the in-flight window (INFLIGHT_MAX) has room.
+
+        A `memoryview` message (e.g. of `Message`) is written to the \
+            socket without a copy with QoS 0. The buffer is used again, so \
+            a copy is queued if it can not be sent, and QoS 1 messages are \
+            always copied.
         """
         assert 0 <= qos <= 1, "QoS level 2 is not supported. Choose 1 or 0."
-        return super().publish(topic, msg, retain, qos)
+        if retain:
+            # Only the last message with the retain flag is relevant
+            for m in [m for m in self.msg_to_send if m[0] == topic and m[2]]:
+                self.msg_to_send.remove(m)
+                self.queue_bytes -= len(m[1])
+        if qos == 0:
+            if not self.stream(topic, msg, retain=retain) and self.KEEP_QOS0:
+                self.add_msg_to_send((topic, bytes(msg) if isinstance(
+                    msg, memoryview) else msg, retain, qos))
+            return None
+        if isinstance(msg, memoryview):
+            msg: bytes = bytes(msg)
+        message: list = self.add_msg_to_send((topic, msg, retain, qos))
+        for pid in self._send_messages():
+            if self.inflight[pid][0] is message:
+                return pid
+        return None
 
     def subscribe(self, topic: bytes, qos: int = 0,
                   resubscribe: bool = True) -> int:
@@ -226,8 +387,76 @@ class Connector(robust2.MQTTClient):
         The function tries to send all messages and subscribe to all topics \
             that are in the queue to send.
         - returns: `bool`. True if the queue's empty.
-        """
-        return super().send_queue()
+
+        QoS 1 messages are only sent while the in-flight window \
+            (INFLIGHT_MAX) has room.
+        """
+        self._send_messages()
+        # The parent class only has to take care of the subscriptions
+        messages, self.msg_to_send = self.msg_to_send, []
+        empty: bool = super().send_queue()
+        self.msg_to_send: list = messages + self.msg_to_send
+        return empty and not self.msg_to_send
+
+    def _send_messages(self) -> list[int]:
+        """
+        Send queued messages in order until the in-flight window is full.
+        - returns: `list[int]`. The PIDs of the sent QoS 1 messages.
+        """
+        pids: list = []
+        while self.msg_to_send:
+            message: list = self.msg_to_send[0]
+            topic, msg, retain, qos, _, dup = message
+            if qos == 1 and len(self.inflight) >= self.INFLIGHT_MAX:
+                break
+            try:
+                pid: int = simple2.MQTTClient.publish(
+                    self, topic, msg, retain, qos, dup)
+            except (OSError, simple2.MQTTException) as e:
+                self.conn_issue = (e, 5)
+                break
+            self.msg_to_send.pop(0)
+            if qos == 1:
+                self.inflight[pid] = [message, ticks_ms()]
+                pids.append(pid)
+            else:
+                self.queue_bytes -= len(msg)
+        return pids
+
+    def stream(self, topic: bytes, msg: bytes, retain: bool = False) -> bool:
+        """
+        Publish a message with QoS 0 without queueing it when it can not \
+            be sent. `msg` can be a memoryview of a buffer that is used \
+            again afterwards, no reference is kept.
+        - returns: `bool`. False if the message has not been sent.
+        """
+        try:
+            simple2.MQTTClient.publish(self, topic, msg, retain, 0)
+        except (OSError, simple2.MQTTException) as e:
+            self.conn_issue = (e, 5)
+            return False
+        return True
+
+    def stats(self) -> dict:
+        """
+        Statistics of the QoS 1 delivery pipeline.
+        - returns: `dict`. Amount of queued and in-flight messages, the \
+            bytes they take, counters and the delivery latency in ms \
+            `[min, avg, max]` of the last LATENCY_SAMPLES messages.
+        """
+        return {
+            'queued': len(self.msg_to_send),
+            'inflight': len(self.inflight),
+            'bytes': self.queue_bytes,
+            'delivered': self.delivered,
+            'retransmits': self.retransmits,
+            'dropped': self.dropped,
+            'latency': [
+                min(self.latency),
+                sum(self.latency) // len(self.latency),
+                max(self.latency),
+            ] if self.latency else None,
+        }
 
     def is_conn_issue(self):
         """
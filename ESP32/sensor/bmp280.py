@@ -5,7 +5,12 @@ from machine import Timer
 # Local modules and variables
 from sensor.registers import REGISTERS as REG
 from sensor.registers import PRESSURE as PRES
+from sensor.registers import TEMPERATURE as TEMP
 from sensor.registers import COMPENSATION as COMP
+from sensor.formulae import unpack20
+from sensor.formulae import fine
+from sensor.formulae import temperature
+from sensor.formulae import pressure
 
 
 class BMP280:
@@ -33,6 +38,9 @@ class BMP280:
         self.rawT: float = 0.0
         self.fineT: float = 0.0
         self.rawP: float = 0.0
+        # Buffers for the measurement data, allocated once
+        self._buf: bytearray = bytearray(6)
+        self._tbuf: bytearray = bytearray(3)  # Temperature only
 
     def _rw_limiter_init(self):
         """
@@ -75,6 +83,18 @@ class BMP280:
         except OSError:  # If the device is disconnected
             return [0xff, 0xff, 0xff, 0xff, 0xff, 0xff]
 
+    def _read_into(self, reg_addr: int, buf: bytearray) -> bytearray:
+        """ Read `len(buf)` bytes into `buf` without allocating memory. """
+        while not self.limiter:
+            pass
+        self._rw_limiter_init()
+        try:
+            self._i2c.readfrom_mem_into(self._addr, reg_addr, buf)
+        except OSError:  # If the device is disconnected
+            for i in range(len(buf)):
+                buf[i] = 0xff
+        return buf
+
     def _read_bits(self, reg_addr: int, length: int, shift: int = 0) -> int:
         return self._read(reg_addr)[0] >> shift & int('1' * length, 2)
 
@@ -94,42 +114,31 @@ class BMP280:
         data |= val & value << shift  # data || (val && value) << shift
         self._write(reg_addr, data)
 
-    def _measurement(self) -> None:
+    def _raw(self) -> None:
         # Read all data at once. The data bytes are at 0xF7:0xFC (6 bytes)
-        data: list = self._read(PRES.MSB, size=6)
-        # Converting function. Bit shifts three values to one (20-bit value)
-        convert: function = lambda msb, lsb, xlsb: (
-            (msb << 12) + (lsb << 4) + (xlsb >> 4))
-        self.rawP, self.rawT = convert(*data[:3]), convert(*data[3:])
-
-        self.fineT: float = (
-            (self.rawT / 2.0**14.0 - self.tC[0] / 2.0**10.0)
-            * self.tC[1]
-            + ((self.rawT / 2.0**17.0 - self.tC[0] / 2.0**13.0)**2.0)
-            * self.tC[2]
-        )
+        data: bytearray = self._read_into(PRES.MSB, self._buf)
+        self.rawP = unpack20(data, 0)
+        self.rawT = unpack20(data, 3)
+
+    def _raw_temperature(self) -> None:
+        # Only read the temperature bytes at 0xFA:0xFC (3 bytes)
+        data: bytearray = self._read_into(TEMP.MSB, self._tbuf)
+        self.rawT = unpack20(data, 0)
+
+    def _measurement(self) -> None:
+        self._raw()
+        self._fine()
+
+    # The formulae are in `sensor/formulae.py`, where they are compiled with
+    # the native and viper code emitters of MicroPython.
+    def _fine(self) -> None:
+        self.fineT: float = fine(self.rawT, self.tC)
 
     def _temperature(self) -> float:
-        return self.fineT / ((2.0**9.0) * 10.0)
+        return temperature(self.fineT)
 
     def _pressure(self) -> float:
-        var1: float = ((1.0 + (self.pC[2] * (self.fineT / 2.0 - 64e3)**2.0
-                        / 2.0**19.0 + self.pC[1] * (self.fineT / 2.0 - 64e3))
-                        / 2.0**19.0 / 2.0**15.0) * self.pC[0])
-        var2: float = (((((self.fineT / 2.0 - 64e3)**2.0
-                        * self.pC[5] / 2.0**15.0)
-                        + (self.fineT / 2.0 - 64e3) * self.pC[4] * 2.0) / 4.0)
-                       + (self.pC[3] * 2.0**16.0))
-
-        try:
-            p: float = (((2.0**20.0 - self.rawP) - (var2 / 2.0**12.0))
-                        * (5.0**4.0) * 10.0 / var1)
-            p += (((self.pC[8] * p**2.0 / 2.0**31.0)
-                   + (p * self.pC[7] / 2.0**15.0) + self.pC[6]) / 2.0**4.0)
-        except:
-            p: float = 0.0
-        finally:
-            return p
+        return pressure(self.fineT, self.rawP, self.pC)
 
     def _compensation(self, compensate: list) -> list:
         return [
@@ -180,8 +189,16 @@ class BMP280:
             pressure = BMP280().fetch(temp=False)
 
             # An empty string is returned if both kwargs are set as False.
+
+        Without `pres` only the 3 temperature bytes are read and the \
+            pressure is not computed. Use this with the pressure \
+            oversampling set to skip (`SETTINGS().osMode(0, x)`).
         """
-        self._measurement()
+        if pres:
+            self._measurement()
+        else:
+            self._raw_temperature()
+            self._fine()
         return [
             value for value in [
                 self._temperature() if temp else None,
@@ -189,6 +206,42 @@ class BMP280:
             ] if value is not None
         ]
 
+    def fetch_raw(self, pres: bool = True) -> list[int]:
+        """
+        Read the uncompensated 20-bit temperature and pressure values.
+        No compensation is computed, use `tC` and `pC` to compensate the \
+            values elsewhere.
+
+        Usage::
+
+            rawT, rawP = BMP280().fetch_raw()
+            # Only the temperature (3 bytes are read)
+            rawT, = BMP280().fetch_raw(pres=False)
+        """
+        if not pres:
+            self._raw_temperature()
+            return [self.rawT]
+        self._raw()
+        return [self.rawT, self.rawP]
+
+    def compensate(self, rawT: int, rawP: int = None) -> list[float]:
+        """
+        Compute the temperature and pressure of raw values that have been \
+            fetched earlier with `fetch_raw()`. Only the temperature is \
+            computed if `rawP` is None.
+
+        Usage::
+
+            raw = BMP280().fetch_raw()
+            temperature, pressure = BMP280().compensate(*raw)
+        """
+        self.rawT = rawT
+        self._fine()
+        if rawP is None:
+            return [self._temperature()]
+        self.rawP = rawP
+        return [self._temperature(), self._pressure()]
+
     def standby(self, time: int = None) -> int | None:
         """
         Read/Write function for the standby time.
@@ -203,7 +256,7 @@ class BMP280:
 
         See `ESP32\\sensor\\settings.py` for more information.
         """
-        if not time:
+        if time is None:
             return self._read_bits(REG.CONFIG, 3, shift=5)
         assert 0x00 <= time <= 0x07
         self._write_bits(REG.CONFIG, time, 3, shift=5)
@@ -222,7 +275,7 @@ class BMP280:
 
         See `ESP32\\sensor\\settings.py` for more information.
         """
-        if not mode:
+        if mode is None:
             return self._read_bits(REG.CONFIG, 3, shift=2)
         assert 0x00 <= mode <= 0x04
         self._write_bits(REG.CONFIG, mode, 3, shift=2)
@@ -263,7 +316,7 @@ class BMP280:
 
         See `ESP32\\sensor\\settings.py` for more information.
         """
-        if not pres_temp:
+        if pres_temp is None:
             return [
                 self._read_bits(REG.CTRL_MEAS, 3, shift=2),
                 self._read_bits(REG.CTRL_MEAS, 3, shift=5),
@@ -286,7 +339,7 @@ class BMP280:
 
         See `ESP32\\sensor\\settings.py` for more information.
         """
-        if not mode:
+        if mode is None:
             return self._read_bits(REG.CTRL_MEAS, 2, shift=0)
         assert 0x00 <= mode <= 0x03
         self._write_bits(REG.CTRL_MEAS, mode, 2, shift=0)
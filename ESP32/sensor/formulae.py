@@ -0,0 +1,57 @@
+"""
+This module holds the per-sample functions of the BMP280: unpacking the
+raw values and the compensation formulae.
+
+On MicroPython the functions are compiled with the native and viper code
+emitters. On CPython the decorators do nothing and the functions run as
+plain Python, with the same results.
+
+The divisions by powers of two are written as literals (`16384.0` instead
+of `2.0**14.0`), the result is exactly the same but the power is not
+computed for every sample.
+"""
+# Standard micropython libraries
+try:
+    import micropython
+except ImportError:  # CPython: the code emitters are not available
+    class micropython:
+        native = viper = staticmethod(lambda f: f)
+    ptr8 = bytes
+
+# Local modules and variables
+# None
+
+
+@micropython.viper
+def unpack20(buf, offset: int) -> int:
+    """ Bit shifts three bytes (msb, lsb, xlsb) to one 20-bit value. """
+    b = ptr8(buf)
+    return (b[offset] << 12) | (b[offset + 1] << 4) | (b[offset + 2] >> 4)
+
+
+@micropython.native
+def fine(rawT: int, tC: list) -> float:
+    """ Fine temperature [See `README.md`]. """
+    t: float = rawT / 131072.0 - tC[0] / 8192.0
+    return (rawT / 16384.0 - tC[0] / 1024.0) * tC[1] + (t * t) * tC[2]
+
+
+@micropython.native
+def temperature(fineT: float) -> float:
+    """ Temperature in °C [See `README.md`]. """
+    return fineT / 5120.0
+
+
+@micropython.native
+def pressure(fineT: float, rawP: int, pC: list) -> float:
+    """ Pressure in Pa, `0.0` if it can not be computed [See `README.md`]. """
+    t: float = fineT / 2.0 - 64e3
+    var1: float = ((1.0 + (pC[2] * (t * t) / 524288.0 + pC[1] * t)
+                    / 524288.0 / 32768.0) * pC[0])
+    if var1 == 0.0:  # Prevent a division by 0
+        return 0.0
+    var2: float = (((t * t) * pC[5] / 32768.0) + t * pC[4] * 2.0) / 4.0 \
+        + (pC[3] * 65536.0)
+    p: float = ((1048576.0 - rawP) - (var2 / 4096.0)) * 625.0 * 10.0 / var1
+    return p + ((pC[8] * (p * p) / 2147483648.0) + (p * pC[7] / 32768.0)
+                + pC[6]) / 16.0
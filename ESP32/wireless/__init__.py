@@ -1 +1,2 @@
 from .wireless import WLAN
+from .metrics import MetricsServer
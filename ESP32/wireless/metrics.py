@@ -0,0 +1,115 @@
+# Standard micropython libraries
+import socket
+from time import ticks_ms
+from time import ticks_diff
+
+# Local modules and variables
+# None
+
+
+class MetricsServer:
+    # Time in seconds the answer may take to send, it fits in the send
+    # buffer of the socket
+    SEND_TIMEOUT: float = 0.05
+
+    def __init__(self, ip: str, collect: function,
+                 port: int = 9100, timeout: float = 0.5) -> None:
+        """
+        A tiny HTTP server for metrics in the Prometheus text format.
+        The server never blocks the main loop while waiting for clients: \
+            `poll()` handles at most one waiting request and returns \
+            directly if there is none. The request is read without \
+            blocking, a client that has not sent it yet is checked again \
+            at the next `poll()`.
+        - arguments:
+            - ip: `str`. IP address of the WLAN interface to bind to.
+            - collect: `function`. Callable() -> `list`. Returns the \
+                metrics as `[(name, labels, value), ...]` with labels a \
+                `dict` (or None). This function must only read cached \
+                values, it is called for every request.
+        - keyword arguments:
+            - port: `int`. Port to listen on.
+            - timeout: `float`. Time in seconds a client gets to send \
+                its request, over several calls of `poll()`.
+
+        #### Example::
+
+            server = MetricsServer(WLAN().ifconfig()['IP'], collect)
+            while True:
+                server.poll()  # GET http://<ip>:9100/metrics
+        """
+        self.collect: function = collect
+        self.timeout: int = int(timeout * 1_000)
+        self.requests: int = 0
+        self.client: socket.socket = None  # Accepted, request not read yet
+        self._request: bytes = b''
+        self._since: int = 0
+        self.sock: socket.socket = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(socket.getaddrinfo(ip, port)[0][-1])
+        self.sock.listen(2)
+        self.sock.setblocking(False)
+
+    def _format(self) -> bytes:
+        """ Format the metrics in the Prometheus text format. """
+        lines: list = []
+        for name, labels, value in self.collect():
+            if value is None:
+                continue
+            label: str = '{' + ','.join(
+                f'{k}="{v}"' for k, v in labels.items()) + '}' \
+                if labels else ''
+            lines.append(f'{name}{label} {value}')
+        lines.append('')
+        return '\n'.join(lines).encode()
+
+    def poll(self) -> bool:
+        """
+        Handle one waiting request, without blocking.
+        - returns: `bool`. True if a request has been handled.
+        """
+        if self.client is None:
+            try:
+                self.client, _ = self.sock.accept()
+            except OSError:  # No client is waiting
+                return False
+            self.client.setblocking(False)
+            self._request: bytes = b''
+            self._since: int = ticks_ms()
+        try:
+            chunk: bytes = self.client.recv(256)
+        except OSError:  # Nothing received yet
+            if ticks_diff(ticks_ms(), self._since) >= self.timeout:
+                self._close()  # The client was too slow
+            return False
+        self._request += chunk
+        if chunk and b'\r\n' not in self._request \
+                and len(self._request) < 256:
+            return False  # The rest of the request line is on its way
+        try:
+            self.client.settimeout(self.SEND_TIMEOUT)
+            if self._request.startswith(b'GET /metrics'):
+                body: bytes = self._format()
+                self.client.sendall(''.join([
+                    'HTTP/1.0 200 OK\r\n',
+                    'Content-Type: text/plain; version=0.0.4\r\n',
+                    f'Content-Length: {len(body)}\r\n\r\n',
+                ]).encode())
+                self.client.sendall(body)
+                self.requests += 1
+            elif chunk:
+                self.client.sendall(b'HTTP/1.0 404 Not Found\r\n\r\n')
+        except OSError:  # The client went away
+            pass
+        finally:
+            self._close()
+        return True
+
+    def _close(self) -> None:
+        self.client.close()
+        self.client: socket.socket = None
+
+    def close(self) -> None:
+        if self.client:
+            self._close()
+        self.sock.close()
@@ -1,15 +1,64 @@
 # Standard micropython libraries
+import os
+import json
 import machine
 import network
-from time import time
+from time import ticks_ms
+from time import ticks_diff
+from binascii import hexlify
+from binascii import unhexlify
 
 
 class WLAN:
-    def __init__(self, ssid: str, pwd: str, timeout: int = 10) -> None:
+    def __init__(self, ssid: str = '', pwd: str = '', timeout: int = 10,
+                 networks: list = None, rescan: int = 3,
+                 cache: str = 'wlan.json') -> None:
+        """
+        The WLAN class connects the device to the strongest configured \
+            access point.
+        Without a cache the access points are scanned once and the ones of \
+            the configured networks are ranked by their signal strength \
+            (RSSI). The access point that accepts the connection is cached \
+            on the flash (SSID and BSSID), the next boot connects to it \
+            directly, without a scan. The channel is not cached: the \
+            station interface of MicroPython 1.19 can not set it. Only \
+            when the cached access point fails `rescan` times in a row, \
+            the access points are scanned again and the next one is \
+            tried. The device is reset when none of them can be reached.
+        - keyword arguments:
+            - ssid: `str`. SSID of the first network.
+            - pwd: `str`. Password of the first network.
+            - timeout: `int`. Time in seconds an access point gets to \
+                accept the connection.
+            - networks: `list`. More networks: `[{'SSID': str, \
+                'PASSWORD': str}, ...]`.
+            - rescan: `int`. Failed connections with the cached access \
+                point before the access points are scanned again.
+            - cache: `str`. File of the cached access point.
+
+        #### Example::
+
+            internet = WLAN('Pole WiFi', 'secret',
+                            networks=[{'SSID': 'Depot', 'PASSWORD': '...'}])
+            internet.connect()
+            internet.report()  # {'ssid': 'Depot', 'rssi': -81, ...}
+        """
         self.SSID: str = ssid
         self.PWD: str = pwd
-        self.timeout: int = timeout
+        self.timeout: int = timeout * 1_000
+        self.networks: dict = {
+            n['SSID']: n['PASSWORD'] for n in networks or [] if n['SSID']}
+        if ssid:
+            self.networks[ssid] = pwd
+        self.rescan: int = rescan
+        self.cache: str = cache
         self.wlan: object = network.WLAN(network.STA_IF)
+        # Access points to try: [(ssid, bssid, rssi), ...]
+        self.candidates: list = []
+        self.current: tuple = None
+        self.scanned: bool = False
+        self.failures: int = 0  # Failed connections with the cached one
+        self.associate: int = None  # Time to associate in ms
 
     def active(self, state: bool = None) -> None | bool:
         """
@@ -50,16 +99,129 @@ class WLAN:
     def status(self) -> int:
         return self.wlan.status()
 
-    def connect(self) -> None:
-        _time = time()
-        self.active(True)
+    def _load(self) -> dict:
+        """ The cached access point, None if there is none. """
+        try:
+            with open(self.cache, 'r') as f:
+                cached: dict = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cached if cached.get('SSID') in self.networks \
+            and cached.get('BSSID') else None
+
+    def _save(self, cached: dict) -> None:
+        """ Cache the access point, the flash is only written on a change. """
+        if cached == self._load():
+            return
+        with open(self.cache, 'w') as f:
+            json.dump(cached, f)
+
+    def forget(self) -> None:
+        """ Remove the cached access point, the next boot scans again. """
+        try:
+            os.remove(self.cache)
+        except OSError:  # Not cached
+            pass
+
+    def rank(self) -> list:
+        """
+        Scan for the access points of the configured networks.
+        - returns: `list`. `[(ssid, bssid, rssi), ...]`, the strongest \
+            access point first.
+        """
+        self.scanned: bool = True
+        self.disconnect()  # No scan while an association is in progress
+        # scan(): [(ssid, bssid, channel, rssi, authmode, hidden), ...]
+        found: list = [
+            (ap[0].decode(), ap[1], ap[3]) for ap in self.scan()
+            if ap[0].decode() in self.networks
+        ]
+        found.sort(key=lambda ap: ap[2], reverse=True)
+        return found
+
+    def _try(self) -> None:
+        """ Start the association with the next candidate. """
+        self.current: tuple = self.candidates.pop(0)
+        ssid, bssid, _ = self.current
         self.disconnect()
-        if not self.isConnected():
-            self.wlan.connect(self.SSID, self.PWD)
-            while not self.isConnected():
-                if time() - _time >= self.timeout:
-                    print("ERROR: Connection timeout. Resetting device ...")
-                    machine.reset()
+        self.wlan.connect(ssid, self.networks[ssid], bssid=bssid)
+        self._time: int = ticks_ms()
+
+    def begin(self) -> None:
+        """
+        Start associating with the access point without waiting for it.
+        The association continues in the background, so other work (e.g. \
+            configuring the sensors) can be done in the meantime.
+        Use `wait()` to block until the connection has been made.
+        Without a cached access point the scan is done here, it takes \
+            about 2 seconds.
+        """
+        assert self.networks, "No WiFi network configured, \
+            please check the setup.json file."
+        self._start: int = ticks_ms()
+        self.active(True)
+        if self.isConnected():
+            return
+        cached: dict = self._load()
+        if cached:
+            self.candidates: list = [
+                (cached['SSID'], unhexlify(cached['BSSID']), None)]
+        else:
+            self.candidates: list = self.rank()
+        if not self.candidates:  # Nothing found, try the configured SSIDs
+            self.candidates: list = [
+                (ssid, None, None) for ssid in self.networks]
+        self._try()
+
+    def wait(self) -> None:
+        """
+        Wait until the association started by `begin()` has succeeded.
+        Every access point gets `timeout` seconds, then the next \
+            candidate is tried. The cached access point is tried again \
+            until it failed `rescan` times, then the access points are \
+            scanned and ranked again. The device is reset if none of the \
+            access points can be reached.
+        """
+        while not self.isConnected():
+            if ticks_diff(ticks_ms(), self._time) < self.timeout:
+                continue
+            if not self.scanned:  # The cached access point failed
+                self.failures += 1
+                if self.failures < self.rescan:
+                    self.candidates: list = [self.current]
+                else:
+                    # The failed access point is tried last
+                    self.candidates: list = sorted(
+                        self.rank(), key=lambda ap: ap[1] == self.current[1])
+            if not self.candidates:
+                self.forget()
+                print("ERROR: Connection timeout. Resetting device ...")
+                machine.reset()
+            self._try()
+        self.associate: int = ticks_diff(ticks_ms(), self._start)
+        # Only an access point is cached, not a connection by SSID
+        if self.current and self.current[1]:
+            self._save({'SSID': self.current[0],
+                        'BSSID': hexlify(self.current[1]).decode()})
+
+    def connect(self) -> None:
+        self.begin()
+        self.wait()
+
+    def report(self) -> dict:
+        """
+        Returns: `dict`. The access point, its signal strength, the time \
+            to associate in ms and if the access points have been scanned.
+        """
+        ssid, bssid, _ = self.current or ('', None, None)
+        return {
+            'ssid': ssid,
+            'bssid': hexlify(bssid).decode() if bssid else None,
+            'rssi': self.wlan.status('rssi') if self.isConnected() else None,
+            'associate_ms': self.associate,
+            'scanned': self.scanned,
+            'failures': self.failures,  # Of the cached access point
+        }
 
     def __str__(self) -> str:
         return f"Network configuration: {self.ifconfig()}"
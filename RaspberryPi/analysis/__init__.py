@@ -0,0 +1 @@
+from .thermal import Thermal
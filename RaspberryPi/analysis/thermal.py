@@ -0,0 +1,298 @@
+# Standard python libraries
+import csv
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+# None
+
+SENSORS: tuple = ('A1', 'A2', 'B1', 'B2')
+DAY: int = 86_400
+
+
+class Thermal:
+    def __init__(self, times: np.ndarray, values: np.ndarray,
+                 poles: list[str], sensors: tuple = SENSORS,
+                 interval: int = 300) -> None:
+        """
+        Vectorized analysis of the temperatures of a fleet of poles.
+        The temperatures are kept in one `(poles, sensors, times)` array on \
+            a regular time grid of `interval` seconds, `NaN` where a pole \
+            has no measurement. Every method works on the complete array \
+            at once: the rolling means use cumulative sums (O(n) for any \
+            window), the daily profile a reshape to whole days and the \
+            charging windows one gather of all events.
+        - arguments:
+            - times: `np.ndarray`. The time grid (`datetime64[s]`), UTC.
+            - values: `np.ndarray`. Temperatures in °C, `(poles, sensors, \
+                len(times))`.
+            - poles: `list[str]`. Names of the poles, the first axis.
+        - keyword arguments:
+            - sensors: `tuple`. Names of the sensors, the second axis.
+            - interval: `int`. Seconds between two points of the grid, the \
+                `MQTT.SEND_MEASUREMENT` of the devices.
+
+        #### Example::
+
+            thermal = Thermal.from_archive(Archive('archive'), start='2026-01')
+            anomaly = thermal.detrend()  # Without the weather and the day
+            offsets, curve, count = thermal.aligned(
+                thermal.windows('charging.csv'), values=anomaly)
+        """
+        self.times: np.ndarray = times
+        self.values: np.ndarray = values
+        self.poles: list[str] = list(poles)
+        self.sensors: tuple = tuple(sensors)
+        self.interval: int = interval
+
+    @classmethod
+    def from_archive(cls, archive, poles: list[str] = None,
+                     start: str = None, end: str = None,
+                     sensors: tuple = SENSORS,
+                     interval: int = 300) -> 'Thermal':
+        """
+        Load the `<sensor>_Temperature` columns of the poles of a \
+            `collector.Archive`. Every measurement is put in the slot of \
+            the grid it falls in, with clock-aligned measurements \
+            (`MQTT.ALIGN`) this is the exact time.
+        - keyword arguments:
+            - poles: `list[str]`. Poles to load, all poles if None.
+            - start: `str`. First month (`'YYYY-MM'`), inclusive.
+            - end: `str`. Last month (`'YYYY-MM'`), inclusive.
+        """
+        poles = poles or archive.poles()
+        columns: list[str] = [f'{s}_Temperature' for s in sensors]
+        loaded: list[list[dict]] = [
+            [{k: np.asarray(v) for k, v in month.items()}
+             for month in archive.scan(pole, columns, start, end)]
+            for pole in poles
+        ]
+        seconds: list[np.ndarray] = [
+            m['time'].astype(np.int64) for months in loaded for m in months]
+        if not seconds or not any(s.size for s in seconds):
+            return cls(np.array([], dtype='datetime64[s]'),
+                       np.empty((len(poles), len(sensors), 0), np.float32),
+                       poles, sensors, interval)
+        first: int = min(int(s.min()) for s in seconds if s.size)
+        first -= first % interval
+        last: int = max(int(s.max()) for s in seconds if s.size)
+        size: int = (last - first) // interval + 1
+        values: np.ndarray = np.full(
+            (len(poles), len(sensors), size), np.nan, np.float32)
+        for p, months in enumerate(loaded):
+            for month in months:
+                slots: np.ndarray = \
+                    (month['time'].astype(np.int64) - first) // interval
+                for s, column in enumerate(columns):
+                    if column in month:
+                        values[p, s, slots] = month[column]
+        times: np.ndarray = (first + interval * np.arange(size)).astype(
+            'datetime64[s]')
+        return cls(times, values, poles, sensors, interval)
+
+    def _select(self, sensors) -> list[int]:
+        return [self.sensors.index(s) for s in sensors]
+
+    @staticmethod
+    def _cumulative(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cumulative sums of the valid values and their count over the last \
+            axis, with a leading 0: the sum of `[a, b)` is `c[b] - c[a]`.
+        """
+        valid: np.ndarray = ~np.isnan(values)
+        shape: tuple = values.shape[:-1] + (values.shape[-1] + 1,)
+        sums: np.ndarray = np.zeros(shape, np.float64)
+        np.cumsum(np.where(valid, values, np.float32(0.0)), axis=-1,
+                  out=sums[..., 1:])
+        counts: np.ndarray = np.zeros(shape, np.int32)
+        np.cumsum(valid, axis=-1, out=counts[..., 1:])
+        return sums, counts
+
+    @staticmethod
+    def _mean(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """ The mean of sums and counts, `NaN` without valid values. """
+        mean: np.ndarray = np.empty(sums.shape, np.float32)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            np.divide(sums, counts, out=mean, casting='unsafe')
+        mean[counts == 0] = np.nan
+        return mean
+
+    def rolling(self, window: int, values: np.ndarray = None) -> np.ndarray:
+        """
+        Trailing mean of the last `window` points, the missing values are \
+            ignored.
+        - keyword arguments:
+            - values: `np.ndarray`. Values on the grid, the temperatures \
+                if None.
+        - returns: `np.ndarray`. Same shape as `values`.
+        """
+        values = self.values if values is None else values
+        sums, counts = self._cumulative(values)
+        # The point `e` holds the sum of `[e - window + 1, e]`, slices of
+        # the cumulative sums instead of an index array keep the memory low
+        total: int = values.shape[-1]
+        sums, counts = sums[..., 1:], counts[..., 1:].copy()
+        sums[..., window:] -= sums[..., :total - window]
+        counts[..., window:] -= counts[..., :total - window]
+        return self._mean(sums, counts)
+
+    def baseline(self, hours: float = 24.0,
+                 values: np.ndarray = None) -> np.ndarray:
+        """ Rolling baseline: the trailing mean of the last `hours`. """
+        return self.rolling(
+            max(1, int(hours * 3_600) // self.interval), values)
+
+    def gradient(self, top: tuple = ('A1', 'A2'),
+                 bottom: tuple = ('B1', 'B2'),
+                 values: np.ndarray = None) -> np.ndarray:
+        """
+        Temperature difference between the top and the bottom of the pole: \
+            the mean of the `top` sensors minus the mean of the `bottom` \
+            sensors (by default bus A at the top, bus B at the bottom).
+        - returns: `np.ndarray`. `(poles, times)`.
+        """
+        values = self.values if values is None else values
+        mean = lambda sensors: self._mean(*(
+            np.sum(a, axis=1) for a in (
+                np.nan_to_num(values[:, sensors]),
+                ~np.isnan(values[:, sensors]))))
+        return mean(self._select(top)) - mean(self._select(bottom))
+
+    def ambient(self) -> np.ndarray:
+        """
+        The ambient temperature of every sensor position: the median over \
+            the poles at every time. The poles share the weather and the \
+            day, a pole that heats up does not move the median.
+        - returns: `np.ndarray`. `(sensors, times)`.
+        """
+        # A sort over the poles puts the NaN last, the median is taken at
+        # the valid count of every column. 10x faster than `np.nanmedian`.
+        ordered: np.ndarray = np.sort(self.values, axis=0)
+        count: np.ndarray = np.sum(~np.isnan(self.values), axis=0)
+        middle = lambda i: np.take_along_axis(
+            ordered, np.maximum(i, 0)[np.newaxis], axis=0)[0]
+        with np.errstate(invalid='ignore'):
+            return np.where(count > 0, (middle((count - 1) // 2)
+                                        + middle(count // 2)) / 2, np.nan
+                            ).astype(np.float32)
+
+    def _days(self, values: np.ndarray) -> tuple[np.ndarray, int]:
+        """
+        Reshape the last axis to whole days (midnight UTC to midnight), \
+            padded with `NaN`. Returns the days and the padding in front.
+        """
+        slots: int = DAY // self.interval
+        front: int = int(self.times[0].astype(np.int64) % DAY) \
+            // self.interval if self.times.size else 0
+        days: int = -(-(front + values.shape[-1]) // slots)
+        padded: np.ndarray = np.full(
+            values.shape[:-1] + (days * slots,), np.nan, np.float32)
+        padded[..., front:front + values.shape[-1]] = values
+        return padded.reshape(values.shape[:-1] + (days, slots)), front
+
+    def daily(self, values: np.ndarray = None) -> np.ndarray:
+        """
+        The mean daily cycle: the mean per time of day (UTC) over all days.
+        - returns: `np.ndarray`. `(..., DAY // interval)`.
+        """
+        values = self.values if values is None else values
+        days, _ = self._days(values)
+        return self._mean(np.nansum(days, axis=-2),
+                          np.sum(~np.isnan(days), axis=-2))
+
+    def detrend(self, method: str = 'fleet',
+                ambient: np.ndarray = None) -> np.ndarray:
+        """
+        Remove the daily cycle and the weather from the temperatures.
+        - keyword arguments:
+            - method: `str`. 'fleet': subtract the `ambient()` temperature \
+                of the fleet (needs a few poles). 'daily': subtract the \
+                mean daily cycle of every pole and sensor, for a single \
+                pole.
+            - ambient: `np.ndarray`. Measured ambient temperature on the \
+                grid `(times,)`, e.g. of a weather station. Overrides \
+                `method`.
+        - returns: `np.ndarray`. The anomalies, `(poles, sensors, times)`.
+        """
+        if ambient is not None:
+            return self.values - ambient.astype(np.float32)
+        if method == 'fleet':
+            return self.values - self.ambient()[np.newaxis]
+        if method != 'daily':
+            raise ValueError(f"Unknown method '{method}'")
+        days, front = self._days(self.values)
+        anomaly: np.ndarray = days - self.daily()[..., np.newaxis, :]
+        anomaly = anomaly.reshape(self.values.shape[:-1] + (-1,))
+        return anomaly[..., front:front + self.values.shape[-1]]
+
+    def windows(self, path: str) -> np.ndarray:
+        """
+        Read the charging windows from a CSV file with the columns \
+            `pole`, `start` and `end` (ISO 8601, UTC). Windows of unknown \
+            poles or outside the grid are skipped.
+        - returns: `np.ndarray`. `(events, 3)`: the index of the pole and \
+            the first and the last slot of the window.
+        """
+        index: dict[str, int] = {p: i for i, p in enumerate(self.poles)}
+        with open(path, 'r', newline='') as f:
+            rows: list[dict] = [r for r in csv.DictReader(f)
+                                if r['pole'] in index]
+        if not rows or not self.times.size:
+            return np.empty((0, 3), np.int64)
+        first: int = int(self.times[0].astype(np.int64))
+        slot = lambda column: (np.array(
+            [r[column] for r in rows], dtype='datetime64[s]'
+        ).astype(np.int64) - first) // self.interval
+        events: np.ndarray = np.stack([
+            np.array([index[r['pole']] for r in rows]),
+            slot('start'), slot('end')], axis=1)
+        inside: np.ndarray = (events[:, 1] >= 0) & \
+            (events[:, 1] < self.times.size) & (events[:, 2] >= events[:, 1])
+        return events[inside]
+
+    def aligned(self, events: np.ndarray, before: int = 12, after: int = 36,
+                values: np.ndarray = None) -> tuple[np.ndarray, np.ndarray,
+                                                    np.ndarray]:
+        """
+        Event-aligned average around the start of the charging windows.
+        - arguments:
+            - events: `np.ndarray`. The charging windows of `windows()`.
+        - keyword arguments:
+            - before: `int`. Points before the start.
+            - after: `int`. Points from the start on.
+            - values: `np.ndarray`. Values on the grid, e.g. `detrend()`.
+        - returns: `tuple[np.ndarray, np.ndarray, np.ndarray]`. The \
+            offsets in seconds, the mean `(sensors, offsets)` and the \
+            amount of events per point `(sensors, offsets)`.
+        """
+        values = self.values if values is None else values
+        offsets: np.ndarray = np.arange(-before, after)
+        slots: np.ndarray = events[:, 1:2] + offsets[np.newaxis]
+        inside: np.ndarray = (slots >= 0) & (slots < values.shape[-1])
+        # (events, offsets, sensors)
+        window: np.ndarray = values[events[:, 0:1], :,
+                                    np.clip(slots, 0, values.shape[-1] - 1)]
+        window = np.where(inside[..., np.newaxis], window, np.nan)
+        count: np.ndarray = np.sum(~np.isnan(window), axis=0)
+        mean: np.ndarray = self._mean(np.nansum(window, axis=0), count)
+        return offsets * self.interval, mean.T, count.T
+
+    def rise(self, events: np.ndarray, before: int = 12,
+             values: np.ndarray = None) -> np.ndarray:
+        """
+        The temperature rise of every charging window: the mean during the \
+            window minus the mean of the `before` points before it.
+        - returns: `np.ndarray`. `(events, sensors)`, `NaN` without \
+            measurements.
+        """
+        values = self.values if values is None else values
+        sums, counts = self._cumulative(values)
+        pole: np.ndarray = events[:, 0]
+        start: np.ndarray = events[:, 1]
+        end: np.ndarray = np.minimum(events[:, 2] + 1, values.shape[-1])
+        begin: np.ndarray = np.maximum(start - before, 0)
+        mean = lambda a, b: self._mean(
+            sums[pole, :, b] - sums[pole, :, a],
+            counts[pole, :, b] - counts[pole, :, a])
+        return mean(start, end) - mean(begin, start)
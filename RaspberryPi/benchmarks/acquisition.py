@@ -0,0 +1,31 @@
+"""
+Comparison of the 'software' and 'hardware averaging' acquisition profiles
+of the ESP32 (`BMP280.PROFILE` in `setup.json`) with `models.AcquisitionModel`.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.acquisition
+"""
+# Standard python libraries
+# None
+
+# Third party libraries
+# None
+
+# Local modules and variables
+from models import AcquisitionModel
+
+
+if __name__ == '__main__':
+    model: AcquisitionModel = AcquisitionModel()
+    profiles: dict = {
+        'Software (30 samples, IIR 8)': model.software(),
+        'Software (30 samples, IIR off)': model.software(iir=0),
+        'Hardware (1 sample, IIR 16)': model.hardware(),
+    }
+    print(f"{'PROFILE':<32}{'P NOISE [Pa]':>14}{'T NOISE [°C]':>14}"
+          f"{'BUS [ms]':>10}{'ACQ. [ms]':>11}")
+    for name, p in profiles.items():
+        print(f"{name:<32}{p['pressure_noise']:>14.3f}"
+              f"{p['temperature_noise']:>14.5f}{p['bus_time']:>10.2f}"
+              f"{p['acquisition_time']:>11.1f}")
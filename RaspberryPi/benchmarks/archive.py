@@ -0,0 +1,71 @@
+"""
+Benchmark of `collector.Archive`: compaction of simulated measurements of
+one pole (4 sensors, one message every 5 minutes) and a scan over all
+years with the memory-mapped reader, compared to the same statistics on
+arrays that are loaded completely (the scan keeps one month in memory,
+the complete load all years).
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.archive [--years 5]
+"""
+# Standard python libraries
+import argparse
+import tempfile
+from time import perf_counter
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+from collector import Archive
+
+INTERVAL: int = 300  # Seconds between two measurements
+
+
+def messages(years: int):
+    """ Yields simulated 'Measurement' messages, time as UTC. """
+    rng: np.random.Generator = np.random.default_rng(1)
+    start: int = int(np.datetime64('2020-01-01T00:00:00', 's').astype(int))
+    for t in range(start, start + years * 365 * 86_400, INTERVAL):
+        time: list = np.datetime64(t, 's').astype(object).timetuple()[:6]
+        yield {
+            'message': 'Measurement',
+            'time': list(time),
+            'measurements': {
+                bus: {'Temperature': 15.0 + rng.normal(0.0, 5.0),
+                      'Pressure': 1013.25 + rng.normal(0.0, 10.0)}
+                for bus in ['A1', 'A2', 'B1', 'B2']
+            },
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--years', type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as root:
+        archive: Archive = Archive(root, batch=50_000)
+        start: float = perf_counter()
+        for rows, message in enumerate(messages(args.years), 1):
+            archive.append('pole-1', message)
+        archive.compact()
+        print(f'Compacted {rows} rows in {perf_counter() - start:.2f} s '
+              f'({len(archive.months("pole-1"))} months)')
+
+        start = perf_counter()
+        for name in ['A1_Temperature', 'A1_Pressure']:
+            summary: dict = archive.summary('pole-1', name)
+        mapped: float = perf_counter() - start
+        print(f'Memory-mapped scan:  {mapped * 1e3:8.1f} ms')
+
+        start = perf_counter()
+        for name in ['A1_Temperature', 'A1_Pressure']:
+            values: np.ndarray = np.concatenate([
+                np.load(f'{archive.path("pole-1", m)}/{name}.npy')
+                for m in archive.months('pole-1')])
+            check: tuple = (values.mean(), values.std())
+        print(f'Loaded completely:   {(perf_counter() - start) * 1e3:8.1f} ms')
+        print(f"A1_Pressure: mean {summary['mean']:.4f} (loaded "
+              f"{check[0]:.4f}), std {summary['std']:.4f} (loaded "
+              f"{check[1]:.4f})")
@@ -0,0 +1,160 @@
+"""
+Benchmark of `collector.LastValue` with simulated poles. Every pole sends a
+'Ping' every 60 seconds and a 'Measurement' of 4 sensors every 5 minutes
+(in place of a ping, as the ESP32 does). The benchmark reports the update
+rate, the time of a lookup, the cold load of all poles (built and reused),
+the same over HTTP (`FanOut` on `/status`) and the snapshot and restore.
+For comparison the last values are also taken from the stored rows of a
+week with a vectorized group-by, the scan the cache replaces.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.cache [--poles 1000] [--hours 24]
+"""
+# Standard python libraries
+import argparse
+import asyncio
+import os
+import tempfile
+from time import perf_counter
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+from collector import FanOut
+from collector import LastValue
+
+PORT: int = 18081
+KEEPALIVE: int = 60
+MEASUREMENT: int = 300
+START: int = 1_792_281_600  # 2026-10-18 00:00:00 UTC
+
+
+def messages(poles: int, hours: int):
+    """ Yields `(pole, message, time)` in the order of arrival. """
+    rng: np.random.Generator = np.random.default_rng(1)
+    ping: dict = {'message': 'Ping'}
+    for t in range(START, START + hours * 3_600, KEEPALIVE):
+        time: list = list(np.datetime64(t, 's').astype(object).timetuple()[:6])
+        measure: bool = (t - START) % MEASUREMENT == 0
+        values: np.ndarray = 15.0 + rng.normal(0.0, 1.0, (poles, 4)) \
+            if measure else None
+        for p in range(poles):
+            yield f'pole-{p}', {
+                'message': 'Measurement',
+                'time': time,
+                'measurements': {
+                    bus: {'Temperature': float(values[p, i]),
+                          'Pressure': 1013.25}
+                    for i, bus in enumerate(['A1', 'A2', 'B1', 'B2'])
+                },
+            } if measure else ping, t + p * KEEPALIVE / poles
+
+
+def scan(poles: int, days: int = 7) -> tuple[float, int]:
+    """
+    Seconds to take the last row per pole from a week of stored rows, and \
+        the amount of rows.
+    """
+    rng: np.random.Generator = np.random.default_rng(2)
+    rows: int = poles * days * 86_400 // MEASUREMENT
+    pole: np.ndarray = np.tile(np.arange(poles), rows // poles)
+    time: np.ndarray = np.repeat(
+        np.arange(rows // poles) * MEASUREMENT + START, poles)
+    values: np.ndarray = rng.normal(15.0, 1.0, (rows, 4))
+    start: float = perf_counter()
+    order: np.ndarray = np.lexsort((time, pole))
+    last: np.ndarray = order[np.r_[np.flatnonzero(np.diff(pole[order])),
+                                   rows - 1]]
+    latest: np.ndarray = values[last]
+    assert latest.shape == (poles, 4)
+    return perf_counter() - start, rows
+
+
+async def http(rounds: int) -> tuple[float, int]:
+    """ Mean time of `GET /status` and the size of the answer. """
+    times: list[float] = []
+    size: int = 0
+    for _ in range(rounds):
+        start: float = perf_counter()
+        reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+        writer.write(b'GET /status HTTP/1.1\r\n\r\n')
+        await writer.drain()
+        size = len(await reader.read())
+        times.append(perf_counter() - start)
+        writer.close()
+    return sum(times) / rounds, size
+
+
+async def serve(cache: LastValue, rounds: int) -> tuple[float, int]:
+    fanout: FanOut = FanOut('127.0.0.1', PORT, cache=cache)
+    await fanout.start()
+    try:
+        return await http(rounds)
+    finally:
+        await fanout.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--poles', type=int, default=1_000)
+    parser.add_argument('--hours', type=int, default=24)
+    args = parser.parse_args()
+    cache: LastValue = LastValue(keepalive=KEEPALIVE)
+    names: list[str] = [f'pole-{p}' for p in range(args.poles)]
+
+    updates: int = 0
+    elapsed: float = 0.0
+    for pole, message, t in messages(args.poles, args.hours):
+        start: float = perf_counter()
+        cache.update(pole, message, now=t)
+        elapsed += perf_counter() - start
+        updates += 1
+    now: float = t
+    print(f'Updates:          {updates / elapsed / 1e3:8.0f} k/s '
+          f'({updates} messages of {args.poles} poles)')
+
+    lookups: np.ndarray = np.random.default_rng(3).integers(
+        0, args.poles, 100_000)
+    start = perf_counter()
+    for p in lookups:
+        cache.get(names[p], now)
+    print('Lookup get():     '
+          f'{(perf_counter() - start) / lookups.size * 1e6:8.2f} us')
+    start = perf_counter()
+    for p in lookups:
+        cache.value(names[p], 'A1')
+    print('Lookup value():   '
+          f'{(perf_counter() - start) / lookups.size * 1e6:8.2f} us')
+
+    start = perf_counter()
+    body: bytes = cache.json(now=now)
+    print(f'Cold load, build: {(perf_counter() - start) * 1e3:8.2f} ms '
+          f'({len(body) / 1e3:.0f} kB)')
+    start = perf_counter()
+    cache.json(now=now)
+    print(f'Cold load, reuse: {(perf_counter() - start) * 1e6:8.2f} us')
+    cache.update(names[0], {'message': 'Ping'}, now=now)
+    start = perf_counter()
+    cache.json(now=now)
+    print(f'One pole changed: {(perf_counter() - start) * 1e3:8.2f} ms')
+    seconds, size = asyncio.run(serve(cache, 50))
+    print(f'GET /status:      {seconds * 1e3:8.2f} ms ({size / 1e3:.0f} kB)')
+    print('State:           ', cache.stats(now),
+          '(in 3 minutes:', cache.stats(now + 180)['online'], 'online)')
+
+    with tempfile.TemporaryDirectory() as folder:
+        path: str = os.path.join(folder, 'cache.json')
+        start = perf_counter()
+        cache.snapshot(path)
+        saved: float = perf_counter() - start
+        start = perf_counter()
+        restored: LastValue = LastValue(keepalive=KEEPALIVE, path=path)
+        print(f'Snapshot:         {saved * 1e3:8.2f} ms, restore '
+              f'{(perf_counter() - start) * 1e3:.2f} ms '
+              f'({os.path.getsize(path) / 1e3:.0f} kB)')
+        assert restored.json(now=now) == cache.json(now=now)
+
+    seconds, rows = scan(args.poles)
+    print(f'Scan of the rows: {seconds * 1e3:8.2f} ms ({rows} rows of a week)')
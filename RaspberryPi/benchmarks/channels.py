@@ -0,0 +1,31 @@
+"""
+Savings of the temperature-only fast path of the ESP32
+(`BMP280.PRESSURE_EVERY` in `setup.json`) with `models.AcquisitionModel`:
+conversion time of the sensors and I2C bus time per interval. The CPU time
+per sample is measured on the device with `ESP32/benchmarks/channels.py`.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.channels
+"""
+# Standard python libraries
+# None
+
+# Third party libraries
+# None
+
+# Local modules and variables
+from models import AcquisitionModel
+
+
+if __name__ == '__main__':
+    model: AcquisitionModel = AcquisitionModel()
+    full: dict = model.channels(1)
+    print(f"{'PRESSURE_EVERY':<16}{'CONV. [ms]':>12}{'SAVED':>8}"
+          f"{'BUS [ms]':>10}{'SAVED':>8}")
+    for every in (1, 2, 5, 10, 100):
+        c: dict = model.channels(every)
+        print(f"{every:<16}{c['conversion_time']:>12.2f}"
+              f"{1 - c['conversion_time'] / full['conversion_time']:>8.0%}"
+              f"{c['bus_time']:>10.2f}"
+              f"{1 - c['bus_time'] / full['bus_time']:>8.0%}")
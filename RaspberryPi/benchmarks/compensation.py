@@ -0,0 +1,117 @@
+"""
+Benchmark of the vectorized BMP280 compensation (`compensation.Compensation`).
+
+Before timing, the results are compared bit for bit with the formulae of
+the device (`ESP32/sensor/formulae.py`), which are run with CPython. The
+ESP32 computes with single precision floats: the device formulae are run
+with `np.float32` operands (every operation rounded to single precision, as
+on the device) and compared with `Compensation(dtype=np.float32)`, and run
+with Python floats and compared with the default double precision. The
+largest difference between single and double precision is reported.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.compensation
+"""
+# Standard python libraries
+import os
+import sys
+import time
+import types
+import struct
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+from compensation import Compensation
+
+# Calibration example from the datasheet [CHAPTER 3.12]
+T_C: list[int] = [27504, 26435, -1000]
+P_C: list[int] = [36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000]
+SIZES: list[int] = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+
+def device_formulae() -> types.ModuleType:
+    """ Import the compensation formulae of the ESP32. """
+    # The package also imports the BMP280 class, without the hardware
+    sys.modules.setdefault('ustruct', struct)
+    sys.modules.setdefault('machine', types.SimpleNamespace(Timer=None))
+    sys.path.insert(0, os.path.join(
+        os.path.dirname(__file__), '..', '..', 'ESP32'))
+    from sensor import formulae
+    return formulae
+
+
+def device(rawT: np.ndarray, rawP: np.ndarray, dtype: type) -> np.ndarray:
+    """
+    The device formulae per sample, with operands of `dtype`.
+    - returns: `np.ndarray`. `(2, samples)`, temperature and pressure.
+    """
+    formulae: types.ModuleType = device_formulae()
+    tC: list = [dtype(c) for c in T_C]
+    pC: list = [dtype(c) for c in P_C]
+    out: np.ndarray = np.empty((2, rawT.size), dtype)
+    for i, (t, p) in enumerate(zip(rawT.tolist(), rawP.tolist())):
+        fineT = formulae.fine(dtype(t), tC)
+        out[:, i] = formulae.temperature(fineT), \
+            formulae.pressure(fineT, dtype(p), pC)
+        # A Python float would round the next operations to double
+        assert type(fineT) is dtype
+    return out
+
+
+def agreement(samples: int = 20_000, seed: int = 0) -> tuple[int, tuple]:
+    """
+    Compare the host and device compensation for random 20-bit values, \
+        in single and double precision.
+    - returns: `tuple[int, tuple]`. The amount of compared samples and the \
+        largest difference of the temperature (°C) and pressure (Pa) \
+        between single and double precision.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    rawT: np.ndarray = rng.integers(0, 2**20, samples)
+    rawP: np.ndarray = rng.integers(0, 2**20, samples)
+
+    results: dict = {}
+    for dtype, view in [(np.float32, np.uint32), (np.float64, np.uint64)]:
+        dev: np.ndarray = device(rawT, rawP, dtype)
+        host: tuple = Compensation(T_C, P_C, dtype).compensate(rawT, rawP)
+        for name, d, h in zip(['Temperature', 'Pressure'], dev, host):
+            assert h.dtype == dtype, f"{name}: computed as {h.dtype}"
+            mismatch: int = int(np.count_nonzero(d.view(view) != h.view(view)))
+            assert mismatch == 0, \
+                f"{name} ({dtype.__name__}): {mismatch} samples differ"
+        results[dtype] = dev
+    # Only the range the sensor measures (-40 to 85 °C, 300 to 1100 hPa)
+    single, double = results[np.float32], results[np.float64]
+    valid: np.ndarray = (double[0] >= -40.0) & (double[0] <= 85.0) \
+        & (double[1] >= 30e3) & (double[1] <= 110e3)
+    error: tuple = tuple(
+        float(np.max(np.abs(single[i][valid] - double[i][valid])))
+        for i in range(2))
+    return samples, error
+
+
+def throughput(size: int, repeat: int = 5) -> float:
+    """ Returns: `float`. Compensated samples per second (best of repeat). """
+    rng: np.random.Generator = np.random.default_rng(size)
+    rawT: np.ndarray = rng.integers(400_000, 600_000, size).astype(np.float64)
+    rawP: np.ndarray = rng.integers(300_000, 500_000, size).astype(np.float64)
+    comp: Compensation = Compensation(T_C, P_C)
+    best: float = float('inf')
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        comp.compensate(rawT, rawP)
+        best: float = min(best, time.perf_counter() - start)
+    return size / best
+
+
+if __name__ == '__main__':
+    samples, (errorT, errorP) = agreement()
+    print(f"Bit-for-bit agreement: {samples} samples OK "
+          f"(float32 and float64)")
+    print(f"float32 vs float64:    {errorT:.2e} °C, {errorP:.2e} Pa")
+    print(f"{'SAMPLES':>12}  {'MSAMPLES/S':>10}")
+    for size in SIZES:
+        print(f"{size:>12}  {throughput(size) / 1e6:>10.2f}")
@@ -0,0 +1,107 @@
+"""
+Load test of `collector.FanOut`: thousands of local Server-Sent Events
+clients, each subscribed to the topic of one pole, receive the
+measurements published for all poles. The delivery latency is the time
+from `publish()` to the client parsing the event.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.fanout [--clients 2000] [--poles 50] [--rounds 20]
+
+The amount of clients is limited by the open file limit (`ulimit -n`),
+every client takes two sockets on the same host.
+"""
+# Standard python libraries
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+from collector import FanOut
+
+PORT: int = 18080
+
+
+async def client(topic: str, latencies: list, started: asyncio.Event,
+                 connected: list) -> None:
+    """ One browser: subscribe to `topic` and record every latency. """
+    reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+    writer.write(f'GET /events?topic={topic} HTTP/1.1\r\n\r\n'.encode())
+    await writer.drain()
+    await reader.readuntil(b'\r\n\r\n')
+    connected.append(topic)
+    started.set()
+    try:
+        while True:
+            line: bytes = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b'data: '):
+                message: dict = json.loads(line[6:])
+                latencies.append(perf_counter() - message['sent'])
+    finally:
+        writer.close()
+
+
+async def run(clients: int, poles: int, rounds: int, interval: float,
+              burst: int) -> dict:
+    fanout: FanOut = FanOut('127.0.0.1', PORT)
+    await fanout.start()
+    latencies: list = []
+    connected: list = []
+    started: asyncio.Event = asyncio.Event()
+    tasks: list = [
+        asyncio.ensure_future(client(
+            f'lsc/pole-{i % poles}', latencies, started, connected))
+        for i in range(clients)
+    ]
+    while len(fanout.subscribers) < clients:
+        await asyncio.sleep(0.05)
+    measurement: dict = {
+        'message': 'Measurement',
+        'time': [2026, 10, 18, 12, 0, 0],
+        'measurements': {b: {'Temperature': 21.5, 'Pressure': 1013.25}
+                         for b in ['A1', 'A2', 'B1', 'B2']},
+    }
+    for _ in range(rounds):
+        # `burst` messages per pole at once, the clients only have to
+        # receive the last one
+        for _ in range(burst):
+            for pole in range(poles):
+                measurement['sent'] = perf_counter()
+                fanout.publish(f'lsc/pole-{pole}', json.dumps(measurement))
+        await asyncio.sleep(interval)
+    await asyncio.sleep(1.0)
+    stats: dict = fanout.stats()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # The server notices the closed connections and ends its handlers
+    while fanout.subscribers:
+        await asyncio.sleep(0.05)
+    await fanout.close()
+    stats['latency'] = np.array(latencies) * 1e3
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=2_000)
+    parser.add_argument('--poles', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.25,
+                        help='Seconds between the rounds')
+    args = parser.parse_args()
+    print(f"{'BURST':>6}{'PUBLISHED':>11}{'DELIVERED':>11}"
+          f"{'COALESCED':>11}{'P50 [ms]':>10}{'P99 [ms]':>10}"
+          f"{'MAX [ms]':>10}")
+    for burst in (1, 5):
+        s: dict = asyncio.run(run(args.clients, args.poles, args.rounds,
+                                  args.interval, burst))
+        p50, p99, top = np.percentile(s['latency'], [50, 99, 100])
+        print(f"{burst:>6}{s['published']:>11}{s['delivered']:>11}"
+              f"{s['coalesced']:>11}{p50:>10.2f}{p99:>10.2f}{top:>10.2f}")
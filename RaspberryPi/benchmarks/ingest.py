@@ -0,0 +1,83 @@
+"""
+Worker sweep of `collector.Ingest`: the same mix of JSON, batched JSON and
+binary payloads is ingested with an increasing amount of decode worker
+processes. The knee is the last worker count that still increases the
+throughput by more than 10 %.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.ingest [--payloads 50000] [--workers 1 2 4 8]
+"""
+# Standard python libraries
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+# Third party libraries
+# None
+
+# Local modules and variables
+from collector.ingest import Ingest, pack
+
+
+def payloads(count: int) -> list[tuple[str, bytes]]:
+    """ 80 % single messages, 10 % batches of 10 and 10 % binary. """
+    message: dict = {
+        'message': 'Measurement',
+        'time': [2026, 10, 18, 12, 0, 0],
+        'measurements': {b: {'Temperature': 21.52, 'Pressure': 1013.25}
+                         for b in ['A1', 'A2', 'B1', 'B2']},
+    }
+    kinds: list = [json.dumps(message).encode()] * 8 + [
+        json.dumps([message] * 10).encode(),
+        pack([message] * 10),
+    ]
+    return [(f'lsc/pole-{i % 1_000}', kinds[i % 10]) for i in range(count)]
+
+
+async def run(items: list, workers: int, pool: bool) -> tuple[float, dict]:
+    executor: ProcessPoolExecutor = \
+        ProcessPoolExecutor(workers) if pool else None
+    if executor:  # Start the processes before the time is measured
+        list(executor.map(abs, range(workers)))
+    ingest: Ingest = Ingest(lambda rows: None, workers=workers,
+                            executor=executor, queue_size=5_000, chunk=256)
+    await ingest.start()
+    start: float = perf_counter()
+    for topic, payload in items:
+        await ingest.put(topic, payload)
+    await ingest.stop()
+    elapsed: float = perf_counter() - start
+    if executor:
+        executor.shutdown()
+    return elapsed, ingest.stats()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--payloads', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    items: list = payloads(args.payloads)
+    print(f'{os.cpu_count()} CPUs, {args.payloads} payloads')
+    print(f"{'WORKERS':<12}{'MSG/S':>10}{'BLOCKED':>10}{'WAIT [s]':>10}"
+          f"{'MAX DEPTH':>11}")
+    elapsed, s = asyncio.run(run(items, 1, pool=False))
+    print(f"{'event loop':<12}{s['written'] / elapsed:>10.0f}"
+          f"{s['blocked']:>10}{s['blocked_time']:>10.2f}"
+          f"{s['max_depth']:>11}")
+    knee: int = None
+    previous: float = 0.0
+    for workers in args.workers:
+        elapsed, s = asyncio.run(run(items, workers, pool=True))
+        rate: float = s['written'] / elapsed
+        print(f"{workers:<12}{rate:>10.0f}{s['blocked']:>10}"
+              f"{s['blocked_time']:>10.2f}{s['max_depth']:>11}")
+        if rate > previous * 1.1:
+            knee = workers
+        previous = max(previous, rate)
+    print(f'Knee: {knee} worker(s)')
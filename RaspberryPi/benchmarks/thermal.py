@@ -0,0 +1,96 @@
+"""
+Benchmark of `analysis.Thermal` on simulated fleets of growing size. Every
+pole measures 4 sensors every 5 minutes: a shared daily cycle and weather,
+noise and one charging session per day that heats the top of the pole
+(bus A) by `RISE` °C. The time of every analysis step is reported per
+size, and the rise recovered from the detrended temperatures is checked
+against the simulated rise.
+
+Usage (from the RaspberryPi folder)::
+
+    python -m benchmarks.thermal [--sizes 10x1 50x1 50x5]
+
+A size is `<poles>x<years>`.
+"""
+# Standard python libraries
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+from analysis import Thermal
+
+INTERVAL: int = 300  # Seconds between two measurements
+RISE: float = 1.5  # Temperature rise of a charging session in °C
+
+
+def fleet(poles: int, years: int, folder: str) -> tuple[Thermal, str]:
+    """ Simulated fleet and a CSV file with its charging windows. """
+    rng: np.random.Generator = np.random.default_rng(1)
+    slots: int = 86_400 // INTERVAL
+    size: int = years * 365 * slots
+    start: int = int(np.datetime64('2020-01-01T00:00:00', 's').astype(int))
+    times: np.ndarray = (start + INTERVAL * np.arange(size)).astype(
+        'datetime64[s]')
+    day: np.ndarray = np.arange(size, dtype=np.float32) % slots / slots
+    weather: np.ndarray = (15.0 + 8.0 * np.sin(2 * np.pi * (day - 0.3))
+                           + np.cumsum(rng.normal(0.0, 0.02, size))
+                           ).astype(np.float32)
+    values: np.ndarray = np.empty((poles, 4, size), np.float32)
+    lines: list[str] = ['pole,start,end']
+    for p in range(poles):
+        values[p] = weather + rng.normal(0.0, 0.1, (4, size)).astype(
+            np.float32)
+        # One session per day, 1 to 3 hours, starting between 8 and 20 h
+        begin: np.ndarray = np.arange(0, size, slots) + rng.integers(
+            8 * 12, 20 * 12, size // slots)
+        length: np.ndarray = rng.integers(12, 36, begin.size)
+        for b, n in zip(begin, length):
+            values[p, :2, b:b + n] += RISE
+            lines.append(f'pole-{p},{times[b]},{times[b + n - 1]}')
+    values[:, :, rng.random(size) < 0.01] = np.nan  # Lost messages
+    path: str = os.path.join(folder, f'windows-{poles}x{years}.csv')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+    return Thermal(times, values, [f'pole-{p}' for p in range(poles)],
+                   interval=INTERVAL), path
+
+
+def timed(results: dict, name: str, call):
+    start: float = perf_counter()
+    value = call()
+    results[name] = perf_counter() - start
+    return value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', nargs='+', default=['10x1', '50x1', '50x5'])
+    args = parser.parse_args()
+    steps: list[str] = ['baseline', 'gradient', 'fleet', 'daily', 'windows',
+                        'aligned', 'rise']
+    print('SIZE\tPOINTS [M]\t' + '\t'.join(f'{s} [s]' for s in steps)
+          + '\tRISE [°C]')
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            poles, years = (int(v) for v in size.split('x'))
+            thermal, path = fleet(poles, years, folder)
+            results: dict = {}
+            timed(results, 'baseline', lambda: thermal.baseline(24))
+            timed(results, 'gradient', thermal.gradient)
+            anomaly: np.ndarray = timed(results, 'fleet', thermal.detrend)
+            timed(results, 'daily', lambda: thermal.detrend('daily'))
+            events: np.ndarray = timed(
+                results, 'windows', lambda: thermal.windows(path))
+            timed(results, 'aligned',
+                  lambda: thermal.aligned(events, values=anomaly))
+            rise: np.ndarray = timed(
+                results, 'rise', lambda: thermal.rise(events, values=anomaly))
+            print(f'{size}\t{thermal.values.size / 1e6:.1f}\t\t' + '\t'.join(
+                f'{results[s]:.2f}' for s in steps)
+                + f'\t{np.nanmean(rise[:, :2]):.2f} ({RISE})')
+            del thermal, anomaly
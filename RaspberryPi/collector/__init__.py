@@ -0,0 +1,6 @@
+from .scraper import Scraper
+from .fanout import FanOut
+from .archive import Archive
+from .ingest import Ingest
+from .backfill import Backfill
+from .cache import LastValue
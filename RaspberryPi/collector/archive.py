@@ -0,0 +1,226 @@
+# Standard python libraries
+import os
+from calendar import timegm
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+# None
+
+
+class Archive:
+    def __init__(self, root: str, batch: int = 10_000) -> None:
+        """
+        Columnar archive of the measurements, one folder per pole and month.
+        Every column is a NumPy `.npy` file: `time.npy` (`datetime64[s]`, \
+            the time of the message) and one `float64` file per sensor and \
+            quantity, e.g. `A1_Temperature.npy` and `A1_Pressure.npy`. \
+            The rows of a month are sorted by time.
+
+            <root>/<pole>/<YYYY-MM>/time.npy
+            <root>/<pole>/<YYYY-MM>/A1_Temperature.npy
+            ...
+
+        New measurements are buffered and written to the archive by \
+            `compact()`, which is done automatically every `batch` rows.
+        The reader memory-maps the files, only the pages that are used by \
+            a computation are read from disk.
+        - arguments:
+            - root: `str`. Folder of the archive.
+        - keyword arguments:
+            - batch: `int`. Amount of buffered rows before compacting.
+
+        #### Example::
+
+            archive = Archive('archive')
+            archive.append('pole-1', message)  # Decoded 'Measurement'
+            archive.compact()
+            archive.summary('pole-1', 'A1_Temperature')
+        """
+        self.root: str = root
+        self.batch: int = batch
+        self.buffer: dict[str, list[tuple[int, dict]]] = {}
+        self.buffered: int = 0
+
+    @staticmethod
+    def timestamp(time: list[int]) -> int:
+        """ The `time` field of a message in seconds since the epoch. """
+        return timegm((*time[:6], 0, 0, 0))
+
+    def append(self, pole: str, message: dict) -> None:
+        """
+        Buffer one decoded 'Measurement' message, other messages are \
+            ignored.
+        """
+        if message.get('message') != 'Measurement':
+            return
+        row: dict = {
+            f'{bus}_{key}': value
+            for bus, values in message['measurements'].items()
+            for key, value in values.items()
+        }
+        self.buffer.setdefault(pole, []).append(
+            (self.timestamp(message['time']), row))
+        self.buffered += 1
+        if self.buffered >= self.batch:
+            self.compact()
+
+    def path(self, pole: str, month: str = '') -> str:
+        return os.path.join(self.root, pole, month)
+
+    def compact(self) -> None:
+        """ Write all buffered rows to the monthly files. """
+        for pole, rows in self.buffer.items():
+            times: np.ndarray = np.array(
+                [t for t, _ in rows], dtype='datetime64[s]')
+            months: np.ndarray = times.astype('datetime64[M]')
+            for month in np.unique(months):
+                select: np.ndarray = np.flatnonzero(months == month)
+                self._merge(pole, str(month), times[select],
+                            [rows[i][1] for i in select])
+        self.buffer = {}
+        self.buffered = 0
+
+    def _merge(self, pole: str, month: str, times: np.ndarray,
+               rows: list[dict]) -> None:
+        """ Merge new rows with the existing files of one month. """
+        folder: str = self.path(pole, month)
+        os.makedirs(folder, exist_ok=True)
+        old: dict[str, np.ndarray] = self.read(pole, month)
+        names: list[str] = sorted(
+            set(k for row in rows for k in row) | (set(old) - {'time'}))
+        new: dict[str, np.ndarray] = {'time': times}
+        for name in names:
+            new[name] = np.array(
+                [row.get(name, np.nan) for row in rows], dtype=np.float64)
+        columns: dict[str, np.ndarray] = new if not old else {
+            name: np.concatenate([
+                old[name] if name in old else np.full(len(old['time']),
+                                                      np.nan),
+                column,
+            ]) for name, column in new.items()
+        }
+        del old  # Release the memory maps before the files are replaced
+        order: np.ndarray = np.argsort(columns['time'], kind='stable')
+        # Every column is written to a temporary file first, the time
+        # column is replaced last.
+        for name in names + ['time']:
+            file: str = os.path.join(folder, f'{name}.npy')
+            with open(f'{file}.tmp', 'wb') as f:
+                np.save(f, columns[name][order])
+            os.replace(f'{file}.tmp', file)
+
+    def poles(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
+
+    def months(self, pole: str) -> list[str]:
+        """ Returns: `list[str]`. Archived months as `'YYYY-MM'`. """
+        if not os.path.isdir(self.path(pole)):
+            return []
+        return sorted(os.listdir(self.path(pole)))
+
+    def read(self, pole: str, month: str,
+             columns: list[str] = None) -> dict[str, np.ndarray]:
+        """
+        Memory-map the columns of one month.
+        - keyword arguments:
+            - columns: `list[str]`. Columns to map, all columns if None.
+        - returns: `dict[str, np.ndarray]`. Read-only memory maps, empty \
+            if the month has not been archived.
+        """
+        folder: str = self.path(pole, month)
+        if not os.path.isfile(os.path.join(folder, 'time.npy')):
+            return {}
+        names: list[str] = columns or [
+            f[:-4] for f in os.listdir(folder) if f.endswith('.npy')]
+        return {
+            name: np.load(os.path.join(folder, f'{name}.npy'), mmap_mode='r')
+            for name in names
+            if os.path.isfile(os.path.join(folder, f'{name}.npy'))
+        }
+
+    def scan(self, pole: str, columns: list[str], start: str = None,
+             end: str = None):
+        """
+        Iterate over the months of one pole.
+        - keyword arguments:
+            - start: `str`. First month (`'YYYY-MM'`), inclusive.
+            - end: `str`. Last month (`'YYYY-MM'`), inclusive.
+        - yields: `dict[str, np.ndarray]`. Memory-mapped columns of one \
+            month, always with `time`.
+        """
+        for month in self.months(pole):
+            if (start and month < start) or (end and month > end):
+                continue
+            data: dict = self.read(pole, month, ['time'] + columns)
+            if data:
+                yield data
+
+    def fleet(self, column: str, month: str,
+              poles: list[str] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        One column of many poles as aligned rows. With clock-aligned \
+            measurements (`MQTT.ALIGN` in `setup.json`) all poles share the \
+            same timestamps, so the rows are joined on the exact time and \
+            nothing is interpolated.
+        - keyword arguments:
+            - poles: `list[str]`. Poles to join, all poles if None.
+        - returns: `tuple[np.ndarray, np.ndarray]`. The sorted union of the \
+            timestamps and a `(poles, times)` matrix, `NaN` where a pole \
+            has no measurement at that time.
+        """
+        poles = poles or self.poles()
+        data: list[dict] = [self.read(p, month, ['time', column])
+                            for p in poles]
+        times: np.ndarray = np.unique(np.concatenate(
+            [d['time'] for d in data if d] or
+            [np.array([], dtype='datetime64[s]')]))
+        matrix: np.ndarray = np.full((len(poles), len(times)), np.nan)
+        for row, d in zip(matrix, data):
+            if column in d:
+                row[np.searchsorted(times, d['time'])] = d[column]
+        return times, matrix
+
+    def summary(self, pole: str, column: str, start: str = None,
+                end: str = None) -> dict:
+        """
+        Statistics of one column over many months, computed month by \
+            month. Missing values (`NaN`) are ignored.
+        - returns: `dict`. `count`, `mean`, `std`, `min` and `max`.
+        """
+        # The months are combined with the parallel algorithm of Chan et
+        # al., which stays accurate for large values such as the pressure.
+        count: int = 0
+        mean: float = 0.0
+        m2: float = 0.0
+        low: float = np.inf
+        high: float = -np.inf
+        for data in self.scan(pole, [column], start, end):
+            if column not in data:
+                continue
+            values: np.ndarray = data[column]
+            valid: np.ndarray = values[~np.isnan(values)]
+            if not valid.size:
+                continue
+            n: int = valid.size
+            m: float = float(valid.mean())
+            delta: float = m - mean
+            m2 += float(np.square(valid - m).sum()) \
+                + delta**2 * count * n / (count + n)
+            mean += delta * n / (count + n)
+            count += n
+            low = min(low, float(valid.min()))
+            high = max(high, float(valid.max()))
+        if not count:
+            return {'count': 0, 'mean': None, 'std': None, 'min': None,
+                    'max': None}
+        return {
+            'count': count,
+            'mean': mean,
+            'std': (m2 / count) ** 0.5,
+            'min': low,
+            'max': high,
+        }
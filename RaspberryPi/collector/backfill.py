@@ -0,0 +1,171 @@
+# Standard python libraries
+import json
+from time import monotonic
+
+# Third party libraries
+# None
+
+# Local modules and variables
+# None
+
+
+class Backfill:
+    def __init__(self, publish, control, timeout: float = 30.0,
+                 attempts: int = 3, window: int = 16,
+                 span: int = 144) -> None:
+        """
+        Detects the gaps in the sequence numbers (`seq`) of the \
+            'Measurement' messages of every pole and requests the missing \
+            measurements again with `{"BACKFILL": [first, last]}` on the \
+            control topic of the pole. The device answers with backfill \
+            messages (`collector.ingest.unpack_backfill()`), their \
+            measurements fill the gap.
+        A missing measurement is requested `attempts` times, every \
+            `timeout` seconds, and counted as lost after that (e.g. it is \
+            no longer in the history of the device). A sequence number \
+            that has already been received is a duplicate (e.g. a QoS 1 \
+            message sent again), unless it is 0, more than `window` behind \
+            the newest one or measured after the newest one: then the \
+            device has rebooted and its sequence starts again.
+        A backfilled measurement (`"backfill": true`) only fills a gap, a \
+            late or repeated answer is a duplicate and never moves the \
+            newest sequence number.
+        - arguments:
+            - publish: Callable(topic, payload). Publishes a MQTT message.
+            - control: Callable(pole) -> str. The control topic of a pole.
+        - keyword arguments:
+            - timeout: `float`. Seconds before a request is sent again.
+            - attempts: `int`. Requests per missing measurement.
+            - window: `int`. Sequence numbers behind the newest one that \
+                are duplicates instead of a reboot.
+            - span: `int`. Max. amount of measurements per request, the \
+                `BMP280.HISTORY` of the devices.
+
+        #### Example::
+
+            backfill = Backfill(client.publish, lambda pole: f'{pole}/control')
+            if backfill.observe('pole-1', message):  # For every message
+                archive.append('pole-1', message)
+            backfill.poll()  # Every few seconds
+        """
+        self.publish = publish
+        self.control = control
+        self.timeout: float = timeout
+        self.attempts: int = attempts
+        self.window: int = window
+        self.span: int = span
+        self.last: dict[str, int] = {}  # Newest sequence number per pole
+        self.newest: dict[str, list] = {}  # Time of the newest measurement
+        # Missing sequence numbers per pole: {seq: [requests, deadline]}
+        self.missing: dict[str, dict[int, list]] = {}
+        # Counters
+        self.gaps: int = 0
+        self.filled: int = 0
+        self.duplicates: int = 0
+        self.reboots: int = 0
+        self.requests: int = 0
+        self.lost: int = 0
+
+    def observe(self, pole: str, message: dict) -> bool:
+        """
+        Check the sequence number of a decoded message of a pole.
+        - returns: `bool`. False if the message is a duplicate, True for \
+            new messages and messages without a sequence number.
+        """
+        seq: int = message.get('seq')
+        if seq is None:
+            return True
+        missing: dict[int, list] = self.missing.setdefault(pole, {})
+        if message.get('backfill'):
+            if seq in missing:
+                del missing[seq]
+                self.filled += 1
+                return True
+            self.duplicates += 1
+            return False
+        last: int = self.last.get(pole)
+        time: list = message.get('time')
+        if last is None or seq > last:
+            if last is not None and seq > last + 1:
+                self.gaps += 1
+                for s in range(last + 1, seq):
+                    missing[s] = [0, 0.0]
+            self.last[pole] = seq
+            self.newest[pole] = time
+            return True
+        if seq in missing:
+            del missing[seq]
+            self.filled += 1
+            return True
+        newest: list = self.newest.get(pole)
+        later: bool = time is not None and newest is not None \
+            and time[:6] > newest[:6]
+        if seq and last - seq <= self.window and not later:
+            self.duplicates += 1
+            return False
+        # The device has rebooted, its old gaps can not be filled anymore
+        self.reboots += 1
+        self.lost += len(missing)
+        missing.clear()
+        self.last[pole] = seq
+        self.newest[pole] = time
+        return True
+
+    def ranges(self, pole: str) -> list[list[int]]:
+        """
+        Returns: `list[list[int]]`. The missing sequence numbers of a pole \
+            as `[first, last]` ranges of at most `span` measurements.
+        """
+        ranges: list[list[int]] = []
+        for seq in sorted(self.missing.get(pole, {})):
+            if ranges and seq == ranges[-1][1] + 1 and \
+                    seq - ranges[-1][0] < self.span:
+                ranges[-1][1] = seq
+            else:
+                ranges.append([seq, seq])
+        return ranges
+
+    def poll(self, now: float = None) -> int:
+        """
+        Request the missing measurements whose previous request has timed \
+            out, and give up on the ones that have been requested \
+            `attempts` times.
+        - keyword arguments:
+            - now: `float`. Current time in seconds (`time.monotonic()`).
+        - returns: `int`. Amount of requests that have been sent.
+        """
+        now: float = monotonic() if now is None else now
+        sent: int = 0
+        for pole, missing in self.missing.items():
+            for first, last in self.ranges(pole):
+                due: list[int] = [s for s in range(first, last + 1)
+                                  if missing[s][1] <= now]
+                if not due:
+                    continue
+                for s in due:
+                    if missing[s][0] >= self.attempts:
+                        del missing[s]
+                        self.lost += 1
+                    else:
+                        missing[s][0] += 1
+                        missing[s][1] = now + self.timeout
+                due = [s for s in due if s in missing]
+                if not due:
+                    continue
+                self.publish(self.control(pole), json.dumps(
+                    {'BACKFILL': [due[0], due[-1]]}).encode())
+                self.requests += 1
+                sent += 1
+        return sent
+
+    def stats(self) -> dict:
+        """ Counters and the amount of missing measurements. """
+        return {
+            'gaps': self.gaps,
+            'filled': self.filled,
+            'duplicates': self.duplicates,
+            'reboots': self.reboots,
+            'requests': self.requests,
+            'lost': self.lost,
+            'missing': sum(len(m) for m in self.missing.values()),
+        }
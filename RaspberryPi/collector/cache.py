@@ -0,0 +1,182 @@
+# Standard python libraries
+import json
+import os
+from time import time as now_s
+from calendar import timegm
+
+# Third party libraries
+# None
+
+# Local modules and variables
+# None
+
+
+class LastValue:
+    def __init__(self, keepalive: int = 60, missed: int = 3,
+                 path: str = None) -> None:
+        """
+        Last-value cache of the poles: the newest values of every sensor, \
+            the time of the last message and ping and the online state. \
+            Every lookup is O(1), the website does not have to scan the \
+            archive to show the current state of the fleet.
+        A pole is online while its last message is at most `missed` ping \
+            intervals old. The ping interval of every pole is learned from \
+            its pings (`MQTT.SEND_KEEPALIVE` of the device), `keepalive` \
+            until two pings have been received.
+        The JSON of a pole (and of all poles) is built once and reused \
+            until the pole sends a message or its state changes.
+        - keyword arguments:
+            - keepalive: `int`. Default ping interval in seconds.
+            - missed: `int`. Ping intervals without a message before a \
+                pole is offline.
+            - path: `str`. Snapshot file, restored if it exists.
+
+        #### Example::
+
+            cache = LastValue(keepalive=60, path='cache.json')
+            cache.update('pole-1', message)  # For every decoded message
+            cache.get('pole-1')  # {'online': True, 'sensors': {...}, ...}
+            cache.snapshot()  # Every minute and before a restart
+        """
+        self.keepalive: int = keepalive
+        self.missed: int = missed
+        self.path: str = path
+        self.poles: dict[str, dict] = {}
+        self.updates: int = 0
+        # Serialized JSON per pole and of all poles, with the times
+        # `(after, before]` in which the online state in it is valid
+        self._json: dict[str, tuple[float, float, bytes]] = {}
+        self._all: tuple[float, float, bytes] = None
+        if path and os.path.isfile(path):
+            self.restore(path)
+
+    def update(self, pole: str, message: dict, now: float = None) -> None:
+        """
+        Add a decoded message of a pole. A 'Measurement' only replaces \
+            the values of a sensor that are older, a backfilled \
+            measurement does not hide a newer one.
+        - keyword arguments:
+            - now: `float`. Time of arrival in seconds, `time.time()` if \
+                None.
+        """
+        now = now_s() if now is None else now
+        entry: dict = self.poles.get(pole)
+        if entry is None:
+            entry = self.poles[pole] = {
+                'seen': None, 'ping': None, 'cadence': None, 'sensors': {}}
+        entry['seen'] = now
+        kind: str = message.get('message')
+        if kind == 'Ping':
+            if entry['ping'] is not None and now > entry['ping']:
+                interval: float = now - entry['ping']
+                # Smoothed, a late ping does not change the state at once
+                entry['cadence'] = interval if entry['cadence'] is None \
+                    else 0.8 * entry['cadence'] + 0.2 * interval
+            entry['ping'] = now
+        elif kind == 'Measurement':
+            stamp: int = timegm((*message['time'][:6], 0, 0, 0))
+            sensors: dict = entry['sensors']
+            for sensor, values in message['measurements'].items():
+                current: dict = sensors.get(sensor)
+                if current is None or stamp >= current['time']:
+                    sensors[sensor] = {**values, 'time': stamp}
+        self.updates += 1
+        self._json.pop(pole, None)
+        self._all = None
+
+    def _until(self, entry: dict) -> float:
+        """ Time until which the pole is online. """
+        if entry['seen'] is None:
+            return float('-inf')
+        return entry['seen'] + self.missed * (
+            entry['cadence'] or self.keepalive)
+
+    def online(self, pole: str, now: float = None) -> bool | None:
+        """ Returns: `bool | None`. The state, None for an unknown pole. """
+        entry: dict = self.poles.get(pole)
+        if entry is None:
+            return None
+        return (now_s() if now is None else now) <= self._until(entry)
+
+    def get(self, pole: str, now: float = None) -> dict | None:
+        """
+        Returns: `dict | None`. The last values of a pole: `online`, \
+            `seen` and `ping` (seconds since the epoch) and the last \
+            values per sensor with their `time`. None for an unknown pole.
+        """
+        entry: dict = self.poles.get(pole)
+        if entry is None:
+            return None
+        return {
+            'online': (now_s() if now is None else now) <= self._until(entry),
+            'seen': entry['seen'],
+            'ping': entry['ping'],
+            'sensors': entry['sensors'],
+        }
+
+    def value(self, pole: str, sensor: str) -> dict | None:
+        """ Returns: `dict | None`. The last values of one sensor. """
+        return self.poles.get(pole, {}).get('sensors', {}).get(sensor)
+
+    def json(self, pole: str = None, now: float = None) -> bytes | None:
+        """
+        The serialized `get()` of a pole, or of all poles as \
+            `{pole: {...}}` if `pole` is None. The JSON is reused until the \
+            pole changes or the online state flips.
+        - returns: `bytes | None`. None for an unknown pole.
+        """
+        now = now_s() if now is None else now
+        if pole is None:
+            # Built from the JSON of every pole, only the poles that have
+            # changed are serialized again
+            if self._all is None or not self._all[0] < now <= self._all[1]:
+                parts: list[bytes] = [
+                    json.dumps(p).encode() + b':' + self.json(p, now)
+                    for p in self.poles]
+                self._all = (
+                    max([self._json[p][0] for p in self.poles]
+                        or [float('-inf')]),
+                    min([self._json[p][1] for p in self.poles]
+                        or [float('inf')]),
+                    b'{' + b','.join(parts) + b'}')
+            return self._all[2]
+        entry: dict = self.poles.get(pole)
+        if entry is None:
+            return None
+        cached: tuple = self._json.get(pole)
+        if cached is None or not cached[0] < now <= cached[1]:
+            # The state is the same until the pole times out, and offline
+            # after that
+            until: float = self._until(entry)
+            after, before = (float('-inf'), until) if now <= until \
+                else (until, float('inf'))
+            cached = self._json[pole] = (after, before, json.dumps(
+                self.get(pole, now), separators=(',', ':')).encode())
+        return cached[2]
+
+    def stats(self, now: float = None) -> dict:
+        now = now_s() if now is None else now
+        online: int = sum(now <= self._until(e) for e in self.poles.values())
+        return {
+            'poles': len(self.poles),
+            'online': online,
+            'offline': len(self.poles) - online,
+            'updates': self.updates,
+        }
+
+    def snapshot(self, path: str = None) -> None:
+        """
+        Write the cache to `path` (or the `path` of the cache). The file \
+            is written to a temporary file first and then replaced.
+        """
+        path = path or self.path
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(self.poles, f, separators=(',', ':'))
+        os.replace(f'{path}.tmp', path)
+
+    def restore(self, path: str = None) -> None:
+        """ Load a snapshot, replaces the current content of the cache. """
+        with open(path or self.path, 'r') as f:
+            self.poles = json.load(f)
+        self._json = {}
+        self._all = None
@@ -0,0 +1,199 @@
+# Standard python libraries
+import asyncio
+from urllib.parse import urlsplit, parse_qs
+
+# Third party libraries
+# None
+
+# Local modules and variables
+from .cache import LastValue
+
+
+class Subscriber:
+    def __init__(self, topics: set[str]) -> None:
+        """
+        One connected client of `FanOut`.
+        Only the newest message per topic is kept until the client has \
+            received it: a burst of messages on one topic is coalesced \
+            into its last message when the client is slower than the burst.
+        - arguments:
+            - topics: `set[str]`. Subscribed topics, empty for all topics.
+        """
+        self.topics: set[str] = topics
+        self.pending: dict[str, str] = {}
+        self.ready: asyncio.Event = asyncio.Event()
+        self.delivered: int = 0
+        self.coalesced: int = 0
+
+    def wants(self, topic: str) -> bool:
+        return not self.topics or topic in self.topics
+
+    def push(self, topic: str, data: str) -> None:
+        if topic in self.pending:
+            self.coalesced += 1
+        self.pending[topic] = data
+        self.ready.set()
+
+    def take(self) -> dict[str, str]:
+        pending, self.pending = self.pending, {}
+        self.ready.clear()
+        return pending
+
+
+class FanOut:
+    def __init__(self, host: str = '0.0.0.0', port: int = 8080,
+                 path: str = '/events', retry: int = 3_000,
+                 cache: LastValue = None, status: str = '/status') -> None:
+        """
+        Pushes new messages to the browsers with Server-Sent Events.
+        A client subscribes with `GET /events?topic=<topic>` (the `topic` \
+            parameter can be repeated, without it all topics are sent). \
+            Every message is sent as an event named after its MQTT topic, \
+            with the decoded message of the ESP32 as data.
+        With a `cache`, `GET /status` answers the last values of all poles \
+            at once and `GET /status?pole=<pole>` of one pole, so a page \
+            shows the state of the fleet before the first event arrives.
+        - keyword arguments:
+            - host: `str`. Interface to listen on.
+            - port: `int`. Port to listen on.
+            - path: `str`. Path of the event stream.
+            - retry: `int`. Reconnect time of the browser in ms.
+            - cache: `LastValue`. Last-value cache served on `status`.
+            - status: `str`. Path of the last values.
+
+        #### Example::
+
+            fanout = FanOut(port=8080)
+            await fanout.start()
+            fanout.publish('lsc/pole-1', payload)  # For every MQTT message
+
+        In the browser::
+
+            const events = new EventSource('/events?topic=lsc/pole-1');
+            events.addEventListener('lsc/pole-1', e => show(e.data));
+        """
+        self.host: str = host
+        self.port: int = port
+        self.path: str = path
+        self.retry: int = retry
+        self.cache: LastValue = cache
+        self.status: str = status
+        self.subscribers: set[Subscriber] = set()
+        self.published: int = 0
+        self.server: asyncio.base_events.Server = None
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(
+            self._client, self.host, self.port)
+
+    async def close(self) -> None:
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def publish(self, topic: str, data: str | bytes) -> int:
+        """
+        Hand a message to all subscribers of `topic`, without waiting for \
+            any of them.
+        - returns: `int`. Amount of subscribers.
+        """
+        if isinstance(data, bytes):
+            data = data.decode()
+        self.published += 1
+        count: int = 0
+        for subscriber in self.subscribers:
+            if subscriber.wants(topic):
+                subscriber.push(topic, data)
+                count += 1
+        return count
+
+    def stats(self) -> dict:
+        return {
+            'subscribers': len(self.subscribers),
+            'published': self.published,
+            'delivered': sum(s.delivered for s in self.subscribers),
+            'coalesced': sum(s.coalesced for s in self.subscribers),
+        }
+
+    @staticmethod
+    def event(topic: str, data: str) -> bytes:
+        """ Format one message as a Server-Sent Event. """
+        lines: str = ''.join(f'data: {line}\n' for line in data.split('\n'))
+        return f'event: {topic}\n{lines}\n'.encode()
+
+    async def _status(self, writer: asyncio.StreamWriter,
+                      pole: list[str] = None) -> None:
+        """ Answer the last values of one or all poles from the cache. """
+        body: bytes = self.cache.json(pole[0] if pole else None)
+        if body is None:
+            writer.write(b'HTTP/1.1 404 Not Found\r\n'
+                         b'Content-Length: 0\r\n\r\n')
+        else:
+            writer.write(b'HTTP/1.1 200 OK\r\n'
+                         b'Content-Type: application/json\r\n'
+                         b'Cache-Control: no-cache\r\n'
+                         b'Access-Control-Allow-Origin: *\r\n'
+                         + f'Content-Length: {len(body)}\r\n\r\n'.encode()
+                         + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _client(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """ Handle one HTTP connection for its complete lifetime. """
+        try:
+            request: bytes = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError):
+            writer.close()
+            return
+        line: list[str] = request.split(b'\r\n', 1)[0].decode().split(' ')
+        url = urlsplit(line[1] if len(line) == 3 else '')
+        if line[0] == 'GET' and self.cache and url.path == self.status:
+            await self._status(writer, parse_qs(url.query).get('pole'))
+            return
+        if line[0] != 'GET' or url.path != self.path:
+            writer.write(b'HTTP/1.1 404 Not Found\r\n'
+                         b'Content-Length: 0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+            return
+        subscriber: Subscriber = Subscriber(
+            set(parse_qs(url.query).get('topic', [])))
+        self.subscribers.add(subscriber)
+        # The client does not send anything after the request, the read
+        # only returns when the connection has been closed.
+        closed: asyncio.Task = asyncio.ensure_future(reader.read())
+        try:
+            writer.write(b'HTTP/1.1 200 OK\r\n'
+                         b'Content-Type: text/event-stream\r\n'
+                         b'Cache-Control: no-cache\r\n'
+                         b'Access-Control-Allow-Origin: *\r\n\r\n'
+                         + f'retry: {self.retry}\n\n'.encode())
+            await writer.drain()
+            while True:
+                ready: asyncio.Task = asyncio.ensure_future(
+                    subscriber.ready.wait())
+                await asyncio.wait([ready, closed],
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if closed.done():
+                    ready.cancel()
+                    break
+                pending: dict[str, str] = subscriber.take()
+                # All pending topics are written at once, drain() waits
+                # while the client is slow. New messages keep coalescing
+                # in the meantime.
+                writer.write(b''.join(
+                    self.event(topic, data)
+                    for topic, data in pending.items()))
+                await writer.drain()
+                subscriber.delivered += len(pending)
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            closed.cancel()
+            writer.close()
@@ -0,0 +1,375 @@
+# Standard python libraries
+import asyncio
+import json
+import struct
+from time import gmtime, perf_counter
+from calendar import timegm
+from concurrent.futures import Executor
+
+# Third party libraries
+# None
+
+# Local modules and variables
+# None
+
+# Binary payload: magic, amount of rows, amount of sensors, the sensor
+# labels (2 bytes each) and per row the time in seconds since the epoch
+# followed by the temperature (°C) and pressure (hPa) of every sensor.
+MAGIC: bytes = b'LSC\x01'
+HEADER: struct.Struct = struct.Struct('<4sHB')
+# Chunk of a streaming capture (`ESP32/helpers/capture.py`): magic, sequence
+# number, amount of sensors, amount of samples and the dropped samples,
+# followed per sample by ticks_us and the 6 raw bytes of every sensor.
+CAPTURE: bytes = b'LSC\x02'
+CAPTURE_HEADER: struct.Struct = struct.Struct('<4sIBHI')
+# Backfill of lost measurements (`ESP32/helpers/history.py`): magic, amount
+# of rows, amount of sensors, flags and the sensor labels (2 bytes each),
+# followed per row by the sequence number, the time in seconds since
+# 2000-01-01 (the epoch of MicroPython) and the two values of every sensor.
+BACKFILL: bytes = b'LSC\x03'
+BACKFILL_HEADER: struct.Struct = struct.Struct('<4sHBB')
+BACKFILL_RAW: int = 0x01  # Flag: the values are rawT and rawP
+EPOCH: int = 946_684_800  # 2000-01-01 in seconds since 1970-01-01
+
+
+def pack(messages: list[dict]) -> bytes:
+    """
+    Pack 'Measurement' messages with the same sensors in the binary format.
+    """
+    labels: list[str] = list(messages[0]['measurements'])
+    row: struct.Struct = struct.Struct(f'<I{2 * len(labels)}f')
+    return b''.join([
+        HEADER.pack(MAGIC, len(messages), len(labels)),
+        ''.join(labels).encode(),
+    ] + [
+        row.pack(timegm((*m['time'][:6], 0, 0, 0)), *[
+            v for label in labels
+            for v in (m['measurements'][label]['Temperature'],
+                      m['measurements'][label]['Pressure'])
+        ]) for m in messages
+    ])
+
+
+def unpack(payload: bytes) -> list[dict]:
+    """ Unpack the binary format to 'Measurement' messages. """
+    magic, count, sensors = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError('Unknown binary payload')
+    offset: int = HEADER.size + 2 * sensors
+    labels: list[str] = [
+        payload[HEADER.size + 2 * i:HEADER.size + 2 * i + 2].decode()
+        for i in range(sensors)
+    ]
+    row: struct.Struct = struct.Struct(f'<I{2 * sensors}f')
+    if len(payload) != offset + count * row.size:
+        raise ValueError('Truncated binary payload')
+    return [
+        {
+            'message': 'Measurement',
+            'time': list(gmtime(values[0])[:6]),
+            'measurements': {
+                label: {'Temperature': values[1 + 2 * i],
+                        'Pressure': values[2 + 2 * i]}
+                for i, label in enumerate(labels)
+            },
+        } for values in row.iter_unpack(payload[offset:])
+    ]
+
+
+def unpack_capture(payload: bytes) -> list[dict]:
+    """
+    Unpack a capture chunk to a 'Capture' message. The raw values are \
+        listed per sensor index, in the order of the 'Calibration' \
+        message sent at the start of the capture. `time_us` is the \
+        ticks_us counter of the ESP32, it wraps around.
+    """
+    magic, sequence, sensors, count, dropped = \
+        CAPTURE_HEADER.unpack_from(payload)
+    if magic != CAPTURE:
+        raise ValueError('Unknown binary payload')
+    size: int = 4 + 6 * sensors
+    if len(payload) != CAPTURE_HEADER.size + count * size:
+        raise ValueError('Truncated binary payload')
+    raw20 = lambda b, i: b[i] << 12 | b[i + 1] << 4 | b[i + 2] >> 4
+    rows: list[bytes] = [
+        payload[CAPTURE_HEADER.size + n * size:
+                CAPTURE_HEADER.size + (n + 1) * size]
+        for n in range(count)
+    ]
+    return [{
+        'message': 'Capture',
+        'sequence': sequence,
+        'dropped': dropped,
+        'time_us': [struct.unpack_from('<I', row)[0] for row in rows],
+        'raw': {
+            f'{i}': {'rawT': [raw20(row, 7 + 6 * i) for row in rows],
+                     'rawP': [raw20(row, 4 + 6 * i) for row in rows]}
+            for i in range(sensors)
+        },
+    }]
+
+
+def unpack_backfill(payload: bytes) -> list[dict]:
+    """
+    Unpack a backfill message to 'Measurement' messages with their \
+        sequence number (`seq`) and `"backfill": true`. A pressure that \
+        was not measured (NaN) is left out.
+    """
+    magic, count, sensors, flags = BACKFILL_HEADER.unpack_from(payload)
+    if magic != BACKFILL:
+        raise ValueError('Unknown binary payload')
+    offset: int = BACKFILL_HEADER.size + 2 * sensors
+    labels: list[str] = [
+        payload[BACKFILL_HEADER.size + 2 * i:
+                BACKFILL_HEADER.size + 2 * i + 2].decode()
+        for i in range(sensors)
+    ]
+    row: struct.Struct = struct.Struct(f'<II{2 * sensors}f')
+    if len(payload) != offset + count * row.size:
+        raise ValueError('Truncated binary payload')
+    keys: tuple = ('rawT', 'rawP') if flags & BACKFILL_RAW \
+        else ('Temperature', 'Pressure')
+    return [
+        {
+            'message': 'Measurement',
+            'time': list(gmtime(values[1] + EPOCH)[:6]),
+            'measurements': {
+                label: {
+                    k: v for k, v in zip(keys, values[2 + 2 * i:4 + 2 * i])
+                    if v == v  # NaN
+                } for i, label in enumerate(labels)
+            },
+            'seq': values[0],
+            'backfill': True,
+        } for values in row.iter_unpack(payload[offset:])
+    ]
+
+
+def _integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate(message: dict) -> bool:
+    """
+    Check the layout of a decoded message of the ESP32: the time of a \
+        'Measurement' holds 6 integers, its values are numbers (no \
+        booleans) and the sequence number is an integer.
+    """
+    if not isinstance(message, dict) or \
+            not isinstance(message.get('message'), str):
+        return False
+    if message['message'] != 'Measurement':
+        return True
+    time: list = message.get('time')
+    measurements: dict = message.get('measurements')
+    seq = message.get('seq')
+    return (isinstance(time, list) and len(time) == 6
+            and all(_integer(t) for t in time)
+            and (seq is None or _integer(seq) and seq >= 0)
+            and isinstance(measurements, dict) and all(
+                isinstance(values, dict) and all(
+                    isinstance(v, (int, float)) and not isinstance(v, bool)
+                    for v in values.values())
+                for values in measurements.values()))
+
+
+def decode(items: list[tuple[str, bytes]]) -> tuple[list, int]:
+    """
+    Decode and validate a chunk of payloads. A payload is a JSON message \
+        (`jsonize()` of the ESP32), a JSON list of messages or the binary \
+        format (measurements, capture chunks or backfills). This function \
+        runs in the worker processes.
+    - returns: `tuple[list, int]`. Valid messages as `(topic, message)` \
+        and the amount of invalid payloads.
+    """
+    messages: list = []
+    invalid: int = 0
+    for topic, payload in items:
+        try:
+            if payload[:len(MAGIC)] == MAGIC:
+                decoded: list = unpack(payload)
+            elif payload[:len(CAPTURE)] == CAPTURE:
+                decoded = unpack_capture(payload)
+            elif payload[:len(BACKFILL)] == BACKFILL:
+                decoded = unpack_backfill(payload)
+            else:
+                decoded = json.loads(payload)
+                if not isinstance(decoded, list):
+                    decoded = [decoded]
+        except (ValueError, struct.error):
+            invalid += 1
+            continue
+        for message in decoded:
+            if validate(message):
+                messages.append((topic, message))
+            else:
+                invalid += 1
+    return messages, invalid
+
+
+class Ingest:
+    def __init__(self, sink, workers: int = 4, executor: Executor = None,
+                 queue_size: int = 10_000, chunk: int = 64,
+                 batch: int = 1_000, flush: float = 1.0) -> None:
+        """
+        Ingest pipeline for the messages of the ESP32 devices.
+
+            network -> queue -> decode workers -> batched writer -> sink
+
+        The network stage (e.g. the MQTT client) hands every payload to \
+            `put()`, which waits while the bounded queue is full. This \
+            backpressure is measured in `stats()`. The decode workers take \
+            up to `chunk` payloads at once from the queue and decode them \
+            in `executor`, or in the event loop if it is None. A single \
+            writer collects the decoded messages and calls `sink` with \
+            batches of up to `batch` messages, at least every `flush` \
+            seconds. The decoded messages wait in a queue of two batches: \
+            a slow sink blocks the workers, then the queue of payloads \
+            fills up and `put()` waits. A batch that `sink` fails to \
+            write is counted in `stats()` (`failed`) and not retried.
+        - arguments:
+            - sink: Callable(list) or coroutine function. Receives a list \
+                of `(topic, message)` tuples.
+        - keyword arguments:
+            - workers: `int`. Amount of decode workers.
+            - executor: `Executor`. Runs `decode()`, e.g. a \
+                `ProcessPoolExecutor(workers)` to decode in parallel.
+            - queue_size: `int`. Max. amount of payloads in the queue.
+            - chunk: `int`. Max. amount of payloads per decode call.
+            - batch: `int`. Max. amount of messages per `sink` call.
+            - flush: `float`. Max. time in seconds before a batch is \
+                written.
+
+        #### Example::
+
+            ingest = Ingest(lambda rows: [archive.append(t.split('/')[-1], m)
+                                          for t, m in rows])
+            await ingest.start()
+            await ingest.put(topic, payload)  # For every MQTT message
+            await ingest.stop()
+        """
+        self.sink = sink
+        self.workers: int = workers
+        self.executor: Executor = executor
+        self.chunk: int = chunk
+        self.batch: int = batch
+        self.flush: float = flush
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.decoded: asyncio.Queue = asyncio.Queue(
+            max(2, 2 * batch // chunk))
+        self.tasks: list[asyncio.Task] = []
+        # Counters
+        self.received: int = 0
+        self.dropped: int = 0
+        self.invalid: int = 0
+        self.written: int = 0
+        self.batches: int = 0
+        self.failed: int = 0  # Messages of the batches that sink refused
+        self.blocked: int = 0  # Amount of put() calls that had to wait
+        self.blocked_time: float = 0.0  # Total waiting time of put()
+        self.max_depth: int = 0
+
+    async def start(self) -> None:
+        self.tasks = [
+            asyncio.ensure_future(self._worker())
+            for _ in range(self.workers)
+        ] + [asyncio.ensure_future(self._writer())]
+
+    async def stop(self) -> None:
+        """ Process everything that is queued, then stop all stages. """
+        await self.queue.join()
+        await self.decoded.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def put(self, topic: str, payload: bytes) -> None:
+        """ Queue one payload, waits while the queue is full. """
+        self.received += 1
+        if self.queue.full():
+            self.blocked += 1
+            start: float = perf_counter()
+            await self.queue.put((topic, payload))
+            self.blocked_time += perf_counter() - start
+        else:
+            self.queue.put_nowait((topic, payload))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def put_nowait(self, topic: str, payload: bytes) -> bool:
+        """
+        Queue one payload for callers that can not wait, e.g. a callback \
+            of a MQTT client in another thread (with \
+            `loop.call_soon_threadsafe`).
+        - returns: `bool`. False if the payload has been dropped.
+        """
+        self.received += 1
+        try:
+            self.queue.put_nowait((topic, payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    async def _worker(self) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        while True:
+            items: list = [await self.queue.get()]
+            while len(items) < self.chunk and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+            try:
+                if self.executor:
+                    messages, invalid = await loop.run_in_executor(
+                        self.executor, decode, items)
+                else:
+                    messages, invalid = decode(items)
+                self.invalid += invalid
+                if messages:
+                    await self.decoded.put(messages)
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+    async def _writer(self) -> None:
+        while True:
+            rows: list = []
+            chunks: int = 0
+            deadline: float = perf_counter() + self.flush
+            while len(rows) < self.batch:
+                try:
+                    rows += await asyncio.wait_for(
+                        self.decoded.get(),
+                        max(deadline - perf_counter(), 0.0))
+                    chunks += 1
+                except asyncio.TimeoutError:
+                    break
+            if not rows:
+                continue
+            try:
+                result = self.sink(rows)
+                if asyncio.iscoroutine(result):
+                    await result
+                self.written += len(rows)
+                self.batches += 1
+            except Exception:  # The pipeline keeps running
+                self.failed += len(rows)
+            finally:
+                # Only now stop() may continue, the rows have been handled
+                for _ in range(chunks):
+                    self.decoded.task_done()
+
+    def stats(self) -> dict:
+        """ Counters and backpressure of the pipeline. """
+        return {
+            'received': self.received,
+            'written': self.written,
+            'invalid': self.invalid,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+            'depth': self.queue.qsize(),
+            'max_depth': self.max_depth,
+            'blocked': self.blocked,
+            'blocked_time': self.blocked_time,
+        }
@@ -0,0 +1,99 @@
+# Standard python libraries
+import asyncio
+
+# Third party libraries
+# None
+
+# Local modules and variables
+# None
+
+
+class Scraper:
+    def __init__(self, boards: dict[str, tuple[str, int]],
+                 timeout: float = 2.0, concurrency: int = 64) -> None:
+        """
+        Polls the metrics endpoint of many ESP32 devices at the same time \
+            (`ESP32.METRICS` in `setup.json`).
+        One request is a single short HTTP/1.0 exchange, the devices answer \
+            from cached values only. A device that does not answer within \
+            `timeout` is reported as `None` and does not delay the others.
+        - arguments:
+            - boards: `dict[str, tuple[str, int]]`. Name of every device \
+                with its host and port.
+        - keyword arguments:
+            - timeout: `float`. Time in seconds per device.
+            - concurrency: `int`. Max. amount of open connections.
+
+        #### Example::
+
+            scraper = Scraper({'pole-1': ('192.168.1.20', 9100)})
+            metrics = scraper.run()  # {'pole-1': {'uptime_seconds': ...}}
+        """
+        self.boards: dict[str, tuple[str, int]] = boards
+        self.timeout: float = timeout
+        self.concurrency: int = concurrency
+
+    @staticmethod
+    def parse(text: str) -> dict:
+        """
+        Parse the Prometheus text format.
+        - returns: `dict`. Metrics without labels as `{name: value}`, \
+            metrics with labels as `{name: {labels: value}}` where `labels` \
+            is a tuple of `(key, value)` pairs.
+        """
+        metrics: dict = {}
+        for line in text.splitlines():
+            if not line or line.startswith('#'):
+                continue
+            name, value = line.rsplit(' ', 1)
+            if '{' in name:
+                name, labels = name[:-1].split('{', 1)
+                key: tuple = tuple(
+                    (k, v.strip('"')) for k, v in
+                    (pair.split('=', 1) for pair in labels.split(','))
+                )
+                metrics.setdefault(name, {})[key] = float(value)
+            else:
+                metrics[name] = float(value)
+        return metrics
+
+    async def scrape(self, host: str, port: int) -> dict | None:
+        """
+        Request the metrics of one device.
+        - returns: `dict | None`. Parsed metrics, None if the device can \
+            not be reached or does not answer with status 200.
+        """
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        try:
+            writer.write(b'GET /metrics HTTP/1.0\r\n\r\n')
+            await writer.drain()
+            response: bytes = await asyncio.wait_for(
+                reader.read(), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        finally:
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        if b' 200 ' not in head.split(b'\r\n', 1)[0]:
+            return None
+        return self.parse(body.decode())
+
+    async def poll(self) -> dict[str, dict | None]:
+        """ Scrape all devices, returns `{name: metrics}`. """
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(host: str, port: int) -> dict | None:
+            async with semaphore:
+                return await self.scrape(host, port)
+
+        results: list = await asyncio.gather(*[
+            limited(host, port) for host, port in self.boards.values()])
+        return dict(zip(self.boards, results))
+
+    def run(self) -> dict[str, dict | None]:
+        """ Blocking version of `poll()`. """
+        return asyncio.run(self.poll())
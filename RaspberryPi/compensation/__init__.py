@@ -0,0 +1 @@
+from .bmp280 import Compensation
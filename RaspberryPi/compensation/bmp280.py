@@ -0,0 +1,103 @@
+# Standard python libraries
+# None
+
+# Third party libraries
+import numpy as np
+
+# Local modules and variables
+# None
+
+
+class Compensation:
+    def __init__(self, tC: list[int], pC: list[int],
+                 dtype: type = np.float64) -> None:
+        """
+        Vectorized BMP280 compensation for the raw values sent by an ESP32 \
+            in raw mode (`BMP280.RAW` in `setup.json`).
+        The formulae and their order of operations are the same as in \
+            `ESP32/sensor/formulae.py`. The ESP32 computes with single \
+            precision floats: with `dtype=np.float32` every operation is \
+            rounded the same way and the results are identical to the \
+            device. The default double precision differs from the device \
+            by less than 0.001 °C and 0.1 Pa in the measuring range.
+        - arguments:
+            - tC: `list[int]`. Temperature compensation values (T1 to T3).
+            - pC: `list[int]`. Pressure compensation values (P1 to P9).
+        - keyword arguments:
+            - dtype: `type`. `np.float64` or `np.float32` (as the device).
+
+        #### Example::
+
+            comp = Compensation.from_message(calibration, 'A1')
+            temperature, pressure = comp.compensate(rawT, rawP)
+        """
+        assert len(tC) == 3 and len(pC) == 9
+        self.dtype: type = dtype
+        self.tC: list[float] = [dtype(c) for c in tC]
+        self.pC: list[float] = [dtype(c) for c in pC]
+
+    @classmethod
+    def from_message(cls, message: dict, sensor: str,
+                     dtype: type = np.float64) -> 'Compensation':
+        """
+        Create the object from a decoded 'Calibration' message.
+        - arguments:
+            - message: `dict`. The decoded JSON message of the device.
+            - sensor: `str`. Name of the sensor (`A1`, `A2`, `B1`, `B2`).
+        """
+        values: dict = message['calibration'][sensor]
+        return cls(values['tC'], values['pC'], dtype)
+
+    def fine(self, rawT: np.ndarray) -> np.ndarray:
+        """ Fine temperature, used by the temperature and pressure. """
+        rawT: np.ndarray = np.asarray(rawT, dtype=self.dtype)
+        t: np.ndarray = rawT / 2.0**17.0 - self.tC[0] / 2.0**13.0
+        return (
+            (rawT / 2.0**14.0 - self.tC[0] / 2.0**10.0) * self.tC[1]
+            + (t * t) * self.tC[2]
+        )
+
+    def temperature(self, rawT: np.ndarray,
+                    fineT: np.ndarray = None) -> np.ndarray:
+        """ Temperature in °C. """
+        if fineT is None:
+            fineT: np.ndarray = self.fine(rawT)
+        return fineT / ((2.0**9.0) * 10.0)
+
+    def pressure(self, rawT: np.ndarray, rawP: np.ndarray,
+                 fineT: np.ndarray = None) -> np.ndarray:
+        """
+        Pressure in Pa. Divide by `100` to get hPa.
+        The pressure is `0.0` where the device would divide by zero.
+        """
+        if fineT is None:
+            fineT: np.ndarray = self.fine(rawT)
+        rawP: np.ndarray = np.asarray(rawP, dtype=self.dtype)
+        t: np.ndarray = fineT / 2.0 - 64e3
+        var1: np.ndarray = ((1.0 + (self.pC[2] * (t * t) / 2.0**19.0
+                             + self.pC[1] * t) / 2.0**19.0 / 2.0**15.0)
+                            * self.pC[0])
+        var2: np.ndarray = ((((t * t) * self.pC[5] / 2.0**15.0)
+                             + t * self.pC[4] * 2.0) / 4.0
+                            + (self.pC[3] * 2.0**16.0))
+
+        valid: np.ndarray = var1 != 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p: np.ndarray = (((2.0**20.0 - rawP) - (var2 / 2.0**12.0))
+                             * (5.0**4.0) * 10.0 / var1)
+            p += (((self.pC[8] * (p * p) / 2.0**31.0)
+                   + (p * self.pC[7] / 2.0**15.0) + self.pC[6]) / 2.0**4.0)
+        return np.where(valid, p, self.dtype(0.0))
+
+    def compensate(self, rawT: np.ndarray,
+                   rawP: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compensate a batch of raw values at once.
+        - returns: `tuple[np.ndarray, np.ndarray]`. Temperature in °C \
+            and pressure in Pa.
+        """
+        fineT: np.ndarray = self.fine(rawT)
+        return (
+            self.temperature(rawT, fineT=fineT),
+            self.pressure(rawT, rawP, fineT=fineT),
+        )
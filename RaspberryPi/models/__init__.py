@@ -0,0 +1 @@
+from .acquisition import AcquisitionModel
@@ -0,0 +1,153 @@
+# Standard python libraries
+from math import sqrt
+
+# Third party libraries
+# None
+
+# Local modules and variables
+# None
+
+
+class AcquisitionModel:
+    # Typical RMS noise of the BMP280 datasheet [CHAPTER 3.8, TABLE 8 &
+    # TABLE 9]. Pressure in Pa per oversampling index 1 to 5 (x1 to x16)
+    # and IIR filter index 0 to 4 (off to coefficient 16), temperature in
+    # °C per oversampling index (without filter).
+    PRESSURE_NOISE: tuple = (
+        (6.6, 3.8, 2.5, 1.7, 1.2),  # x1
+        (5.0, 2.9, 1.9, 1.2, 0.9),  # x2
+        (3.8, 2.2, 1.4, 1.0, 0.7),  # x4
+        (2.6, 1.5, 1.0, 0.6, 0.4),  # x8
+        (1.3, 0.8, 0.5, 0.4, 0.2),  # x16
+    )
+    TEMPERATURE_NOISE: tuple = (0.005, 0.004, 0.003, 0.003, 0.002)
+    # Standby times in ms per standby index [CHAPTER 3.6.3]
+    STANDBY: tuple = (0.5, 62.5, 125.0, 250.0, 500.0, 1_000.0, 2_000.0,
+                      4_000.0)
+
+    def __init__(self, bus_freq: int = 100_000, sensors: int = 4) -> None:
+        """
+        Noise and bus time model of the BMP280 acquisition profiles.
+
+        The noise of one read is the typical RMS noise of the datasheet \
+            tables: per pressure oversampling and IIR filter setting, and \
+            per temperature oversampling. The IIR filter with coefficient \
+            `c` is a first order low pass (`alpha = 1 / c`), its output \
+            variance is `alpha / (2 - alpha)` times the variance of the \
+            input (applied to the temperature, the pressure table already \
+            holds it) and consecutive outputs are correlated with \
+            `(1 - alpha)^k`, which limits the gain of averaging them.
+        - keyword arguments:
+            - bus_freq: `int`. I2C bus frequency in Hz.
+            - sensors: `int`. Amount of sensors read by the ESP32.
+        """
+        self.bus_freq: int = bus_freq
+        self.sensors: int = sensors
+
+    @staticmethod
+    def read_bits(size: int) -> int:
+        """
+        Bits on the bus for one burst read of `size` bytes: start, address \
+            + W, register, repeated start, address + R, the bytes and stop. \
+            Every byte is followed by an (N)ACK bit.
+        """
+        return 1 + 9 + 9 + 1 + 9 + 9 * size + 1
+
+    @staticmethod
+    def measurement_time(pressure: int, temperature: int) -> float:
+        """ Returns: `float`. Max. conversion time in ms [CHAPTER 3.8.1]. """
+        factor = lambda os: 1 << (os - 1) if os else 0
+        # The 0.575 ms of the pressure channel only applies if it is measured
+        return (1.25 + 2.3 * factor(temperature)
+                + (2.3 * factor(pressure) + 0.575 if pressure else 0.0))
+
+    @staticmethod
+    def filter_factor(iir: int) -> float:
+        """
+        Noise variance of one filter output, relative to the variance of \
+            one conversion.
+        """
+        alpha: float = 1.0 / (1 << iir) if iir else 1.0
+        return alpha / (2.0 - alpha)
+
+    @staticmethod
+    def average_factor(iir: int, samples: int, spacing: float) -> float:
+        """
+        Noise variance of the mean of `samples` filter outputs, relative to \
+            the variance of one filter output.
+        - arguments:
+            - iir: `int`. IIR filter index (0: off, 4: coefficient 16).
+            - samples: `int`. Amount of averaged samples.
+            - spacing: `float`. Conversions between two samples (>= 1).
+        """
+        alpha: float = 1.0 / (1 << iir) if iir else 1.0
+        r: float = (1.0 - alpha) ** spacing
+        correlation: float = samples + 2.0 * sum(
+            (samples - d) * r ** d for d in range(1, samples))
+        return correlation / samples**2
+
+    def noise(self, pressure: int, temperature: int, iir: int,
+              samples: int = 1, spacing: float = 1.0) -> tuple[float, float]:
+        """
+        Returns: `tuple[float, float]`. RMS noise of the reported pressure \
+            in Pa and temperature in °C.
+        """
+        average: float = self.average_factor(iir, samples, spacing)
+        return (
+            self.PRESSURE_NOISE[pressure - 1][iir] * sqrt(average),
+            self.TEMPERATURE_NOISE[temperature - 1]
+            * sqrt(self.filter_factor(iir) * average),
+        )
+
+    def bus_time(self, samples: int) -> float:
+        """ Returns: `float`. Time in ms on the bus per interval. """
+        return (samples * self.sensors * self.read_bits(6)
+                / self.bus_freq * 1_000)
+
+    def software(self, pressure: int = 4, temperature: int = 2,
+                 iir: int = 3, samples: int = 30,
+                 timer: int = 25) -> dict:
+        """
+        The current profile: `samples` reads per sensor, one read every \
+            `timer` ms, with a standby time of 0.5 ms.
+        """
+        period: float = self.measurement_time(pressure, temperature) + \
+            self.STANDBY[0]
+        p, t = self.noise(pressure, temperature, iir, samples,
+                          spacing=max(1.0, timer / period))
+        return {
+            'pressure_noise': p,
+            'temperature_noise': t,
+            'bus_time': self.bus_time(samples),
+            'acquisition_time': samples * max(timer, period),
+        }
+
+    def channels(self, every: int, pressure: int = 4, temperature: int = 2,
+                 samples: int = 30) -> dict:
+        """
+        Per-channel rates of the 'software' profile \
+            (`BMP280.PRESSURE_EVERY`): the pressure is measured every \
+            `every` intervals, in between the pressure oversampling is set \
+            to skip and only the 3 temperature bytes are read.
+        - returns: `dict`. Mean conversion time in ms and bus time in ms \
+            per interval.
+        """
+        both: float = self.measurement_time(pressure, temperature)
+        only: float = self.measurement_time(0, temperature)
+        return {
+            'conversion_time': (both + (every - 1) * only) / every,
+            'bus_time': (samples * self.sensors / self.bus_freq * 1_000
+                         * (self.read_bits(6) + (every - 1)
+                            * self.read_bits(3)) / every),
+        }
+
+    def hardware(self, pressure: int = 5, temperature: int = 2,
+                 iir: int = 4) -> dict:
+        """ The 'hardware averaging' profile: one filtered read. """
+        p, t = self.noise(pressure, temperature, iir)
+        return {
+            'pressure_noise': p,
+            'temperature_noise': t,
+            'bus_time': self.bus_time(1),
+            'acquisition_time': self.bus_time(1),
+        }
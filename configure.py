@@ -0,0 +1,292 @@
+"""
+Compile the `setup.json` of a device to a validated Python module.
+
+The firmware imports the compiled module (`config.py`) instead of parsing
+`setup.json` at boot. MicroPython still compiles the `.py` source to
+bytecode in RAM at the import, so the module does not save memory or time
+over the JSON parser: what it saves is the validation. The settings are
+validated on the host, including the rules between the fields, so a
+mistake is reported here instead of as an `assert` or a reboot loop on the
+pole.
+The indices of `BMP280.SETUP` are resolved to the register values of
+`SETTINGS` (`ESP32/sensor/settings.py`) in `REGISTERS`.
+
+Usage::
+
+    python configure.py [ESP32/setup.json] [-o ESP32/config.py] [--check]
+
+`provision.py` compiles the `config.py` of every device of the fleet. A
+patch that is persisted at runtime (see `CONTROL_TOPIC`) removes the
+`config.py` of the device, it reads `setup.json` again at the next boot.
+"""
+# Standard python libraries
+import argparse
+import importlib.util
+import json
+import os
+import sys
+
+# Third party libraries
+# None
+
+# Local modules and variables
+ROOT: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ESP32')
+SECTIONS: dict[str, str] = {  # Name in setup.json: name in the module
+    'ESP32': 'ESP32', 'I2C': 'I2C', 'BMP280': 'SENSOR',
+    'WIRELESS': 'WIRELESS', 'NTP': 'NTP', 'MQTT': 'MQTT',
+}
+FREQUENCIES: tuple = (80_000_000, 160_000_000, 240_000_000)
+
+# Layout of setup.json. A leaf is one of:
+#   (minimum, maximum)         integer in the range
+#   (minimum, maximum, float)  number in the range
+#   bool, str                  value of this type
+#   None                       string or null (file paths)
+#   set                        one of the values
+#   [spec]                     list of values of `spec`
+BUS: dict = {'ACTIVE': bool, 'SDA': (0, 39), 'SCL': (0, 39),
+             'FREQ': (1_000, 1_000_000)}
+SCHEMA: dict = {
+    'ESP32': {
+        'FREQ': set(FREQUENCIES),
+        'DEBUG': bool,
+        'FAST_BOOT': bool,
+        'GOVERNOR': {'ACTIVE': bool, 'HIGH': set(FREQUENCIES),
+                     'LOW': set(FREQUENCIES)},
+        'METRICS': {'ACTIVE': bool, 'PORT': (1, 65_535)},
+        'GC': {'THRESHOLD': (1, 100), 'IDLE': (1, 100)},
+    },
+    'I2C': {'BUS_A': BUS, 'BUS_B': BUS},
+    'BMP280': {
+        'TIMER': (10, 1_000),
+        'SAMPLES': (1, 50),
+        'PERIOD': (1, 1_000),  # Or null
+        'RAW': bool,
+        'PROFILE': {'SOFTWARE', 'HARDWARE'},
+        'CALIBRATE': bool,
+        'PRESSURE_EVERY': (1, 1_000),
+        'HISTORY': (0, 1_000),
+        'CAPTURE': {'CHUNK': (0, 1_000), 'DURATION': (0, 3_600)},
+        'SETUP': {
+            'POWER': (0, 2),
+            'IIR': (0, 4),
+            'STANDBY': (0, 7),
+            'SPI': bool,
+            'OS': {'TEMP': (0, 5), 'PRES': (0, 5)},
+        },
+    },
+    'WIRELESS': {
+        'SSID': str,
+        'PASSWORD': str,
+        'NETWORKS': [{'SSID': str, 'PASSWORD': str}],
+        'TIMEOUT': (1, 60),
+        'RESCAN': (1, 100),
+    },
+    'NTP': {'USE_NTP': bool, 'ADDRESS': str, 'COMPUTE_CET': bool},
+    'MQTT': {
+        'TOPIC': str,
+        'CONTROL_TOPIC': str,
+        'CLIENT_ID': str,
+        'SERVER': str,
+        'PORT': (1, 65_535),
+        'USER': str,
+        'PASSWORD': str,
+        'RETAIN': bool,
+        'KEEPALIVE': (1, 65_535),
+        'SEND_KEEPALIVE': (1, 3_600),
+        'SEND_MEASUREMENT': (1, 86_400),
+        'QOS': (0, 1),
+        'INFLIGHT_MAX': (1, 64),
+        'QUEUE_BYTES_MAX': (0, 65_536),
+        'ALIGN': {'ACTIVE': bool, 'JITTER': (0, 3_600)},
+        'EVENTS': {
+            'ACTIVE': bool,
+            'FAST': (1, 3_600),
+            'WINDOW': (2, 100),
+            'SLOPE': (0, 100, float),
+            'LIMIT': (-40, 85, float),
+            'HOLD': (0, 86_400),
+        },
+        'SSL': {'USE_SSL': bool, 'KEY': None, 'CERT': None,
+                'SERVER_HOSTNAME': str},
+        'RECONNECT': {'ATTEMPTS': (0, 100), 'DELAY': (0, 60_000)},
+        'SOCKET_TIMEOUT': (1, 60),
+        'MESSAGE_TIMEOUT': (1, 600),
+    },
+}
+# Nullable integers
+NULLABLE: set[str] = {'BMP280.PERIOD'}
+
+# Rules between the fields: (message, check)
+RULES: list = [
+    ("At least one I2C bus must be ACTIVE",
+     lambda c: c['I2C']['BUS_A']['ACTIVE'] or c['I2C']['BUS_B']['ACTIVE']),
+    ("MQTT.SEND_MEASUREMENT must be a multiple of MQTT.SEND_KEEPALIVE",
+     lambda c: c['MQTT']['SEND_MEASUREMENT']
+     % c['MQTT']['SEND_KEEPALIVE'] == 0),
+    ("MQTT.SEND_KEEPALIVE must be smaller than MQTT.KEEPALIVE",
+     lambda c: c['MQTT']['SEND_KEEPALIVE'] < c['MQTT']['KEEPALIVE']),
+    ("MQTT.ALIGN needs NTP.USE_NTP",
+     lambda c: not c['MQTT']['ALIGN']['ACTIVE'] or c['NTP']['USE_NTP']),
+    ("MQTT.ALIGN.JITTER must be smaller than MQTT.SEND_MEASUREMENT",
+     lambda c: not c['MQTT']['ALIGN']['ACTIVE']
+     or c['MQTT']['ALIGN']['JITTER'] < c['MQTT']['SEND_MEASUREMENT']),
+    ("MQTT.EVENTS needs the temperature, BMP280.RAW must be false",
+     lambda c: not c['MQTT']['EVENTS']['ACTIVE'] or not c['BMP280']['RAW']),
+    ("MQTT.EVENTS.FAST must be smaller than MQTT.SEND_MEASUREMENT",
+     lambda c: not c['MQTT']['EVENTS']['ACTIVE']
+     or c['MQTT']['EVENTS']['FAST'] < c['MQTT']['SEND_MEASUREMENT']),
+    ("WIRELESS.SSID or a SSID of WIRELESS.NETWORKS must be set",
+     lambda c: c['WIRELESS']['SSID']
+     or any(n['SSID'] for n in c['WIRELESS']['NETWORKS'])),
+    ("MQTT.CLIENT_ID, MQTT.SERVER and MQTT.TOPIC must be set",
+     lambda c: all(c['MQTT'][k] for k in ['CLIENT_ID', 'SERVER', 'TOPIC'])),
+    ("ESP32.GOVERNOR.LOW must not be higher than ESP32.GOVERNOR.HIGH",
+     lambda c: c['ESP32']['GOVERNOR']['LOW']
+     <= c['ESP32']['GOVERNOR']['HIGH']),
+    ("ESP32.GC.IDLE must be smaller than ESP32.GC.THRESHOLD",
+     lambda c: c['ESP32']['GC']['IDLE'] < c['ESP32']['GC']['THRESHOLD']),
+    ("BMP280.SETUP.OS.TEMP must not be 0 (skip), the temperature is always "
+     "measured",
+     lambda c: c['BMP280']['SETUP']['OS']['TEMP'] > 0),
+]
+
+
+def _check(value, spec, key: str) -> list[str]:
+    """ Errors of one value against its schema. """
+    if isinstance(spec, dict):
+        if not isinstance(value, dict):
+            return [f"{key} must be an object"]
+        errors: list[str] = [f"{key}.{k} is unknown"
+                             for k in value if k not in spec]
+        for k, s in spec.items():
+            if k not in value:
+                errors.append(f"{key}.{k} is missing")
+            else:
+                errors += _check(value[k], s, f"{key}.{k}")
+        return errors
+    if isinstance(spec, list):
+        if not isinstance(value, list):
+            return [f"{key} must be a list"]
+        errors: list[str] = []
+        for i, v in enumerate(value):
+            errors += _check(v, spec[0], f"{key}[{i}]")
+        return errors
+    if spec is bool or spec is str:
+        ok: bool = isinstance(value, spec)
+        return [] if ok else [f"{key} must be a {spec.__name__}"]
+    if spec is None:
+        ok = value is None or isinstance(value, str)
+        return [] if ok else [f"{key} must be a path or null"]
+    if isinstance(spec, set):
+        return [] if value in spec and not isinstance(value, bool) else [
+            f"{key} must be one of {sorted(spec)}"]
+    if value is None and key in NULLABLE:
+        return []
+    types: tuple = (int, float) if len(spec) > 2 else (int,)
+    if not isinstance(value, types) or isinstance(value, bool) or \
+            not spec[0] <= value <= spec[1]:
+        kind: str = 'a number' if len(spec) > 2 else 'an integer'
+        return [f"{key} must be {kind} in [{spec[0]}, {spec[1]}]"]
+    return []
+
+
+def validate(setup: dict) -> list[str]:
+    """
+    Validate the settings of a device.
+    - returns: `list[str]`. The errors, empty if the settings are valid. \
+        The rules between the fields are only checked if the layout is \
+        valid.
+    """
+    if not isinstance(setup, dict):
+        return ["setup must be an object"]
+    errors: list[str] = [f"{k} is unknown" for k in setup if k not in SCHEMA]
+    for section, spec in SCHEMA.items():
+        if section not in setup:
+            errors.append(f"{section} is missing")
+        else:
+            errors += _check(setup[section], spec, section)
+    if errors:
+        return errors
+    return [message for message, rule in RULES if not rule(setup)]
+
+
+def settings() -> type:
+    """
+    Returns: `type`. The `SETTINGS` class of the firmware. The module is \
+        loaded from its file, the `sensor` package needs MicroPython.
+    """
+    spec = importlib.util.spec_from_file_location(
+        'settings', os.path.join(ROOT, 'sensor', 'settings.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SETTINGS
+
+
+def resolve(setup: dict) -> dict | None:
+    """
+    Resolve the indices of `BMP280.SETUP` to the register values.
+    - returns: `dict | None`. The values for `Settings.bmp280_setup()`. \
+        None for the 'HARDWARE' profile, its settings are computed on the \
+        device from `SEND_MEASUREMENT`.
+    """
+    if setup['BMP280']['PROFILE'] == 'HARDWARE':
+        return None
+    S, SETUP = settings()(), setup['BMP280']['SETUP']
+    return {
+        'POWER': S.powerMode(SETUP['POWER']),
+        'IIR': S.iirMode(SETUP['IIR']),
+        'STANDBY': S.standbyTime(SETUP['STANDBY']),
+        'OS': S.osMode(SETUP['OS']['PRES'], SETUP['OS']['TEMP']),
+    }
+
+
+def emit(setup: dict, source: str = 'setup.json') -> str:
+    """
+    Validate and compile the settings to the source of `config.py`.
+    Raises `ValueError` with all errors if the settings are invalid.
+    """
+    errors: list[str] = validate(setup)
+    if errors:
+        raise ValueError('; '.join(errors))
+    lines: list[str] = [
+        f'# Compiled from {source} by configure.py, do not edit.',
+        '# The settings have been validated on the host.',
+    ]
+    lines += [f'{name} = {setup[section]!r}'
+              for section, name in SECTIONS.items()]
+    lines.append(f'REGISTERS = {resolve(setup)!r}')
+    return '\n'.join(lines) + '\n'
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Compile setup.json to a validated config.py.')
+    parser.add_argument('setup', nargs='?',
+                        default=os.path.join(ROOT, 'setup.json'),
+                        help='Settings of the device (JSON)')
+    parser.add_argument('-o', '--output',
+                        default=os.path.join(ROOT, 'config.py'),
+                        help='Compiled module')
+    parser.add_argument('--check', action='store_true',
+                        help='Only validate, do not write the module')
+    args = parser.parse_args(argv)
+
+    with open(args.setup, 'r') as f:
+        setup: dict = json.load(f)
+    errors: list[str] = validate(setup)
+    for error in errors:
+        print(f'{args.setup}: {error}')
+    if errors:
+        return 1
+    if not args.check:
+        with open(args.output, 'w') as f:
+            f.write(emit(setup, os.path.basename(args.setup)))
+        print(f'{args.setup}: compiled to {args.output}')
+    else:
+        print(f'{args.setup}: valid')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Cross-platform provisioning of the ESP32 devices of the fleet.
+
+Every device keeps a manifest (`/manifest.json`) with the SHA-256 hash of
+every file that has been uploaded. Only the files whose hash differs from
+the manifest are uploaded, so updating a device after a small change takes
+a few seconds instead of a full upload. The `setup.json` of every device is
+rendered from `ESP32/setup.json` and the fleet inventory, and compiled to a
+validated `config.py` (see `configure.py`). A device with invalid settings
+is not provisioned. All devices are provisioned in parallel. A patch that
+is persisted on a device removes `setup.json` and `config.py` from its
+manifest, so they are uploaded again.
+
+Usage::
+
+    python provision.py fleet.json [--only pole-1 pole-2] [--force] [--dry-run]
+
+Inventory (`fleet.json`), the values of a device are merged into the
+defaults and `{name}` is replaced by the name of the device::
+
+    {
+        "defaults": {"WIRELESS": {"SSID": "...", "PASSWORD": "..."},
+                     "MQTT": {"CLIENT_ID": "{name}", "TOPIC": "lsc/{name}"}},
+        "devices": [
+            {"name": "pole-1", "port": "/dev/ttyUSB0"},
+            {"name": "pole-2", "port": "COM4", "setup": {"I2C": {...}}}
+        ]
+    }
+
+A new device has to be flashed first (see `install.bat --flash`).
+"""
+# Standard python libraries
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Third party libraries
+# None (adafruit-ampy is imported by AmpyBackend)
+
+# Local modules and variables
+from configure import emit
+ROOT: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ESP32')
+FOLDERS: list[str] = ['', 'sensor', 'mqtt', 'wireless', 'helpers']
+MANIFEST: str = 'manifest.json'
+
+
+class AmpyBackend:
+    def __init__(self, port: str, baud: int = 115200) -> None:
+        """
+        File system of a device on a serial port, with adafruit-ampy.
+        ampy is only imported here, the rest of this tool (and the \
+            `FakeBackend`) works without it.
+        - arguments:
+            - port: `str`. Serial port, e.g. `COM4` or `/dev/ttyUSB0`.
+        - keyword arguments:
+            - baud: `int`. Baud rate of the serial port.
+        """
+        from ampy.pyboard import Pyboard
+        from ampy.files import Files
+        self.board: Pyboard = Pyboard(port, baudrate=baud)
+        self.files: Files = Files(self.board)
+
+    def read(self, path: str) -> bytes | None:
+        """ Returns: `bytes | None`. None if the file does not exist. """
+        try:
+            return self.files.get(path)
+        except RuntimeError:  # No such file
+            return None
+
+    def write(self, path: str, data: bytes) -> None:
+        self.files.put(path, data)
+
+    def mkdir(self, path: str) -> None:
+        self.files.mkdir(path, exists_okay=True)
+
+    def close(self) -> None:
+        self.board.close()
+
+
+class FakeBackend:
+    def __init__(self, files: dict[str, bytes] = None) -> None:
+        """
+        In-memory file system with the interface of `AmpyBackend`, to try \
+            the provisioning without a device. Every write is recorded.
+
+        #### Example::
+
+            device = FakeBackend()
+            provision(device, files)
+            device.writes  # ['main.py', ..., 'manifest.json']
+            provision(device, files)  # Uploads nothing
+        """
+        self.files: dict[str, bytes] = dict(files or {})
+        self.folders: set[str] = set()
+        self.writes: list[str] = []
+
+    def read(self, path: str) -> bytes | None:
+        return self.files.get(path)
+
+    def write(self, path: str, data: bytes) -> None:
+        self.files[path] = bytes(data)
+        self.writes.append(path)
+
+    def mkdir(self, path: str) -> None:
+        self.folders.add(path)
+
+    def close(self) -> None:
+        pass
+
+
+def merge(base: dict, patch: dict) -> dict:
+    """ Returns: `dict`. A copy of `base` with `patch` merged into it. """
+    merged: dict = copy.deepcopy(base)
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def render(value, device: dict):
+    """
+    Replace the `{name}` (etc.) placeholders with the device fields. Other \
+        braces (e.g. in a password) are kept as they are.
+    """
+    if isinstance(value, dict):
+        return {k: render(v, device) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render(v, device) for v in value]
+    if isinstance(value, str):
+        for k, v in device.items():
+            if isinstance(v, str):
+                value = value.replace('{' + k + '}', v)
+    return value
+
+
+def local_files(root: str = ROOT) -> dict[str, bytes]:
+    """
+    Returns: `dict[str, bytes]`. The files that are uploaded (the same as \
+        `install.bat`), with the path on the device as key.
+    """
+    files: dict[str, bytes] = {}
+    for folder in FOLDERS:
+        for name in sorted(os.listdir(os.path.join(root, folder))):
+            path: str = os.path.join(root, folder, name)
+            if not os.path.isfile(path) or not (
+                    name.endswith('.py')
+                    or (not folder and name.endswith('.json'))):
+                continue
+            with open(path, 'rb') as f:
+                files[f'{folder}/{name}' if folder else name] = f.read()
+    return files
+
+
+def device_files(files: dict[str, bytes], inventory: dict,
+                 device: dict) -> dict[str, bytes]:
+    """
+    The files of one device, with its own `setup.json` and `config.py`. \
+        Raises `ValueError` if the settings of the device are invalid.
+    """
+    setup: dict = merge(json.loads(files['setup.json']),
+                        inventory.get('defaults', {}))
+    setup = render(merge(setup, device.get('setup', {})), device)
+    return {**files, 'setup.json': json.dumps(setup, indent=4).encode(),
+            'config.py': emit(setup).encode()}
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def provision(backend, files: dict[str, bytes], force: bool = False,
+              dry_run: bool = False) -> list[str]:
+    """
+    Upload the files that differ from the manifest on the device.
+    The manifest is written last: when the upload is interrupted, the \
+        files that were not uploaded are still different next time.
+    - arguments:
+        - backend: `AmpyBackend | FakeBackend`. File system of the device.
+        - files: `dict[str, bytes]`. Files with their path on the device.
+    - keyword arguments:
+        - force: `bool`. Ignore the manifest and upload all files.
+        - dry_run: `bool`. Only compare, do not upload.
+    - returns: `list[str]`. Paths of the changed files.
+    """
+    manifest: dict = {}
+    if not force:
+        try:
+            manifest = json.loads(backend.read(MANIFEST) or b'{}')
+        except ValueError:  # A damaged manifest uploads everything
+            manifest = {}
+    hashes: dict[str, str] = {p: digest(d) for p, d in files.items()}
+    changed: list[str] = [
+        path for path, h in hashes.items() if manifest.get(path) != h]
+    if dry_run or not changed:
+        return changed
+    for folder in sorted(set(p.rsplit('/', 1)[0] for p in changed
+                             if '/' in p)):
+        backend.mkdir(folder)
+    for path in changed:
+        backend.write(path, files[path])
+        manifest[path] = hashes[path]
+    backend.write(MANIFEST, json.dumps(manifest).encode())
+    return changed
+
+
+def run(device: dict, files: dict[str, bytes], backend: type = AmpyBackend,
+        **kwargs) -> tuple[str, list[str] | Exception]:
+    """
+    Provision one device, errors are returned instead of raised. The \
+        PyboardError of ampy derives from BaseException, so it is caught \
+        as well.
+    """
+    try:
+        board = backend(device['port'])
+    except BaseException as error:
+        if isinstance(error, (KeyboardInterrupt, SystemExit)):
+            raise
+        return device['name'], error
+    try:
+        return device['name'], provision(board, files, **kwargs)
+    except BaseException as error:
+        if isinstance(error, (KeyboardInterrupt, SystemExit)):
+            raise
+        return device['name'], error
+    finally:
+        board.close()
+
+
+def main(argv: list[str] = None, backend: type = AmpyBackend) -> int:
+    parser = argparse.ArgumentParser(
+        description='Provision the ESP32 devices of the fleet.')
+    parser.add_argument('inventory', help='Fleet inventory (JSON)')
+    parser.add_argument('--only', nargs='+', metavar='NAME',
+                        help='Only provision these devices')
+    parser.add_argument('--force', action='store_true',
+                        help='Upload all files, ignore the manifest')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only show the files that would be uploaded')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Devices provisioned at the same time')
+    args = parser.parse_args(argv)
+
+    with open(args.inventory, 'r') as f:
+        inventory: dict = json.load(f)
+    devices: list[dict] = [
+        d for d in inventory['devices']
+        if not args.only or d['name'] in args.only]
+    files: dict[str, bytes] = local_files()
+
+    def job(device: dict) -> tuple[str, list[str] | Exception]:
+        try:
+            own: dict[str, bytes] = device_files(files, inventory, device)
+        except Exception as error:  # Invalid settings, the rest goes on
+            return device['name'], error
+        return run(device, own, backend, force=args.force,
+                   dry_run=args.dry_run)
+
+    with ThreadPoolExecutor(max(1, min(args.workers, len(devices)))) as pool:
+        results = pool.map(job, devices)
+        failed: int = 0
+        for name, result in results:
+            if isinstance(result, Exception):
+                failed += 1
+                print(f'{name}: FAILED ({result!r})')
+            else:
+                print(f"{name}: {len(result)} file(s) "
+                      f"{'to upload' if args.dry_run else 'uploaded'}"
+                      + ''.join(f'\n    {p}' for p in result))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())